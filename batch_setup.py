@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from jvm_profiles import DEFAULT_PROFILE
+from mc_server_setup import provision_server
+
+DEFAULT_WORKERS = 8
+
+
+def load_batch_manifest(path: str) -> list[dict]:
+    """Read a batch manifest: a JSON list of servers, or ``{"servers": [...]}``.
+
+    Each entry needs a ``dir`` (or ``directory``); ``name``, ``version``,
+    ``min_memory``, ``max_memory``, ``nogui``, ``accept_eula``,
+    ``start_priority``, ``java_path`` and ``jvm_profile`` are optional.
+    Exported servers lists from the desktop GUI are accepted as-is.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("servers", [])
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    servers = []
+    seen_dirs = set()
+    for i, entry in enumerate(data):
+        directory = entry.get("dir") or entry.get("directory")
+        if not directory:
+            raise ValueError(f"Server #{i + 1} in {path} has no 'dir'")
+        directory = os.path.abspath(os.path.join(base_dir, directory))
+        if directory in seen_dirs:
+            raise ValueError(f"Directory {directory} is listed more than once")
+        seen_dirs.add(directory)
+        servers.append({
+            "name": entry.get("name") or os.path.basename(directory),
+            "dir": directory,
+            "version": entry.get("version", "latest"),
+            "min_memory": entry.get("min_memory", entry.get("minMemory", "1G")),
+            "max_memory": entry.get("max_memory", entry.get("maxMemory", "2G")),
+            "nogui": entry.get("nogui", True),
+            "accept_eula": entry.get("accept_eula", entry.get("eula_accepted", False)),
+            "start_priority": int(entry.get("start_priority", 0)),
+            "java_path": entry.get("java_path", ""),
+            "jvm_profile": entry.get("jvm_profile", DEFAULT_PROFILE),
+        })
+    return servers
+
+
+def provision_batch(servers: list[dict], workers: int = DEFAULT_WORKERS, on_progress=None,
+                    force: bool = False, connections: int = 1, use_store: bool = True) -> list[dict]:
+    """Provision many servers concurrently on a bounded thread pool.
+
+    Identical jars are downloaded once: the shared jar store serializes
+    fetches per SHA1 and the manifest cache shares version lookups.
+    ``on_progress(name, message, fraction)`` is called from worker threads.
+    Returns one result dict per server, in input order.
+    """
+    lock = threading.Lock()
+
+    def report(name, message, fraction):
+        if on_progress:
+            with lock:
+                on_progress(name, message, fraction)
+
+    def run(server):
+        name = server["name"]
+        started = time.time()
+        result = {"name": name, "dir": server["dir"], "requested_version": server["version"]}
+        try:
+            outcome = provision_server(
+                server["dir"], server["version"], server["min_memory"], server["max_memory"],
+                nogui=server["nogui"], accept_eula=server["accept_eula"], force=force,
+                connections=connections, use_store=use_store,
+                progress=lambda message, fraction: report(name, message, fraction),
+                profile=server["jvm_profile"], java_path=server["java_path"] or None,
+            )
+            result.update(status="ok", version=outcome["version"], jar=outcome["jar"])
+        except Exception as e:
+            result.update(status="failed", error=str(e))
+            report(name, f"Error: {e}", 1.0)
+        result["seconds"] = round(time.time() - started, 2)
+        return result
+
+    if not servers:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(servers))),
+                            thread_name_prefix="provision") as pool:
+        return list(pool.map(run, servers))
+
+
+def format_summary(results: list[dict]) -> str:
+    ok = sum(1 for r in results if r["status"] == "ok")
+    lines = [f"Provisioned {ok}/{len(results)} servers"]
+    width = max((len(r["name"]) for r in results), default=4)
+    for r in results:
+        if r["status"] == "ok":
+            detail = f"{r['version']:<12} {r['seconds']:>7.2f}s  server.jar {r['jar']}"
+        else:
+            detail = f"FAILED       {r['seconds']:>7.2f}s  {r['error']}"
+        lines.append(f"  {r['name']:<{width}}  {detail}")
+    return "\n".join(lines)
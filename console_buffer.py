@@ -0,0 +1,289 @@
+import os
+import re
+import threading
+from array import array
+from collections import deque
+from itertools import islice
+
+DEFAULT_MAX_LINES = 5000
+DEFAULT_CONSOLE_DIR = os.environ.get(
+    "MCSERVER_CONSOLE_DIR", os.path.join(os.path.expanduser("~"), ".mcserverpy", "console")
+)
+CHECKPOINT_EVERY = 1024
+MAX_SPOOL_BYTES = 64 * 1024 * 1024
+
+
+def console_spool_path(key: str, console_dir: str = DEFAULT_CONSOLE_DIR) -> str:
+    """Spool file used for the console history of the server identified by ``key``."""
+    return os.path.join(console_dir, re.sub(r"[^\w.-]", "_", key) + ".log")
+
+
+def split_lines(text: str) -> list[str]:
+    """``text`` cut into lines ending in ``"\n"``; a missing final newline is added.
+
+    Unlike ``str.splitlines`` only ``"\n"`` ends a line, which is how the
+    spool counts lines, so a stray ``"\r"`` or form feed in server output
+    can't shift sequence numbers between memory and disk.
+    """
+    lines = text.split("\n")
+    if not lines[-1]:
+        lines.pop()
+    return [line + "\n" for line in lines]
+
+
+def _normalize(lines: list[str]) -> list[str]:
+    """``lines`` as one ``"\n"``-terminated line per element, re-split only if needed."""
+    for line in lines:
+        if line.find("\n") != len(line) - 1:
+            return split_lines("".join(line if line.endswith("\n") else line + "\n" for line in lines))
+    return lines
+
+
+class ConsoleSpool:
+    """Append-only on-disk console history with a sparse line index.
+
+    The byte offset of every ``CHECKPOINT_EVERY``-th line is kept in a
+    ``.idx`` sidecar, so reading any range of old lines seeks to the nearest
+    checkpoint and scans at most that many lines. Nothing is read until the
+    spool is first used, and opening it only scans the lines written after
+    the last checkpoint. A spool that would grow past ``MAX_SPOOL_BYTES`` is
+    rotated to ``.1``; the number of lines rotated away is kept in a
+    ``.base`` sidecar, so line numbers keep counting up across rotations and
+    restarts, and lines that were rotated away read back as nothing.
+    """
+
+    def __init__(self, path: str, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.base_path = path + ".base"
+        self.checkpoint_every = checkpoint_every
+        self.line_count = 0
+        # Lines rotated away; line n is line n - first_line of the current file
+        self.first_line = 0
+        self._checkpoints = array("Q")
+        self._file = None
+        self._index_file = None
+
+    def open(self):
+        if self._file is not None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            with open(self.base_path, "r", encoding="ascii") as f:
+                self.first_line = int(f.read())
+        except (OSError, ValueError):
+            self.first_line = 0
+
+        try:
+            with open(self.index_path, "rb") as f:
+                self._checkpoints.frombytes(f.read())
+        except (OSError, ValueError):
+            self._checkpoints = array("Q")
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        while self._checkpoints and self._checkpoints[-1] > size:
+            self._checkpoints.pop()  # the spool was truncated behind our back
+
+        # Count the lines from the last checkpoint on, adding checkpoints a crash may have missed
+        offset = self._checkpoints.pop() if self._checkpoints else 0
+        self.line_count = self.first_line + len(self._checkpoints) * self.checkpoint_every
+        if size:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    self._note_line(offset)
+                    offset += len(line)
+        with open(self.index_path, "wb") as f:
+            f.write(self._checkpoints.tobytes())
+        if size > MAX_SPOOL_BYTES:
+            self._rotate()
+
+        self._file = open(self.path, "ab")
+        self._index_file = open(self.index_path, "ab")
+
+    def append(self, lines: list[str]):
+        """Write ``lines``, each of which must end in its only ``"\n"``."""
+        self.open()
+        data = [line.encode("utf-8", errors="replace") for line in lines]
+        offset = self._file.tell()
+        if offset and offset + sum(map(len, data)) > MAX_SPOOL_BYTES:
+            self.close()
+            self._rotate()
+            self._file = open(self.path, "ab")
+            self._index_file = open(self.index_path, "ab")
+            offset = 0
+        added = len(self._checkpoints)
+        for encoded in data:
+            self._note_line(offset)
+            offset += len(encoded)
+        self._file.write(b"".join(data))
+        self._file.flush()
+        if len(self._checkpoints) > added:
+            self._index_file.write(self._checkpoints[added:].tobytes())
+            self._index_file.flush()
+
+    def read(self, start: int, end: int) -> list[str]:
+        """Lines ``start`` to ``end`` (0-based, end exclusive) of the spool."""
+        self.open()
+        start, end = max(self.first_line, start) - self.first_line, min(end, self.line_count) - self.first_line
+        if start >= end:
+            return []
+        checkpoint = start // self.checkpoint_every
+        lines = []
+        with open(self.path, "rb") as f:
+            f.seek(self._checkpoints[checkpoint])
+            for i, line in enumerate(f, checkpoint * self.checkpoint_every):
+                if i >= end:
+                    break
+                if i >= start:
+                    lines.append(line.decode("utf-8", errors="replace"))
+        return lines
+
+    def close(self):
+        for f in (self._file, self._index_file):
+            if f is not None:
+                f.close()
+        self._file = self._index_file = None
+
+    def _rotate(self):
+        """Move the current file to ``.1`` and start an empty one after ``line_count`` lines."""
+        os.replace(self.path, self.path + ".1")
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        self.first_line = self.line_count
+        self._checkpoints = array("Q")
+        tmp_path = self.base_path + ".tmp"
+        with open(tmp_path, "w", encoding="ascii") as f:
+            f.write(str(self.first_line))
+        os.replace(tmp_path, self.base_path)
+
+    def _note_line(self, offset: int):
+        if (self.line_count - self.first_line) % self.checkpoint_every == 0:
+            self._checkpoints.append(offset)
+        self.line_count += 1
+
+
+class ConsoleBuffer:
+    """Bounded, thread-safe buffer of a server's most recent console lines.
+
+    Reader threads ``append`` lines; each line gets a sequence number so a
+    renderer can ask for everything after the last line it drew with
+    ``since(seq)`` without copying or re-reading what it already has.
+    The oldest lines drop off once ``max_lines`` is reached.
+
+    With a ``spool`` every line is also written to disk, sequence numbers
+    continue across sessions, and ``before(seq, count)`` pages older lines
+    back in from the spool once they have left memory.
+
+    A producer may pass an ``entries`` list alongside the lines (e.g. each
+    line already parsed into a log event), kept in step with the lines in
+    memory and read back with ``entries_since(seq)``, so readers don't redo
+    that work for every line they serve. Lines appended without entries, or
+    loaded from the spool, have ``None`` entries.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, spool: ConsoleSpool | None = None):
+        self._lines: deque[str] = deque(maxlen=max_lines)
+        # Only allocated once a producer passes entries
+        self._entries: deque | None = None
+        self._lock = threading.Lock()
+        self.spool = spool
+        self._loaded = spool is None
+        self._last_seq = 0
+
+    @property
+    def last_seq(self) -> int:
+        with self._lock:
+            self._load()
+            return self._last_seq
+
+    def append(self, lines: list[str], entries: list | None = None):
+        """Add complete lines; each gets one sequence number per ``"\n"``, as in the spool."""
+        normalized = _normalize(lines)
+        if normalized is not lines:
+            # Re-split lines no longer line up with their entries
+            lines, entries = normalized, None
+        with self._lock:
+            self._load()
+            if self.spool is not None:
+                try:
+                    self.spool.append(lines)
+                except OSError as e:
+                    print(f"Console spool error: {e}")
+                    self.spool = None
+            self._lines.extend(lines)
+            if entries is not None and self._entries is None:
+                self._entries = deque([None] * (len(self._lines) - len(lines)), maxlen=self._lines.maxlen)
+            if self._entries is not None:
+                self._entries.extend(entries if entries is not None else [None] * len(lines))
+            self._last_seq += len(lines)
+
+    def before(self, seq: int, count: int) -> list[str]:
+        """Up to ``count`` lines immediately preceding line ``seq``, oldest first."""
+        with self._lock:
+            self._load()
+            start = max(1, seq - count)
+            first_in_memory = self._last_seq - len(self._lines) + 1
+            if start >= first_in_memory:
+                offset = start - first_in_memory
+                return list(islice(self._lines, offset, offset + seq - start))
+            if self.spool is None:
+                return []
+            # Seq n is line n - 1 of the spool
+            return self.spool.read(start - 1, seq - 1)
+
+    def _load(self):
+        """Pick up the tail of an existing spool the first time the buffer is used."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            self.spool.open()
+        except OSError as e:
+            print(f"Console spool error: {e}")
+            self.spool = None
+            return
+        count = self.spool.line_count
+        self._lines.extend(self.spool.read(count - self._lines.maxlen, count))
+        self._last_seq = count
+
+    def since(self, seq: int) -> tuple[list[str], int, bool]:
+        """Return (lines after ``seq``, newest seq, whether lines in between were dropped)."""
+        with self._lock:
+            self._load()
+            if seq >= self._last_seq or not self._lines:
+                return [], self._last_seq, False
+            # Line n of the buffer has seq last_seq - len + n, so only new lines are walked
+            count = min(self._last_seq - seq, len(self._lines))
+            return _newest(self._lines, count), self._last_seq, self._last_seq - seq > count
+
+    def entries_since(self, seq: int) -> tuple[list[str], list, int, bool]:
+        """Like ``since``, with the entry stored for each line (``None`` where there is none)."""
+        with self._lock:
+            self._load()
+            if seq >= self._last_seq or not self._lines:
+                return [], [], self._last_seq, False
+            count = min(self._last_seq - seq, len(self._lines))
+            entries = _newest(self._entries, count) if self._entries is not None else [None] * count
+            return _newest(self._lines, count), entries, self._last_seq, self._last_seq - seq > count
+
+    def tail(self, count: int) -> list[str]:
+        """The newest ``count`` lines."""
+        with self._lock:
+            self._load()
+            return _newest(self._lines, count)
+
+    def clear(self):
+        with self._lock:
+            self._lines.clear()
+            if self._entries is not None:
+                self._entries.clear()
+
+    def __len__(self):
+        return len(self._lines)
+
+
+def _newest(items: deque, count: int) -> list:
+    """The last ``count`` items, oldest first, walking only those."""
+    out = list(islice(reversed(items), count))
+    out.reverse()
+    return out
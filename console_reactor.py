@@ -0,0 +1,145 @@
+import codecs
+import locale
+import os
+import selectors
+import sys
+import threading
+
+READ_SIZE = 1024 * 64
+
+
+class _Stream:
+    """Decoding and line-splitting state for one registered pipe."""
+
+    def __init__(self, pipe, sink, on_close, encoding):
+        self.pipe = pipe
+        self.fd = pipe.fileno()
+        self.sink = sink
+        self.on_close = on_close
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.pending = ""
+
+    def feed(self, data: bytes):
+        """Decode a chunk and hand every complete line to the sink in one call."""
+        text = self.pending + self.decoder.decode(data)
+        cut = text.rfind("\n") + 1
+        self.pending = text[cut:]
+        if cut:
+            # Only "\n" ends a line, matching how the console spool counts them
+            self.sink([line + "\n" for line in text[:cut - 1].split("\n")])
+
+    def finish(self):
+        text = self.pending + self.decoder.decode(b"", final=True)
+        self.pending = ""
+        if text:
+            self.sink([text + "\n"])
+        if self.on_close:
+            self.on_close()
+
+
+class ConsoleReactor:
+    """Reads the stdout of every running server on one thread.
+
+    Pipes are registered with ``add(pipe, sink, on_close)`` and read in large
+    non-blocking chunks through ``selectors``. Output is decoded incrementally,
+    split into lines and passed to ``sink(lines)`` as a list per chunk;
+    ``on_close()`` runs once the pipe reaches EOF. Both callbacks run on the
+    reactor thread. Windows can't select on pipes, so there each pipe gets a
+    reader thread with the same chunked decoding instead.
+    """
+
+    def __init__(self, encoding: str | None = None, read_size: int = READ_SIZE):
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.read_size = read_size
+        self._use_selector = sys.platform != "win32"
+        self._lock = threading.Lock()
+        self._thread = None
+        if self._use_selector:
+            self._selector = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
+            self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+            self._pending_adds: list[_Stream] = []
+
+    def add(self, pipe, sink, on_close=None):
+        """Start reading ``pipe`` (a subprocess stdout) and dispatching its lines to ``sink``."""
+        stream = _Stream(pipe, sink, on_close, self.encoding)
+        if not self._use_selector:
+            threading.Thread(target=self._read_blocking, args=(stream,), daemon=True,
+                             name="console-reader").start()
+            return
+        os.set_blocking(stream.fd, False)
+        with self._lock:
+            self._pending_adds.append(stream)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="console-reactor")
+                self._thread.start()
+        self._wake()
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass  # a wake-up is already pending
+
+    def _run(self):
+        while True:
+            with self._lock:
+                adds, self._pending_adds = self._pending_adds, []
+            for stream in adds:
+                self._selector.register(stream.fd, selectors.EVENT_READ, stream)
+            for key, _ in self._selector.select():
+                stream = key.data
+                if stream is None:
+                    try:
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._read_ready(stream)
+
+    def _read_ready(self, stream: _Stream):
+        try:
+            data = os.read(stream.fd, self.read_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        try:
+            if data:
+                stream.feed(data)
+                return
+            self._selector.unregister(stream.fd)
+            stream.finish()
+        except Exception as e:
+            print(f"Console sink error: {e}")
+
+    def _read_blocking(self, stream: _Stream):
+        try:
+            while True:
+                try:
+                    data = os.read(stream.fd, self.read_size)
+                except OSError:
+                    break
+                if not data:
+                    break
+                stream.feed(data)
+        except Exception as e:
+            print(f"Console sink error: {e}")
+        finally:
+            stream.finish()
+
+
+_default_reactor = None
+_default_reactor_lock = threading.Lock()
+
+
+def get_console_reactor() -> ConsoleReactor:
+    """Return the process-wide console reactor."""
+    global _default_reactor
+    with _default_reactor_lock:
+        if _default_reactor is None:
+            _default_reactor = ConsoleReactor()
+        return _default_reactor
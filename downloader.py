@@ -0,0 +1,351 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.client import HTTPException
+
+from http_client import get_session
+
+CHUNK_SIZE = 1024 * 256
+MIN_SPLIT_SIZE = 1024 * 1024 * 8
+STATE_SAVE_INTERVAL = 1.0
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class DownloadError(RuntimeError):
+    pass
+
+
+class _RetryableError(Exception):
+    pass
+
+
+class _RangeNotSatisfiable(Exception):
+    pass
+
+
+def _open(url: str, start: int = 0, end: int | None = None, timeout: float = 60):
+    headers = {}
+    if start or end is not None:
+        headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+    try:
+        resp = get_session().request("GET", url, headers, timeout)
+    except (OSError, HTTPException) as e:
+        raise _RetryableError(str(e)) from e
+    if resp.status < 400:
+        return resp
+    resp.close()
+    if resp.status == 416:
+        raise _RangeNotSatisfiable()
+    if resp.status >= 500 or resp.status in (408, 429):
+        raise _RetryableError(f"HTTP {resp.status}")
+    raise DownloadError(f"HTTP {resp.status} while downloading {url}")
+
+
+def _response_range(resp) -> tuple[int, int | None]:
+    """Return (start offset, total size) described by a response."""
+    if resp.status == 206:
+        m = _CONTENT_RANGE_RE.match(resp.headers.get("Content-Range", ""))
+        if not m:
+            raise DownloadError("Server sent 206 without a usable Content-Range")
+        total = None if m.group(3) == "*" else int(m.group(3))
+        return int(m.group(1)), total
+    length = resp.headers.get("Content-Length")
+    return 0, int(length) if length else None
+
+
+class Downloader:
+    """HTTP downloader that resumes ``.part`` files and can split large files.
+
+    Bytes are written to ``<dest>.part``; an interrupted download resumes from
+    where it stopped using HTTP Range requests. With ``connections > 1`` and a
+    server that supports ranges, the file is fetched as that many concurrent
+    segments whose progress is recorded in ``<dest>.part.json``.
+
+    ``progress`` is called as ``progress(downloaded_bytes, total_bytes)`` after
+    every chunk; ``total_bytes`` is 0 when the size is unknown.
+
+    When ``expected_sha1`` is given the hash is computed over the streamed
+    bytes and checked before the ``.part`` file replaces ``dest_path``, so a
+    corrupt download never becomes the destination file. Segmented downloads
+    are hashed once all segments are complete.
+    """
+
+    def __init__(self, connections: int = 1, retries: int = 5, backoff: float = 1.0,
+                 timeout: float = 60, chunk_size: int = CHUNK_SIZE,
+                 min_split_size: int = MIN_SPLIT_SIZE):
+        self.connections = max(1, connections)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.min_split_size = min_split_size
+
+    def download(self, url: str, dest_path: str, progress=None, expected_sha1: str | None = None) -> str:
+        """Download ``url`` to ``dest_path`` and return the SHA1 of the file."""
+        tmp_path = dest_path + ".part"
+        state_path = tmp_path + ".json"
+        reporter = _ProgressReporter(progress)
+
+        size = None
+        if self.connections > 1:
+            size = self._probe_range_size(url)
+        if size is not None and size >= self.min_split_size:
+            self._download_segments(url, tmp_path, state_path, size, reporter)
+            sha1 = file_sha1(tmp_path)
+        else:
+            if os.path.exists(state_path):
+                # Segmented state from an earlier run can't be resumed sequentially
+                os.remove(state_path)
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            sha1 = self._download_stream(url, tmp_path, reporter)
+
+        if expected_sha1 and sha1 != expected_sha1.lower():
+            os.remove(tmp_path)
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            raise DownloadError(f"SHA1 mismatch for {os.path.basename(dest_path)} "
+                                f"(got {sha1}, expected {expected_sha1})")
+
+        # Atomic: a reader sees the old file or the new one, never neither
+        os.replace(tmp_path, dest_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        write_sha1_record(dest_path, sha1)
+        return sha1
+
+    def _retrying(self, what: str, func):
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except _RetryableError as e:
+                attempt += 1
+                if attempt > self.retries:
+                    raise DownloadError(f"{what} failed after {self.retries} retries: {e}") from e
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+    def _probe_range_size(self, url: str) -> int | None:
+        """Return the file size if the server honours Range requests, else None."""
+        def probe():
+            try:
+                with _open(url, 0, 0, self.timeout) as resp:
+                    if resp.status != 206:
+                        return None
+                    return _response_range(resp)[1]
+            except _RangeNotSatisfiable:
+                return None
+        return self._retrying("Range probe", probe)
+
+    def _download_stream(self, url: str, tmp_path: str, reporter) -> str:
+        # hashed[0] is the hash of the first hashed[1] bytes of the .part file
+        hashed = [hashlib.sha1(), 0]
+
+        def attempt():
+            offset = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
+            try:
+                resp = _open(url, offset, None, self.timeout)
+            except _RangeNotSatisfiable:
+                # The partial file doesn't match the remote one; start over
+                resp = _open(url, 0, None, self.timeout)
+            with resp:
+                start, total = _response_range(resp)
+                if resp.status != 206:
+                    offset = 0  # server ignored the Range header
+                elif start != offset:
+                    raise DownloadError(f"Server resumed at byte {start}, expected {offset}")
+                expected_total = total or 0
+                reporter.set_total(expected_total)
+                reporter.set_done(offset)
+                if hashed[1] != offset:
+                    # Only a .part inherited from an earlier run needs reading back
+                    hashed[0] = _sha1_prefix(tmp_path, offset)
+                    hashed[1] = offset
+                h = hashed[0]
+                with open(tmp_path, "ab" if offset else "wb") as out:
+                    while True:
+                        try:
+                            chunk = resp.read(self.chunk_size)
+                        except (OSError, HTTPException) as e:
+                            raise _RetryableError(str(e)) from e
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                        h.update(chunk)
+                        hashed[1] += len(chunk)
+                        reporter.advance(len(chunk))
+                written = os.path.getsize(tmp_path)
+                if expected_total and written < expected_total:
+                    raise _RetryableError(f"connection closed at {written}/{expected_total} bytes")
+        self._retrying("Download", attempt)
+        return hashed[0].hexdigest()
+
+    def _download_segments(self, url: str, tmp_path: str, state_path: str, size: int, reporter):
+        segments = self._load_state(state_path, url, size, tmp_path)
+        if segments is None:
+            # Keep any prefix left behind by an earlier single-stream attempt
+            have = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
+            if have >= size:
+                have = 0
+            step = -(-(size - have) // self.connections)
+            segments = [[start, min(start + step, size) - 1, 0] for start in range(have, size, step)]
+            if have:
+                segments.insert(0, [0, have - 1, have])
+            with open(tmp_path, "ab" if have else "wb") as f:
+                f.truncate(size)
+
+        lock = threading.Lock()
+        last_save = [0.0]
+        reporter.set_total(size)
+        reporter.set_done(sum(seg[2] for seg in segments))
+
+        def save_state(force=False):
+            now = time.time()
+            if force or now - last_save[0] >= STATE_SAVE_INTERVAL:
+                last_save[0] = now
+                with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump({"url": url, "size": size, "segments": segments}, f)
+                os.replace(state_path + ".tmp", state_path)
+
+        def fetch_segment(seg):
+            def attempt():
+                start, end, done = seg[0], seg[1], seg[2]
+                if start + done > end:
+                    return
+                with _open(url, start + done, end, self.timeout) as resp:
+                    if resp.status != 206 or _response_range(resp)[0] != start + done:
+                        raise DownloadError("Server stopped honouring Range requests")
+                    with open(tmp_path, "r+b") as out:
+                        out.seek(start + done)
+                        while True:
+                            try:
+                                chunk = resp.read(min(self.chunk_size, end - start - seg[2] + 1))
+                            except (OSError, HTTPException) as e:
+                                raise _RetryableError(str(e)) from e
+                            if not chunk:
+                                break
+                            out.write(chunk)
+                            with lock:
+                                seg[2] += len(chunk)
+                                reporter.advance(len(chunk))
+                                save_state()
+                            if start + seg[2] > end:
+                                break
+                if start + seg[2] <= end:
+                    raise _RetryableError(f"segment {start}-{end} ended early")
+            self._retrying(f"Segment {seg[0]}-{seg[1]}", attempt)
+
+        errors = []
+
+        def worker(seg):
+            try:
+                fetch_segment(seg)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(seg,), daemon=True) for seg in segments]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with lock:
+            save_state(force=True)
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def _load_state(state_path: str, url: str, size: int, tmp_path: str):
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("url") != url or state.get("size") != size:
+            return None
+        if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) != size:
+            return None
+        return state.get("segments")
+
+
+class _ProgressReporter:
+    def __init__(self, callback):
+        self.callback = callback
+        self.done = 0
+        self.total = 0
+
+    def set_total(self, total: int):
+        self.total = total
+
+    def set_done(self, done: int):
+        self.done = done
+        if self.callback:
+            self.callback(self.done, self.total)
+
+    def advance(self, n: int):
+        self.done += n
+        if self.callback:
+            self.callback(self.done, self.total)
+
+
+def file_sha1(path: str) -> str:
+    return _sha1_prefix(path, None).hexdigest()
+
+
+def _sha1_prefix(path: str, limit: int | None):
+    """Return a SHA1 object fed with the first ``limit`` bytes of ``path`` (all if None)."""
+    h = hashlib.sha1()
+    remaining = limit
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(1024 * 1024 if remaining is None else min(1024 * 1024, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return h
+
+
+def _sha1_record_path(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.sha1.json")
+
+
+def write_sha1_record(path: str, sha1: str):
+    """Remember the SHA1 of ``path`` together with its current size and mtime."""
+    st = os.stat(path)
+    record = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1.lower()}
+    try:
+        with open(_sha1_record_path(path), "w", encoding="utf-8") as f:
+            json.dump(record, f)
+    except OSError:
+        pass
+
+
+def read_sha1_record(path: str) -> str | None:
+    """Return the recorded SHA1 of ``path`` if the file is unchanged since it was recorded."""
+    try:
+        st = os.stat(path)
+        with open(_sha1_record_path(path), "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if record.get("size") != st.st_size or record.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    return record.get("sha1")
+
+
+def throttled(callback, interval: float = 0.5):
+    """Wrap a progress callback so it fires at most every ``interval`` seconds (and on completion)."""
+    last = [0.0]
+
+    def wrapper(done: int, total: int):
+        now = time.time()
+        if now - last[0] >= interval or (total and done >= total):
+            last[0] = now
+            callback(done, total)
+    return wrapper
@@ -0,0 +1,193 @@
+import json
+import threading
+from collections import OrderedDict
+
+# What a subscription does when its buffer is full
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+DEFAULT_BUFFER = 256
+# Topics whose last message is kept for subscribers that arrive late
+MAX_RETAINED_TOPICS = 1024
+
+
+class Message:
+    """One published event; its JSON is built once, however many subscribers send it."""
+
+    __slots__ = ("topic", "seq", "data", "_json")
+
+    def __init__(self, topic: str, seq: int, data: dict):
+        self.topic = topic
+        self.seq = seq
+        self.data = data
+        self._json = None
+
+    def json(self) -> str:
+        if self._json is None:
+            self._json = json.dumps(self.data)
+        return self._json
+
+
+class Subscription:
+    """A subscriber's bounded buffer of messages on some topics.
+
+    With ``DROP_OLDEST`` a full buffer discards its oldest message. With
+    ``COALESCE`` a message replaces a pending one with the same
+    ``coalesce_key(data)`` (e.g. progress updates of one job), so a slow
+    reader skips straight to the latest state; messages with no key fall
+    back to dropping the oldest. ``dropped`` counts what was discarded.
+    """
+
+    def __init__(self, bus, topics, maxlen: int = DEFAULT_BUFFER, policy: str = DROP_OLDEST, coalesce_key=None):
+        if policy not in (DROP_OLDEST, COALESCE):
+            raise ValueError(f"Unknown policy '{policy}'")
+        self.bus = bus
+        self.topics = tuple(topics)
+        self.maxlen = maxlen
+        self.policy = policy
+        self.coalesce_key = coalesce_key or (lambda data: data.get("type"))
+        self.dropped = 0
+        self.closed = False
+        self._pending: OrderedDict = OrderedDict()
+        self._next = 0
+        self._ready = threading.Condition(threading.Lock())
+
+    def put(self, message: Message):
+        with self._ready:
+            key = self.coalesce_key(message.data) if self.policy == COALESCE else None
+            if key is None:
+                self._next += 1
+                key = self._next
+            else:
+                key = (message.topic, key)
+                if key in self._pending:
+                    # Keep the newer message, moved to the back so order stays by arrival
+                    del self._pending[key]
+                    self.dropped += 1
+            self._pending[key] = message
+            if len(self._pending) > self.maxlen:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._ready.notify()
+
+    def get(self, timeout: float | None = None) -> list[Message]:
+        """Every pending message, oldest first; waits up to ``timeout`` for one (empty if none came)."""
+        with self._ready:
+            if not self._pending and not self.closed:
+                self._ready.wait(timeout)
+            messages = list(self._pending.values())
+            self._pending.clear()
+            return messages
+
+    def close(self):
+        self.bus.unsubscribe(self)
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    """In-process publish/subscribe by topic.
+
+    Topics are plain strings such as ``setup:<job id>`` or
+    ``server:<server id>``; a subscription topic ending in ``*`` matches
+    every topic with that prefix. ``publish`` appends the message to each
+    matching subscription's buffer and calls each listener, so N viewers
+    cost one publish and N appends; readers drain their buffer on their own
+    thread. The last message of each topic is retained, so a subscriber
+    that arrives after a job started still sees where it is.
+    """
+
+    def __init__(self, max_retained: int = MAX_RETAINED_TOPICS):
+        self._exact: dict[str, list] = {}
+        self._prefixes: list[tuple[str, object]] = []
+        self._retained: OrderedDict[str, Message] = OrderedDict()
+        self.max_retained = max_retained
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, data: dict) -> Message:
+        with self._lock:
+            self._seq += 1
+            message = Message(topic, self._seq, data)
+            self._retained[topic] = message
+            self._retained.move_to_end(topic)
+            if len(self._retained) > self.max_retained:
+                self._retained.popitem(last=False)
+            targets = list(self._exact.get(topic, ()))
+            targets.extend(target for prefix, target in self._prefixes if topic.startswith(prefix))
+        for target in targets:
+            try:
+                if isinstance(target, Subscription):
+                    target.put(message)
+                else:
+                    target(message)
+            except Exception as e:
+                print(f"Event bus subscriber error: {e}")
+        return message
+
+    def subscribe(self, *topics: str, maxlen: int = DEFAULT_BUFFER, policy: str = DROP_OLDEST,
+                  coalesce_key=None, replay: bool = True) -> Subscription:
+        """A buffered subscription to ``topics``, primed with their retained messages if ``replay``."""
+        subscription = Subscription(self, topics, maxlen, policy, coalesce_key)
+        with self._lock:
+            # Replayed under the lock, so a concurrent publish lands after them and only once
+            self._add(topics, subscription)
+            if replay:
+                for message in self._matching(topics):
+                    subscription.put(message)
+        return subscription
+
+    def listen(self, callback, *topics: str):
+        """Call ``callback(message)`` on the publishing thread for every message on ``topics``.
+
+        The callback must not block. Returns a function that unsubscribes.
+        """
+        with self._lock:
+            self._add(topics, callback)
+        return lambda: self.unsubscribe(callback)
+
+    def unsubscribe(self, target):
+        with self._lock:
+            for topic, targets in list(self._exact.items()):
+                if target in targets:
+                    targets.remove(target)
+                    if not targets:
+                        del self._exact[topic]
+            self._prefixes = [(prefix, t) for prefix, t in self._prefixes if t is not target]
+
+    def retained(self, *topics: str) -> list[Message]:
+        """The last message published on each of ``topics`` (prefix patterns included), oldest first."""
+        with self._lock:
+            return self._matching(topics)
+
+    def _matching(self, topics) -> list[Message]:
+        found = [m for topic, m in self._retained.items()
+                 if any(topic.startswith(t[:-1]) if t.endswith("*") else topic == t for t in topics)]
+        found.sort(key=lambda m: m.seq)
+        return found
+
+    def _add(self, topics, target):
+        for topic in topics:
+            if topic.endswith("*"):
+                self._prefixes.append((topic[:-1], target))
+            else:
+                self._exact.setdefault(topic, []).append(target)
+
+
+_default_bus = None
+_default_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """Return the process-wide event bus."""
+    global _default_bus
+    with _default_bus_lock:
+        if _default_bus is None:
+            _default_bus = EventBus()
+        return _default_bus
@@ -5,9 +5,10 @@ import threading
 import webbrowser
 import os
 import sys
-import time
 from pathlib import Path
 from PIL import Image, ImageTk
+from process_supervisor import get_supervisor, RUNNING, EXITED, CRASHED
+from lifecycle import get_lifecycle
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -38,6 +39,8 @@ class MinecraftServerLauncher:
         self.php_server_process = None
         self.python_server_process = None
         self.gui_process = None
+        self.supervisor = get_supervisor()
+        self.supervisor.subscribe(self.on_process_event)
         
         # Try to load icon
         try:
@@ -119,7 +122,7 @@ class MinecraftServerLauncher:
         exit_button.pack(pady=10)
     
     def launch_gui(self):
-        if self.gui_process is None or self.gui_process.poll() is not None:
+        if not self.supervisor.is_alive("GUI"):
             try:
                 app_dir = get_app_dir()
                 gui_script = os.path.join(app_dir, "mc_server_manager_gui.py")
@@ -128,14 +131,14 @@ class MinecraftServerLauncher:
                     return
                 self.gui_process = subprocess.Popen([sys.executable, gui_script], cwd=app_dir)
                 self.gui_status.configure(text="GUI: Running")
-                threading.Thread(target=self.monitor_process, args=(self.gui_process, self.gui_status, "GUI"), daemon=True).start()
+                self.supervisor.watch("GUI", self.gui_process, state=RUNNING)
             except Exception as e:
                 tk.messagebox.showerror("Error", f"Failed to launch GUI: {str(e)}")
         else:
             tk.messagebox.showinfo("Info", "GUI is already running")
     
     def launch_python_web(self):
-        if self.python_server_process is None or self.python_server_process.poll() is not None:
+        if not self.supervisor.is_alive("Python Web"):
             try:
                 app_dir = get_app_dir()
                 web_script = os.path.join(app_dir, "web_gui.py")
@@ -144,8 +147,7 @@ class MinecraftServerLauncher:
                     return
                 self.python_server_process = subprocess.Popen([sys.executable, web_script], cwd=app_dir)
                 self.python_web_status.configure(text="Python Web: Running (http://localhost:5000)")
-                threading.Thread(target=self.monitor_process, 
-                               args=(self.python_server_process, self.python_web_status, "Python Web"), daemon=True).start()
+                self.supervisor.watch("Python Web", self.python_server_process, state=RUNNING)
                 # Open web browser after a short delay using the main thread
                 self.root.after(2000, lambda: webbrowser.open("http://localhost:5000"))
             except Exception as e:
@@ -155,7 +157,7 @@ class MinecraftServerLauncher:
             webbrowser.open("http://localhost:5000")
     
     def launch_php_web(self):
-        if self.php_server_process is None or self.php_server_process.poll() is not None:
+        if not self.supervisor.is_alive("PHP Web"):
             try:
                 # Check if PHP is installed
                 try:
@@ -169,8 +171,7 @@ class MinecraftServerLauncher:
                 self.php_server_process = subprocess.Popen(["php", "-S", "localhost:8000"], 
                                                         cwd=app_dir)
                 self.php_web_status.configure(text="PHP Web: Running (http://localhost:8000)")
-                threading.Thread(target=self.monitor_process, 
-                               args=(self.php_server_process, self.php_web_status, "PHP Web"), daemon=True).start()
+                self.supervisor.watch("PHP Web", self.php_server_process, state=RUNNING)
                 # Open web browser after a short delay using the main thread
                 self.root.after(2000, lambda: webbrowser.open("http://localhost:8000/index.php"))
             except Exception as e:
@@ -179,11 +180,17 @@ class MinecraftServerLauncher:
             tk.messagebox.showinfo("Info", "PHP web interface is already running")
             webbrowser.open("http://localhost:8000/index.php")
     
-    def monitor_process(self, process, status_label, name):
-        while process.poll() is None:
-            time.sleep(1)
-        # Use after method to update UI from a thread
-        self.root.after(0, lambda: self.update_status(status_label, name))
+    def on_process_event(self, event):
+        if event.state not in (EXITED, CRASHED):
+            return
+        status_label = {
+            "GUI": self.gui_status,
+            "Python Web": self.python_web_status,
+            "PHP Web": self.php_web_status,
+        }.get(event.key)
+        if status_label is not None:
+            # Use after method to update UI from the supervisor's thread
+            self.root.after(0, lambda: self.update_status(status_label, event.key))
     
     def update_status(self, status_label, name):
         status_label.configure(text=f"{name}: Not running")
@@ -195,23 +202,19 @@ class MinecraftServerLauncher:
             self.php_server_process = None
     
     def exit_application(self):
-        # Terminate all running processes
+        # Terminate all running processes at once, killing any that ignore SIGTERM
         processes = [
-            (self.gui_process, "GUI"),
-            (self.python_server_process, "Python Web Server"),
-            (self.php_server_process, "PHP Web Server")
+            ("GUI", self.gui_process),
+            ("Python Web", self.python_server_process),
+            ("PHP Web", self.php_server_process)
         ]
+        targets = [(key, process) for key, process in processes
+                   if process is not None and self.supervisor.is_alive(key)]
         
-        for process, name in processes:
-            if process is not None and process.poll() is None:
-                try:
-                    process.terminate()
-                    process.wait(timeout=3)
-                except:
-                    try:
-                        process.kill()
-                    except:
-                        print(f"Could not terminate {name} process")
+        done = threading.Event()
+        get_lifecycle().stop_many(targets, on_all=lambda results: done.set(), term_timeout=3, kill_timeout=2)
+        if not done.wait(timeout=6):
+            print("Could not terminate all processes")
         
         self.root.quit()
         self.root.destroy()
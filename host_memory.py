@@ -0,0 +1,56 @@
+import os
+import sys
+
+
+def free_memory_mb() -> int | None:
+    """Memory available for new processes in MB, or None if it can't be determined."""
+    if sys.platform.startswith("linux"):
+        return _meminfo_mb("MemAvailable:")
+    if os.name == "nt":
+        status = _windows_memory_status()
+        return status.ullAvailPhys // (1024 * 1024) if status else None
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def total_memory_mb() -> int | None:
+    """Physical memory of the host in MB, or None if it can't be determined."""
+    if sys.platform.startswith("linux"):
+        return _meminfo_mb("MemTotal:")
+    if os.name == "nt":
+        status = _windows_memory_status()
+        return status.ullTotalPhys // (1024 * 1024) if status else None
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _meminfo_mb(field: str) -> int | None:
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _windows_memory_status():
+    import ctypes
+
+    class MEMORYSTATUSEX(ctypes.Structure):
+        _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+    status = MEMORYSTATUSEX()
+    status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+    if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+        return status
+    return None
@@ -0,0 +1,218 @@
+import gzip
+import http.client
+import threading
+import zlib
+from urllib.parse import urlsplit, urljoin
+from urllib.request import getproxies, proxy_bypass
+
+USER_AGENT = "Mozilla/5.0 (MCserverPy Setup)"
+MAX_REDIRECTS = 5
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+class PooledResponse:
+    """A response whose connection goes back to the pool once the body is consumed."""
+
+    def __init__(self, session, key, conn, resp, url):
+        self._session = session
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self._released = False
+        self.url = url
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+
+    @property
+    def length(self):
+        return self._resp.length
+
+    def read(self, amt: int | None = None) -> bytes:
+        data = self._resp.read(amt)
+        if self._resp.isclosed():
+            self._release(reuse=True)
+        return data
+
+    def close(self):
+        # An unfinished body leaves the connection mid-stream, so it can't be reused
+        self._release(reuse=self._resp.isclosed())
+
+    def _release(self, reuse: bool):
+        if self._released:
+            return
+        self._released = True
+        if not reuse or self._resp.will_close:
+            self._resp.close()
+            self._conn.close()
+            reuse = False
+        self._session._checkin(self._key, self._conn if reuse else None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HTTPSession:
+    """Thread-safe HTTP client with keep-alive connection pooling.
+
+    Connections are pooled per (scheme, host, port) and reused across calls,
+    so resolving a version and downloading its jar share TLS handshakes.
+    At most ``max_per_host`` requests run against one host at a time.
+    """
+
+    def __init__(self, max_per_host: int = 8, max_idle_per_host: int = 4, timeout: float = 60,
+                 user_agent: str = USER_AGENT):
+        self.max_per_host = max_per_host
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._idle: dict[tuple, list] = {}
+        self._limits: dict[tuple, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, headers: dict | None = None,
+                timeout: float | None = None) -> PooledResponse:
+        """Send a request and return the response with its body unread.
+
+        Redirects are followed. The caller must read the body to the end or
+        close the response (it is a context manager).
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = self._request_once(method, url, headers, timeout)
+            location = resp.headers.get("Location")
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                resp.read()
+                resp.close()
+                url = urljoin(url, location)
+                if resp.status == 303:
+                    method = "GET"
+                continue
+            return resp
+        raise http.client.HTTPException(f"Too many redirects while fetching {url}")
+
+    def fetch(self, url: str, headers: dict | None = None, compressed: bool = False,
+              timeout: float | None = None) -> tuple[int, http.client.HTTPMessage, bytes]:
+        """GET ``url`` and return (status, headers, body); ``compressed`` enables gzip."""
+        headers = dict(headers or {})
+        if compressed:
+            headers.setdefault("Accept-Encoding", "gzip, deflate")
+        with self.request("GET", url, headers, timeout) as resp:
+            body = resp.read()
+        encoding = resp.headers.get("Content-Encoding", "").lower()
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        return resp.status, resp.headers, body
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _request_once(self, method, url, headers, timeout) -> PooledResponse:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, host, port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        proxy = self._proxy_for(scheme, host)
+        if proxy and scheme == "http":
+            target = url  # plain HTTP proxies expect the absolute URL
+
+        send_headers = {"User-Agent": self.user_agent, "Connection": "keep-alive"}
+        send_headers.update(headers or {})
+
+        self._limit(key).acquire()
+        try:
+            while True:
+                conn, reused = self._checkout(key, proxy, timeout)
+                try:
+                    conn.request(method, target, headers=send_headers)
+                    resp = conn.getresponse()
+                    break
+                except _STALE_ERRORS:
+                    conn.close()
+                    if not reused:
+                        raise
+                    # The server dropped an idle connection; retry on a fresh one
+                except Exception:
+                    conn.close()
+                    raise
+        except BaseException:
+            self._limit(key).release()
+            raise
+        return PooledResponse(self, key, conn, resp, url)
+
+    def _checkout(self, key, proxy, timeout):
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return conns.pop(), True
+        scheme, host, port = key
+        timeout = timeout or self.timeout
+        if proxy:
+            proxy_parts = urlsplit(proxy)
+            proxy_host, proxy_port = proxy_parts.hostname, proxy_parts.port or 8080
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=timeout)
+                conn.set_tunnel(host, port)
+            else:
+                conn = http.client.HTTPConnection(proxy_host, proxy_port, timeout=timeout)
+        elif scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        return conn, False
+
+    def _checkin(self, key, conn):
+        if conn is not None:
+            with self._lock:
+                conns = self._idle.setdefault(key, [])
+                if len(conns) < self.max_idle_per_host:
+                    conns.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+        self._limit(key).release()
+
+    def _limit(self, key) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._limits.get(key)
+            if sem is None:
+                sem = self._limits[key] = threading.BoundedSemaphore(self.max_per_host)
+            return sem
+
+    @staticmethod
+    def _proxy_for(scheme: str, host: str) -> str | None:
+        proxy = getproxies().get(scheme)
+        if not proxy or proxy_bypass(host):
+            return None
+        return proxy
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def get_session() -> HTTPSession:
+    """Return the process-wide session shared by the CLI, desktop GUI and web app."""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = HTTPSession()
+        return _default_session
@@ -0,0 +1,271 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+from downloader import Downloader, file_sha1, read_sha1_record, write_sha1_record
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "MCSERVER_JAR_STORE", os.path.join(os.path.expanduser("~"), ".mcserverpy", "jars")
+)
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+# gc() leaves alone objects fetched this recently, so a fetch in another process can still deploy them
+GC_GRACE_SECONDS = 15 * 60
+
+# ioctl request number for FICLONE on Linux (btrfs, xfs, bcachefs, ...)
+_FICLONE = 0x40049409
+
+
+class _FileLock:
+    """Exclusive lock on ``path`` shared by every process that opens it, held while in a ``with`` block."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass  # LK_LOCK gives up after about ten seconds; keep waiting
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            self._file.close()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def _fetched_at(lock_path: str) -> float:
+    """When ``JarStore.fetch`` last asked for an object, from its lock file (0 if never)."""
+    try:
+        with open(lock_path, "r", encoding="ascii") as f:
+            return float(f.read() or 0)
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _reflink(src: str, dest: str):
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink is only supported on Linux")
+    import fcntl
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+
+
+class JarStore:
+    """Content-addressed store of server jars shared by every server directory.
+
+    Each jar is downloaded once into ``objects/<sha1[:2]>/<sha1>.jar`` and
+    deployed into server directories by reflink or hardlink, falling back to a
+    plain copy. ``refs.json`` records which paths use each object so that
+    ``gc()`` can delete jars no server references any more. Every change to
+    it happens under ``refs.json.lock``, so the desktop app, the web app and
+    the CLI can share one store without losing each other's references.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, link_mode: str = "auto"):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"link_mode must be one of {LINK_MODES}")
+        self.root = root
+        self.link_mode = link_mode
+        self._lock = threading.RLock()
+        self._fetch_locks: dict[str, threading.Lock] = {}
+
+    def object_path(self, sha1: str) -> str:
+        sha1 = sha1.lower()
+        return os.path.join(self.root, "objects", sha1[:2], f"{sha1}.jar")
+
+    def has(self, sha1: str) -> bool:
+        path = self.object_path(sha1)
+        if not os.path.isfile(path):
+            return False
+        recorded = read_sha1_record(path)
+        if recorded is None:
+            recorded = file_sha1(path)
+            write_sha1_record(path, recorded)
+        return recorded == sha1.lower()
+
+    def fetch(self, url: str, sha1: str, progress=None, connections: int = 1) -> bool:
+        """Make sure the object for ``sha1`` is in the store, downloading it at most once.
+
+        Concurrent callers asking for the same jar, in this process or another,
+        wait for the first download. Every fetch records its time in the
+        object's ``.lock`` file, which keeps ``gc()`` away from it until it is
+        deployed.
+        Returns True if this call downloaded the jar.
+        """
+        path = self.object_path(sha1)
+        with self._fetch_lock(sha1), self._object_lock(sha1) as lock:
+            with open(lock.path, "w", encoding="ascii") as f:
+                f.write(str(time.time()))
+            if self.has(sha1):
+                return False
+            Downloader(connections=connections).download(url, path, progress, expected_sha1=sha1)
+            return True
+
+    def deploy(self, sha1: str, dest_path: str) -> str:
+        """Place the stored jar at ``dest_path`` and return the method used."""
+        src = self.object_path(sha1)
+        dest_path = os.path.abspath(dest_path)
+        # Held while linking too, so gc() in another process can't delete the object mid-deploy
+        with self._lock, self._refs_lock():
+            if os.path.exists(dest_path) and os.path.samefile(src, dest_path):
+                method = "existing"
+            else:
+                tmp_path = dest_path + ".tmp"
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                method = self._materialize(src, tmp_path)
+                os.replace(tmp_path, dest_path)
+            write_sha1_record(dest_path, sha1.lower())
+            self._update_refs(sha1.lower(), dest_path)
+        return method
+
+    def release(self, dest_path: str):
+        """Forget that ``dest_path`` uses a stored jar."""
+        dest_path = os.path.abspath(dest_path)
+        with self._lock, self._refs_lock():
+            refs = self._load_refs()
+            for paths in refs.values():
+                if dest_path in paths:
+                    paths.remove(dest_path)
+            self._save_refs(refs)
+
+    def gc(self, dry_run: bool = False) -> list[str]:
+        """Delete stored jars that no deployed server.jar references. Returns removed paths."""
+        removed = []
+        with self._lock, self._refs_lock():
+            refs = self._load_refs()
+            objects_dir = os.path.join(self.root, "objects")
+            for dirpath, _, filenames in os.walk(objects_dir):
+                for filename in filenames:
+                    if not filename.endswith(".jar"):
+                        continue
+                    sha1 = filename[:-4]
+                    live = [p for p in refs.get(sha1, []) if self._still_uses(p, sha1)]
+                    if live:
+                        refs[sha1] = live
+                        continue
+                    refs.pop(sha1, None)
+                    path = os.path.join(dirpath, filename)
+                    with self._object_lock(sha1) as lock:
+                        if time.time() - _fetched_at(lock.path) < GC_GRACE_SECONDS:
+                            continue  # fetched moments ago; a deploy is likely on its way
+                        removed.append(path)
+                        if not dry_run:
+                            os.remove(path)
+                            record = os.path.join(dirpath, f".{filename}.sha1.json")
+                            if os.path.exists(record):
+                                os.remove(record)
+            if not dry_run:
+                self._save_refs(refs)
+        return removed
+
+    def _materialize(self, src: str, dest: str) -> str:
+        modes = ("reflink", "hardlink", "copy") if self.link_mode == "auto" else (self.link_mode,)
+        for mode in modes:
+            try:
+                if mode == "reflink":
+                    _reflink(src, dest)
+                elif mode == "hardlink":
+                    os.link(src, dest)
+                else:
+                    shutil.copy2(src, dest)
+                return mode
+            except OSError:
+                if os.path.exists(dest):
+                    os.remove(dest)
+                if mode == modes[-1]:
+                    raise
+        raise OSError("no deployment method available")
+
+    def _still_uses(self, path: str, sha1: str) -> bool:
+        if not os.path.isfile(path):
+            return False
+        try:
+            if os.path.samefile(path, self.object_path(sha1)):
+                return True
+        except OSError:
+            return False
+        return read_sha1_record(path) == sha1
+
+    def _update_refs(self, sha1: str, dest_path: str):
+        refs = self._load_refs()
+        for other, paths in refs.items():
+            if other != sha1 and dest_path in paths:
+                paths.remove(dest_path)
+        paths = refs.setdefault(sha1, [])
+        if dest_path not in paths:
+            paths.append(dest_path)
+        self._save_refs(refs)
+
+    def _refs_path(self) -> str:
+        return os.path.join(self.root, "refs.json")
+
+    def _object_lock(self, sha1: str) -> _FileLock:
+        """Lock serializing the download and deletion of one object across processes."""
+        return _FileLock(self.object_path(sha1) + ".lock")
+
+    def _refs_lock(self) -> _FileLock:
+        """Lock to hold across every read-modify-write of ``refs.json``."""
+        return _FileLock(self._refs_path() + ".lock")
+
+    def _load_refs(self) -> dict[str, list[str]]:
+        try:
+            with open(self._refs_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_refs(self, refs: dict[str, list[str]]):
+        os.makedirs(self.root, exist_ok=True)
+        refs = {sha1: paths for sha1, paths in refs.items() if paths}
+        tmp_path = self._refs_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(refs, f, indent=2)
+        os.replace(tmp_path, self._refs_path())
+
+    def _fetch_lock(self, sha1: str) -> threading.Lock:
+        with self._lock:
+            lock = self._fetch_locks.get(sha1.lower())
+            if lock is None:
+                lock = self._fetch_locks[sha1.lower()] = threading.Lock()
+            return lock
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_jar_store() -> JarStore:
+    """Return the process-wide jar store."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = JarStore()
+        return _default_store
@@ -0,0 +1,247 @@
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+
+from manifest_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_REGISTRY_PATH = os.path.join(DEFAULT_CACHE_DIR, "java_runtimes.json")
+JAVA_EXE = "java.exe" if os.name == "nt" else "java"
+PROBE_TIMEOUT = 15
+
+
+def java_major(version: str) -> int:
+    """Major version of a Java version string: ``1.8.0_392`` -> 8, ``17.0.12`` -> 17 (0 if unknown)."""
+    m = re.match(r"(\d+)(?:\.(\d+))?", version or "")
+    if not m:
+        return 0
+    major = int(m.group(1))
+    if major == 1 and m.group(2):
+        return int(m.group(2))
+    return major
+
+
+def _search_homes() -> list[str]:
+    """JDK home directories worth looking at on this machine, most specific first."""
+    homes = []
+    for name in ("JAVA_HOME", "JDK_HOME"):
+        if os.environ.get(name):
+            homes.append(os.environ[name])
+    homes.extend(p for p in os.environ.get("MCSERVER_JAVA_HOMES", "").split(os.pathsep) if p)
+
+    home = os.path.expanduser("~")
+    patterns = [
+        os.path.join(home, ".jdks", "*"),
+        os.path.join(home, ".sdkman", "candidates", "java", "*"),
+        os.path.join(home, ".asdf", "installs", "java", "*"),
+    ]
+    if os.name == "nt":
+        for root in filter(None, (os.environ.get("ProgramFiles"), os.environ.get("ProgramFiles(x86)"))):
+            for vendor in ("Java", "Eclipse Adoptium", "Eclipse Foundation", "Microsoft", "Zulu",
+                           "Amazon Corretto", "BellSoft", "Semeru"):
+                patterns.append(os.path.join(root, vendor, "*"))
+    elif sys.platform == "darwin":
+        patterns.append("/Library/Java/JavaVirtualMachines/*/Contents/Home")
+        patterns.append(os.path.join(home, "Library", "Java", "JavaVirtualMachines", "*", "Contents", "Home"))
+    else:
+        patterns.extend(["/usr/lib/jvm/*", "/usr/lib64/jvm/*", "/usr/java/*", "/opt/java/*", "/opt/jdk*"])
+    for pattern in patterns:
+        homes.extend(sorted(glob.glob(pattern)))
+    return homes
+
+
+class JavaRuntime:
+    """One installed Java runtime."""
+
+    __slots__ = ("path", "version", "major", "vendor", "mtime", "size")
+
+    def __init__(self, path, version, vendor="", mtime=0.0, size=0):
+        self.path = path
+        self.version = version
+        self.major = java_major(version)
+        self.vendor = vendor
+        self.mtime = mtime
+        self.size = size
+
+    def describe(self) -> str:
+        vendor = f"{self.vendor} " if self.vendor else ""
+        return f"Java {self.version} ({vendor}{self.path})"
+
+    def to_dict(self):
+        return {"path": self.path, "version": self.version, "major": self.major,
+                "vendor": self.vendor, "mtime": self.mtime, "size": self.size}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["path"], data["version"], data.get("vendor", ""),
+                   data.get("mtime", 0.0), data.get("size", 0))
+
+
+class JavaRegistry:
+    """Installed Java runtimes, discovered once and cached on disk.
+
+    ``runtimes()`` looks for ``java`` on PATH, under ``JAVA_HOME`` and in the
+    usual JDK install locations. Each binary is identified by its resolved
+    path; its version and vendor are read from the JDK's ``release`` file,
+    or by running it once, and remembered together with the binary's mtime
+    and size, so later scans (and later runs of the program) only re-probe
+    binaries that changed. Lookups after the first scan don't touch the disk.
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_REGISTRY_PATH):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._known: dict[str, JavaRuntime] | None = None
+        self._dirty = False
+        self._runtimes: list[JavaRuntime] | None = None
+        self._default: JavaRuntime | None = None
+
+    def runtimes(self, refresh: bool = False) -> list[JavaRuntime]:
+        """Every usable runtime, newest major version first."""
+        with self._lock:
+            if self._runtimes is None or refresh:
+                self._scan()
+            return list(self._runtimes)
+
+    def default(self, refresh: bool = False) -> JavaRuntime | None:
+        """The runtime a plain ``java`` command would run."""
+        self.runtimes(refresh)
+        return self._default
+
+    def probe(self, path: str) -> JavaRuntime | None:
+        """Version info for a specific java binary, or None if it isn't one."""
+        with self._lock:
+            self._load()
+            runtime = self._probe_cached(path)
+            if runtime is not None:
+                self._save()
+            return runtime
+
+    def select(self, required_major: int | None = None) -> JavaRuntime | None:
+        """Best runtime for something needing Java ``required_major`` or newer.
+
+        An exact major match wins, then the oldest newer one, since old
+        Minecraft versions can break on much newer Java. Without a
+        requirement the default runtime (or else the newest) is returned.
+        """
+        runtimes = self.runtimes()
+        if not required_major:
+            return self._default or (runtimes[0] if runtimes else None)
+        suitable = [r for r in runtimes if r.major >= required_major]
+        if not suitable:
+            return None
+        if self._default in suitable and self._default.major == required_major:
+            return self._default
+        return min(suitable, key=lambda r: r.major)
+
+    def _scan(self):
+        self._load()
+        candidates = []
+        on_path = shutil.which("java")
+        if on_path:
+            candidates.append(on_path)
+        for home in _search_homes():
+            candidates.append(os.path.join(home, "bin", JAVA_EXE))
+
+        found = {}
+        self._default = None
+        for candidate in candidates:
+            runtime = self._probe_cached(candidate)
+            if runtime is None:
+                continue
+            found.setdefault(runtime.path, runtime)
+            if candidate == on_path:
+                self._default = runtime
+        self._runtimes = sorted(found.values(), key=lambda r: r.major, reverse=True)
+        self._save()
+
+    def _probe_cached(self, path: str) -> JavaRuntime | None:
+        try:
+            real = os.path.realpath(path)
+            st = os.stat(real)
+        except OSError:
+            return None
+        cached = self._known.get(real)
+        if cached is not None and cached.mtime == st.st_mtime and cached.size == st.st_size:
+            return cached
+        version, vendor = _read_release_file(real) or _run_java(real)
+        if not version:
+            self._known.pop(real, None)
+            return None
+        runtime = JavaRuntime(real, version, vendor, st.st_mtime, st.st_size)
+        self._known[real] = runtime
+        self._dirty = True
+        return runtime
+
+    def _load(self):
+        if self._known is not None:
+            return
+        self._known = {}
+        self._dirty = False
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                for entry in json.load(f):
+                    runtime = JavaRuntime.from_dict(entry)
+                    self._known[runtime.path] = runtime
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def _save(self):
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([r.to_dict() for r in self._known.values()], f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            print(f"Warning: could not write Java runtime cache: {e}")
+
+
+def _read_release_file(java_path: str) -> tuple[str, str] | None:
+    """Version and vendor from the ``release`` file next to a JDK's bin directory, without running it."""
+    release = os.path.join(os.path.dirname(os.path.dirname(java_path)), "release")
+    try:
+        with open(release, "r", encoding="utf-8", errors="replace") as f:
+            fields = dict(line.rstrip("\n").split("=", 1) for line in f if "=" in line)
+    except OSError:
+        return None
+    version = fields.get("JAVA_VERSION", "").strip('"')
+    if not version:
+        return None
+    vendor = (fields.get("IMPLEMENTOR") or fields.get("JAVA_VENDOR") or "").strip('"')
+    return version, vendor
+
+
+def _run_java(java_path: str) -> tuple[str, str]:
+    try:
+        proc = subprocess.run([java_path, "-XshowSettings:properties", "-version"], stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, text=True, timeout=PROBE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return "", ""
+    props = dict(re.findall(r"^\s*(java\.(?:version|vendor)) = (.*)$", proc.stdout, re.MULTILINE))
+    version = props.get("java.version", "")
+    if not version:
+        # Example: 'openjdk version "17.0.12" 2024-07-16'
+        m = re.search(r'version "([^"]+)"', proc.stdout)
+        version = m.group(1) if m else ""
+    return version, props.get("java.vendor", "")
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_java_registry() -> JavaRegistry:
+    """Return the process-wide Java runtime registry."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = JavaRegistry()
+        return _default_registry
@@ -0,0 +1,109 @@
+import re
+import shlex
+import subprocess
+
+from host_memory import total_memory_mb
+
+DEFAULT_PROFILE = "g1"
+PROFILES = {
+    "g1": "G1 tuned for Minecraft (short, predictable pauses)",
+    "zgc": "ZGC for large heaps (sub-millisecond pauses, Java 17+)",
+    "low-memory": "Serial GC for small servers and tight hosts",
+    "none": "No GC flags, JVM defaults",
+}
+
+# Headroom left for the OS and everything that isn't a Minecraft heap
+HOST_RESERVE_MB = 1024
+HOST_RESERVE_FRACTION = 0.1
+# Baseline heap plus an estimate per chunk loaded around one player at a given view distance
+BASE_HEAP_MB = 1024
+HEAP_PER_CHUNK_MB = 2.5
+MIN_HEAP_MB = 512
+# Above ~32 GB the JVM loses compressed object pointers, so more heap is worth less
+MAX_HEAP_MB = 31 * 1024
+ZGC_HEAP_MB = 8 * 1024
+
+_G1_FLAGS = [
+    "-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled", "-XX:MaxGCPauseMillis=200",
+    "-XX:+UnlockExperimentalVMOptions", "-XX:+DisableExplicitGC", "-XX:+AlwaysPreTouch",
+    "-XX:G1HeapWastePercent=5", "-XX:G1MixedGCCountTarget=4", "-XX:G1MixedGCLiveThresholdPercent=90",
+    "-XX:G1RSetUpdatingPauseTimePercent=5", "-XX:SurvivorRatio=32", "-XX:+PerfDisableSharedMem",
+    "-XX:MaxTenuringThreshold=1",
+]
+
+
+def memory_mb(value) -> int:
+    """Size of a JVM memory setting such as ``2G`` or ``512M`` in megabytes (0 if unparseable)."""
+    m = re.fullmatch(r"\s*(\d+)\s*([KMGT]?)B?\s*", str(value), re.IGNORECASE)
+    if not m:
+        return 0
+    scale = {"K": 1 / 1024, "": 1 / (1024 * 1024), "M": 1, "G": 1024, "T": 1024 * 1024}
+    return int(int(m.group(1)) * scale[m.group(2).upper()])
+
+
+def profile_flags(profile: str, heap_mb: int = 0, java_major: int = 0) -> list[str]:
+    """GC and JVM flags for ``profile``, sized for a ``heap_mb`` max heap."""
+    if profile == "g1":
+        # Big heaps get a larger young generation and regions
+        if heap_mb >= 12 * 1024:
+            sizing = ["-XX:G1NewSizePercent=40", "-XX:G1MaxNewSizePercent=50", "-XX:G1HeapRegionSize=16M",
+                      "-XX:G1ReservePercent=15", "-XX:InitiatingHeapOccupancyPercent=20"]
+        else:
+            sizing = ["-XX:G1NewSizePercent=30", "-XX:G1MaxNewSizePercent=40", "-XX:G1HeapRegionSize=8M",
+                      "-XX:G1ReservePercent=20", "-XX:InitiatingHeapOccupancyPercent=15"]
+        return _G1_FLAGS + sizing
+    if profile == "zgc":
+        flags = ["-XX:+UseZGC", "-XX:+AlwaysPreTouch", "-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem"]
+        # Generational ZGC is opt-in on 21-22 and the only mode from 23 on
+        if 21 <= java_major < 23:
+            flags.append("-XX:+ZGenerational")
+        return flags
+    if profile == "low-memory":
+        return ["-XX:+UseSerialGC", "-XX:MaxMetaspaceSize=256m", "-Xss512k", "-XX:+DisableExplicitGC"]
+    if profile in ("none", "", None):
+        return []
+    raise ValueError(f"Unknown JVM profile '{profile}' (expected one of {', '.join(PROFILES)})")
+
+
+def build_command(java: str, jar: str, min_memory: str, max_memory: str, nogui: bool = True,
+                  profile: str = DEFAULT_PROFILE, java_major: int = 0) -> list[str]:
+    """The full argv that starts a server; shared by every launcher and the start scripts."""
+    cmd = [java, f"-Xms{min_memory}", f"-Xmx{max_memory}"]
+    cmd.extend(profile_flags(profile, memory_mb(max_memory), java_major))
+    cmd.extend(["-jar", jar])
+    if nogui:
+        cmd.append("nogui")
+    return cmd
+
+
+def format_command(cmd: list[str], windows: bool = False) -> str:
+    """``cmd`` as one line for a start.bat (``windows``) or start.sh."""
+    return subprocess.list2cmdline(cmd) if windows else shlex.join(cmd)
+
+
+def format_memory(mb: int) -> str:
+    return f"{mb // 1024}G" if mb % 1024 == 0 else f"{mb}M"
+
+
+def recommend_heap(servers: int = 1, view_distance: int = 10, host_mb: int | None = None) -> dict:
+    """Suggest Xms/Xmx and a profile for one of ``servers`` servers sharing this host.
+
+    The heap a server wants grows with the chunks loaded around a player,
+    ``(2 * view_distance + 1) ** 2``; it is capped at an equal share of host
+    RAM after an OS reserve. Xms equals Xmx so the heap is committed up front
+    and never resized under load.
+    """
+    host_mb = host_mb or total_memory_mb() or 4096
+    budget = host_mb - max(HOST_RESERVE_MB, int(host_mb * HOST_RESERVE_FRACTION))
+    share = budget // max(1, servers)
+    wanted = BASE_HEAP_MB + int((2 * view_distance + 1) ** 2 * HEAP_PER_CHUNK_MB)
+    heap = min(wanted, share, MAX_HEAP_MB)
+    heap = max(MIN_HEAP_MB, heap // 256 * 256)
+    if heap >= ZGC_HEAP_MB:
+        profile = "zgc"
+    elif heap < 2048:
+        profile = "low-memory"
+    else:
+        profile = "g1"
+    return {"min_memory": format_memory(heap), "max_memory": format_memory(heap), "profile": profile,
+            "host_mb": host_mb, "share_mb": share}
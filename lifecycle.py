@@ -0,0 +1,193 @@
+import heapq
+import os
+import subprocess
+import threading
+import time
+
+from process_supervisor import get_supervisor, EXITED, CRASHED
+
+STOP_TIMEOUT = 30
+TERM_TIMEOUT = 10
+KILL_TIMEOUT = 5
+
+# How a stop ended
+STOPPED = "stopped"
+TERMINATED = "terminated"
+KILLED = "killed"
+TIMED_OUT = "timeout"
+
+
+class _StopOp:
+    __slots__ = ("key", "process", "callbacks", "stage", "deadline", "term_timeout", "kill_timeout")
+
+    def __init__(self, key, process, term_timeout, kill_timeout):
+        self.key = key
+        self.process = process
+        self.callbacks = []
+        self.stage = STOPPED
+        self.deadline = 0.0
+        self.term_timeout = term_timeout
+        self.kill_timeout = kill_timeout
+
+
+class LifecycleController:
+    """Stops servers in the background, escalating stop -> SIGTERM -> SIGKILL.
+
+    ``stop()`` sends the console ``stop`` command and returns at once. One
+    timer thread tracks every pending stop's deadline; when a deadline passes
+    the process is terminated, then killed. Completion is learned from the
+    process supervisor, so stopping many servers takes as long as the slowest
+    one rather than the sum. ``on_done(key, outcome, returncode)`` is called
+    from a background thread with outcome ``stopped``, ``terminated``,
+    ``killed`` or ``timeout``.
+    """
+
+    def __init__(self, supervisor=None):
+        self.supervisor = supervisor or get_supervisor()
+        self._ops: dict[object, _StopOp] = {}
+        self._deadlines = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self.supervisor.subscribe(self._on_process_event)
+
+    def stop(self, key, process, on_done=None, stop_timeout: float = STOP_TIMEOUT,
+             term_timeout: float = TERM_TIMEOUT, kill_timeout: float = KILL_TIMEOUT):
+        """Ask ``process`` to stop gracefully and escalate in the background if it doesn't.
+
+        Stopping a process that is already being stopped just adds ``on_done``
+        to the pending stop.
+        """
+        with self._cond:
+            op = self._ops.get(key)
+            if op is not None and op.process is process:
+                if on_done:
+                    op.callbacks.append(on_done)
+                return
+        op = _StopOp(key, process, term_timeout, kill_timeout)
+        if on_done:
+            op.callbacks.append(on_done)
+        self.supervisor.mark_stopping(key)
+        graceful = False
+        try:
+            if process.stdin and not process.stdin.closed:
+                process.stdin.write("stop\n")
+                process.stdin.flush()
+                graceful = True
+        except (OSError, ValueError):
+            pass  # stdin already closed; go straight to SIGTERM
+
+        with self._cond:
+            self._ops[key] = op
+            if graceful:
+                self._schedule(op, stop_timeout)
+            else:
+                self._escalate(op)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="lifecycle")
+                self._thread.start()
+            self._cond.notify()
+        if not self.supervisor.is_alive(key) or process.poll() is not None:
+            self._finish(key, process)
+
+    def stop_many(self, targets, on_each=None, on_all=None, **timeouts):
+        """Stop every ``(key, process)`` in ``targets`` at once.
+
+        ``on_each(key, outcome, returncode)`` fires per server and
+        ``on_all(results)`` once all are down, with ``results`` mapping each
+        key to its outcome.
+        """
+        targets = list(targets)
+        results = {}
+        lock = threading.Lock()
+
+        def done(key, outcome, returncode):
+            if on_each:
+                on_each(key, outcome, returncode)
+            with lock:
+                results[key] = outcome
+                finished = len(results) == len(targets)
+            if finished and on_all:
+                on_all(results)
+
+        if not targets and on_all:
+            on_all(results)
+        for key, process in targets:
+            self.stop(key, process, done, **timeouts)
+
+    def pending(self) -> list:
+        with self._cond:
+            return list(self._ops)
+
+    def _schedule(self, op: _StopOp, delay: float):
+        op.deadline = time.monotonic() + delay
+        heapq.heappush(self._deadlines, (op.deadline, id(op), op))
+
+    def _escalate(self, op: _StopOp):
+        """Move ``op`` to its next stage. Called with the condition held."""
+        try:
+            if op.stage == STOPPED and os.name != 'nt':
+                op.stage = TERMINATED
+                op.process.terminate()
+                self._schedule(op, op.term_timeout)
+            elif op.stage in (STOPPED, TERMINATED):
+                op.stage = KILLED
+                if os.name == 'nt':
+                    subprocess.run(['taskkill', '/F', '/T', '/PID', str(op.process.pid)], check=False,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                else:
+                    op.process.kill()
+                self._schedule(op, op.kill_timeout)
+            else:
+                op.stage = TIMED_OUT
+                self._ops.pop(op.key, None)
+                threading.Thread(target=self._report, args=(op,), daemon=True).start()
+        except ProcessLookupError:
+            pass  # exited in the meantime; the supervisor event will finish the op
+
+    def _on_process_event(self, event):
+        if event.state in (EXITED, CRASHED):
+            with self._cond:
+                op = self._ops.get(event.key)
+            if op is not None:
+                self._finish(event.key, op.process)
+
+    def _finish(self, key, process):
+        with self._cond:
+            op = self._ops.get(key)
+            if op is None or op.process is not process:
+                return
+            del self._ops[key]
+        self._report(op)
+
+    @staticmethod
+    def _report(op: _StopOp):
+        for callback in op.callbacks:
+            try:
+                callback(op.key, op.stage, op.process.returncode)
+            except Exception as e:
+                print(f"Stop callback error: {e}")
+
+    def _run(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    deadline, _, op = heapq.heappop(self._deadlines)
+                    # Ignore deadlines left over from an earlier stage or a finished stop
+                    if self._ops.get(op.key) is op and op.deadline == deadline:
+                        self._escalate(op)
+                timeout = self._deadlines[0][0] - now if self._deadlines else None
+                self._cond.wait(timeout)
+
+
+_default_controller = None
+_default_controller_lock = threading.Lock()
+
+
+def get_lifecycle() -> LifecycleController:
+    """Return the process-wide lifecycle controller."""
+    global _default_controller
+    with _default_controller_lock:
+        if _default_controller is None:
+            _default_controller = LifecycleController()
+        return _default_controller
@@ -0,0 +1,228 @@
+import re
+import time
+
+# Event kinds
+LOG = "log"
+DONE = "done"
+JOIN = "join"
+LEAVE = "leave"
+CHAT = "chat"
+LAG = "lag"
+EXCEPTION = "exception"
+CRASH = "crash"
+
+# [12:34:56] [Server thread/INFO]: message  (vanilla)
+# [12:34:56 INFO]: message                  (Paper/Spigot)
+_HEADER = re.compile(
+    r"\[(?P<time>[^\]]+?)\] \[(?P<thread>[^\]]*)/(?P<level>[A-Z]+)\]: "
+    r"|\[(?P<ptime>\d\d:\d\d:\d\d) (?P<plevel>[A-Z]+)\]: "
+)
+_DONE = re.compile(r"Done \((?P<seconds>[\d.,]+)s\)!")
+_LAG = re.compile(r"Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind")
+_CHAT = re.compile(r"<(?P<player>[^>]+)> (?P<message>.*)")
+# java.lang.IllegalStateException: message / Exception in thread "main" ...
+_EXCEPTION = re.compile(r"(?:Exception in thread \"[^\"]*\" )?(?P<type>(?:[\w$]+\.)+[\w$]*(?:Exception|Error|Throwable))\b")
+_JOINED = " joined the game"
+_LEFT = " left the game"
+_LAG_PREFIX = "Can't keep up!"
+_CHAT_PREFIXES = ("[Not Secure] <", "<")
+_CRASH_HEADER = "---- Minecraft Crash Report ----"
+_TRACE_LEVELS = ("WARN", "ERROR", "FATAL")
+_TRACE_WORDS = ("Exception", "Error", "Throwable")
+
+
+class LogEvent:
+    """One classified line (or stack trace block) of server output.
+
+    ``kind`` is one of the module's event constants; the remaining fields are
+    filled in as far as the line provides them: ``player`` for join, leave
+    and chat, ``message`` for chat, ``seconds`` for done, ``ms``/``ticks``
+    for lag, ``exception`` and ``trace`` lines for exception and crash.
+    """
+
+    __slots__ = ("kind", "text", "time", "thread", "level", "message", "player", "seconds",
+                 "ms", "ticks", "exception", "trace", "received")
+
+    def __init__(self, kind, text, time_=None, thread=None, level=None, message=""):
+        self.kind = kind
+        self.text = text
+        self.time = time_
+        self.thread = thread
+        self.level = level
+        self.message = message
+        self.player = None
+        self.seconds = None
+        self.ms = None
+        self.ticks = None
+        self.exception = None
+        self.trace = None
+        self.received = time.time()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
+
+    def __repr__(self):
+        return f"LogEvent({self.kind!r}, {self.message or self.text!r})"
+
+
+def _is_continuation(line: str) -> bool:
+    """Whether ``line`` belongs to the stack trace above it rather than starting a new entry."""
+    return line[:1] in ("\t", " ") or line.startswith(("Caused by:", "Suppressed:", "... "))
+
+
+class LogParser:
+    """Turns raw server output into ``LogEvent`` objects.
+
+    The line header is matched by one compiled pattern; the message is then
+    dispatched on cheap prefix and suffix checks so at most one further
+    pattern runs per line, and most lines run none. Stack traces and crash
+    reports are collected into a single event, which is emitted once the
+    first line after the block arrives (or on ``flush()``).
+
+    One parser per output stream; it is not thread-safe.
+    """
+
+    def __init__(self):
+        self._block: LogEvent | None = None
+
+    def feed(self, lines) -> list[LogEvent]:
+        """Classify complete lines; returns the finished events in order."""
+        events = []
+        for line in lines:
+            line = line.rstrip("\r\n")
+            block = self._block
+            if block is not None:
+                if block.kind == CRASH:
+                    # A crash report runs, blank lines included, until logging resumes
+                    ends = line.startswith("#@!@#") or _HEADER.match(line)
+                else:
+                    ends = not line or not _is_continuation(line)
+                if not ends:
+                    block.trace.append(line)
+                    continue
+                self._block = None
+                events.append(block)
+            if line:
+                event = self.parse(line)
+                if event.kind in (EXCEPTION, CRASH):
+                    self._block = event
+                else:
+                    events.append(event)
+        return events
+
+    def flush(self) -> list[LogEvent]:
+        """Finish a pending stack trace (e.g. when the stream closes)."""
+        block, self._block = self._block, None
+        return [block] if block is not None else []
+
+    def parse(self, line: str) -> LogEvent:
+        """Classify a single line, without stack trace grouping."""
+        header = _HEADER.match(line)
+        if header:
+            message = line[header.end():]
+            level = header.group("level") or header.group("plevel")
+            event = LogEvent(LOG, line, header.group("time") or header.group("ptime"),
+                             header.group("thread"), level, message)
+        else:
+            message = line
+            level = None
+            event = LogEvent(LOG, line, message=message)
+
+        first = message[:1]
+        if first == "<" or first == "[":
+            if message.startswith(_CHAT_PREFIXES):
+                m = _CHAT.search(message)
+                if m:
+                    event.kind = CHAT
+                    event.player = m.group("player")
+                    event.message = m.group("message")
+        elif first == "D":
+            if message.startswith("Done ("):
+                m = _DONE.match(message)
+                if m:
+                    event.kind = DONE
+                    event.seconds = float(m.group("seconds").replace(",", "."))
+        elif first == "C" and message.startswith(_LAG_PREFIX):
+            m = _LAG.search(message, len(_LAG_PREFIX))
+            if m:
+                event.kind = LAG
+                event.ms = int(m.group("ms"))
+                event.ticks = int(m.group("ticks"))
+
+        # A prefix that didn't match (e.g. a player named "Dave" or "[Bot]") still gets the suffix checks
+        if event.kind == LOG:
+            if message.endswith(_JOINED):
+                event.kind = JOIN
+                event.player = message[:-len(_JOINED)]
+            elif message.endswith(_LEFT):
+                event.kind = LEAVE
+                event.player = message[:-len(_LEFT)]
+            elif message == _CRASH_HEADER:
+                event.kind = CRASH
+                event.trace = []
+                return event
+
+        if event.kind == LOG and (level is None or level in _TRACE_LEVELS) and any(w in message for w in _TRACE_WORDS):
+            # Logged errors may name the exception mid-line; a bare trace line starts with it
+            m = _EXCEPTION.search(message) if level else _EXCEPTION.match(message)
+            if m:
+                event.kind = EXCEPTION
+                event.exception = m.group("type")
+                event.trace = []
+        return event
+
+
+def _sample_lines() -> list[str]:
+    """A representative mix of server output for the benchmark."""
+    return [
+        "[12:00:01] [Server thread/INFO]: Preparing spawn area: 42%\n",
+        "[12:00:02] [Server thread/INFO]: Done (12.345s)! For help, type \"help\"\n",
+        "[12:01:00] [Server thread/INFO]: Steve joined the game\n",
+        "[12:01:00] [Server thread/INFO]: Steve[/127.0.0.1:51234] logged in with entity id 123 at (0.5, 64.0, 0.5)\n",
+        "[12:01:05] [Server thread/INFO]: <Steve> hello world\n",
+        "[12:01:06] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running 2042ms or 40 ticks behind\n",
+        "[12:01:07 INFO]: [Not Secure] <Alex> hi\n",
+        "[12:01:08] [Server thread/INFO]: Saving the game (this may take a moment!)\n",
+        "[12:01:09] [Server thread/ERROR]: Encountered an unexpected exception\n",
+        "java.lang.IllegalStateException: boom\n",
+        "\tat net.minecraft.server.MinecraftServer.run(MinecraftServer.java:100)\n",
+        "\tat java.base/java.lang.Thread.run(Thread.java:833)\n",
+        "[12:01:10] [Server thread/INFO]: Steve left the game\n",
+        "[12:01:11] [Worker-Main-3/INFO]: Loaded 7 recipes\n",
+    ]
+
+
+def benchmark(lines: list[str] | None = None, repeat: int = 20000) -> float:
+    """Parse ``lines`` ``repeat`` times and return lines per second."""
+    lines = lines or _sample_lines()
+    parser = LogParser()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parser.feed(lines)
+    parser.flush()
+    elapsed = time.perf_counter() - start
+    return len(lines) * repeat / elapsed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Classify Minecraft server log lines")
+    arg_parser.add_argument("log", nargs="?", help="Log file to classify (default: benchmark on sample lines)")
+    arg_parser.add_argument("--repeat", type=int, default=None, help="Benchmark passes over the input")
+    arg_parser.add_argument("--events", action="store_true", help="Print the non-plain events found in the log")
+    args = arg_parser.parse_args()
+
+    sample = None
+    if args.log:
+        with open(args.log, "r", encoding="utf-8", errors="replace") as f:
+            sample = f.readlines()
+    if args.events and sample:
+        log_parser = LogParser()
+        for log_event in log_parser.feed(sample) + log_parser.flush():
+            if log_event.kind != LOG:
+                print(log_event.to_dict())
+    else:
+        repeat = args.repeat or (max(1, 300000 // len(sample)) if sample else 20000)
+        rate = benchmark(sample, repeat)
+        print(f"{rate:,.0f} lines/sec")
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.client import HTTPException
+
+from http_client import get_session
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MCSERVER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".mcserverpy", "cache")
+)
+DEFAULT_TTL = float(os.environ.get("MCSERVER_MANIFEST_TTL", "600"))
+RETRY_BACKOFF = 60.0
+
+
+class CacheEntry:
+    """A cached JSON document together with its HTTP validators."""
+
+    __slots__ = ("url", "data", "etag", "last_modified", "fetched_at", "digest", "retry_after")
+
+    def __init__(self, url, data, etag=None, last_modified=None, fetched_at=0.0, digest=""):
+        self.url = url
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.digest = digest
+        self.retry_after = 0.0
+
+    def is_fresh(self, ttl: float) -> bool:
+        now = time.time()
+        return (now - self.fetched_at) < ttl or now < self.retry_after
+
+
+class ManifestCache:
+    """On-disk JSON cache with conditional GET revalidation and an in-memory LRU.
+
+    Entries younger than ``ttl`` seconds are served straight from memory.
+    Older entries are revalidated with ``If-None-Match``/``If-Modified-Since``
+    and only re-downloaded when the server reports a change. If the network
+    is unavailable (or ``offline`` is set) the last good copy is served.
+
+    Returned documents are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL,
+                 max_entries: int = 64, offline: bool = False):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.offline = offline
+        self._memory: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._url_locks: dict[str, threading.Lock] = {}
+
+    def get_json(self, url: str) -> dict:
+        return self.get_entry(url).data
+
+    def get_entry(self, url: str) -> CacheEntry:
+        entry = self._memory_get(url)
+        if entry is not None and (self.offline or entry.is_fresh(self.ttl)):
+            return entry
+
+        # Serialize refreshes per URL so concurrent callers share one request
+        with self._url_lock(url):
+            entry = self._memory_get(url)
+            if entry is not None and (self.offline or entry.is_fresh(self.ttl)):
+                return entry
+            if entry is None:
+                entry = self._load_from_disk(url)
+                if entry is not None and (self.offline or entry.is_fresh(self.ttl)):
+                    self._memory_put(entry)
+                    return entry
+            if self.offline:
+                raise RuntimeError(f"Offline mode: no cached copy of {url}")
+
+            try:
+                entry = self._revalidate(url, entry)
+            except (HTTPException, OSError) as e:
+                if entry is None:
+                    raise
+                # Back off so a dead network doesn't stall every lookup
+                entry.retry_after = time.time() + RETRY_BACKOFF
+                print(f"Warning: could not refresh {url} ({e}); using cached copy")
+            self._memory_put(entry)
+            return entry
+
+    def invalidate(self, url: str | None = None):
+        """Drop one URL (or everything) from the in-memory layer."""
+        with self._lock:
+            if url is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(url, None)
+
+    def _revalidate(self, url: str, entry: CacheEntry | None) -> CacheEntry:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        status, resp_headers, body = get_session().fetch(url, headers, compressed=True)
+        if status == 304 and entry is not None:
+            entry.fetched_at = time.time()
+            self._write_meta(entry)
+            return entry
+        if status != 200:
+            raise HTTPException(f"HTTP {status} while fetching {url}")
+        etag = resp_headers.get("ETag")
+        last_modified = resp_headers.get("Last-Modified")
+
+        new_entry = CacheEntry(
+            url=url,
+            data=json.loads(body.decode("utf-8")),
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=time.time(),
+            digest=hashlib.sha1(body).hexdigest(),
+        )
+        self._write_to_disk(new_entry, body)
+        return new_entry
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".meta.json"
+
+    def _load_from_disk(self, url: str) -> CacheEntry | None:
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            data = json.loads(body.decode("utf-8"))
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(
+            url=url,
+            data=data,
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            fetched_at=meta.get("fetched_at", 0.0),
+            digest=meta.get("digest") or hashlib.sha1(body).hexdigest(),
+        )
+
+    def _write_to_disk(self, entry: CacheEntry, body: bytes):
+        body_path, _ = self._paths(entry.url)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = body_path + ".part"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, body_path)
+            self._write_meta(entry)
+        except OSError as e:
+            print(f"Warning: could not write manifest cache: {e}")
+
+    def _write_meta(self, entry: CacheEntry):
+        _, meta_path = self._paths(entry.url)
+        meta = {
+            "url": entry.url,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "fetched_at": entry.fetched_at,
+            "digest": entry.digest,
+        }
+        try:
+            tmp_path = meta_path + ".part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+        except OSError as e:
+            print(f"Warning: could not write manifest cache metadata: {e}")
+
+    def _memory_get(self, url: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+            return entry
+
+    def _memory_put(self, entry: CacheEntry):
+        with self._lock:
+            self._memory[entry.url] = entry
+            self._memory.move_to_end(entry.url)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            lock = self._url_locks.get(url)
+            if lock is None:
+                lock = self._url_locks[url] = threading.Lock()
+            return lock
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_manifest_cache() -> ManifestCache:
+    """Return the process-wide cache shared by the CLI, desktop GUI and web app."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ManifestCache()
+        return _default_cache
+
+
+def configure_manifest_cache(cache_dir: str | None = None, ttl: float | None = None,
+                             offline: bool | None = None) -> ManifestCache:
+    """Adjust settings of the shared cache (e.g. from command-line flags)."""
+    cache = get_manifest_cache()
+    if cache_dir is not None:
+        cache.cache_dir = cache_dir
+        cache.invalidate()
+    if ttl is not None:
+        cache.ttl = ttl
+    if offline is not None:
+        cache.offline = offline
+    return cache
@@ -6,6 +6,7 @@ import subprocess
 import os
 import json
 import time
+from collections import deque
 from pathlib import Path
 import sys
 
@@ -24,40 +25,36 @@ def resource_path(relative_path):
 # Import functions from the existing setup script
 try:
     from mc_server_setup import (
-        get_version_info, check_java_version, ensure_dir, download_file,
-        write_eula, write_start_script, sha1_file
+        get_version_info, check_java_version, ensure_dir, install_server_jar,
+        write_eula, write_start_script, verify_sha1, resolve_java, script_java, server_command, read_view_distance
     )
+    from jvm_profiles import memory_mb, recommend_heap, DEFAULT_PROFILE, PROFILES
+    from downloader import throttled
+    from batch_setup import load_batch_manifest, provision_batch, format_summary
+    from console_buffer import split_lines
+    from console_reactor import get_console_reactor
+    from server_list_view import ServerListModel, VirtualServerList, SORT_FIELDS, STATUS_FILTERS
+    from process_supervisor import get_supervisor, STARTING, RUNNING, STOPPING, CRASHED
+    from lifecycle import get_lifecycle, STOPPED, TERMINATED, KILLED
+    from startup_scheduler import StartupScheduler
+    from log_parser import LogParser, DONE
+    from server_metrics import get_metrics
+    from resource_sampler import get_resource_sampler, SUPPORTED as RESOURCES_SUPPORTED
+    from server_config import ServerConfig, load_configs, save_configs, DEFAULT_CONFIG_FILE
 except ImportError:
     messagebox.showerror("Import Error", "Could not import mc_server_setup.py functions")
     sys.exit(1)
 
 
-class ServerConfig:
-    def __init__(self, name="", directory="", version="latest", min_memory="1G", 
-                 max_memory="2G", nogui=True, eula_accepted=False):
-        self.name = name
-        self.directory = directory
-        self.version = version
-        self.min_memory = min_memory
-        self.max_memory = max_memory
-        self.nogui = nogui
-        self.eula_accepted = eula_accepted
-        self.process = None
-    
-    def to_dict(self):
-        return {
-            'name': self.name,
-            'directory': self.directory,
-            'version': self.version,
-            'min_memory': self.min_memory,
-            'max_memory': self.max_memory,
-            'nogui': self.nogui,
-            'eula_accepted': self.eula_accepted
-        }
-    
-    @classmethod
-    def from_dict(cls, data):
-        return cls(**data)
+# Console rendering: redraw at most every CONSOLE_REFRESH_MS and keep this many lines in the widget
+CONSOLE_REFRESH_MS = 50
+MAX_CONSOLE_LINES = 1000
+# Older lines paged in from the console spool each time the view reaches the top
+CONSOLE_PAGE_LINES = 500
+# Most lines the widget holds while paging back; past this the newest end is dropped
+MAX_CONSOLE_HISTORY_LINES = MAX_CONSOLE_LINES + 4 * CONSOLE_PAGE_LINES
+# How often the Server Control tab's metrics line is redrawn
+METRICS_REFRESH_SECONDS = 1.0
 
 
 class MinecraftServerManagerGUI:
@@ -76,10 +73,29 @@ class MinecraftServerManagerGUI:
         
         # Initialize variables
         self.servers = []
-        self.server_items = []
         self.selected_server = None
         self.current_server = None
-        self.config_file = "servers_config.json"
+        self.config_file = DEFAULT_CONFIG_FILE
+        
+        # Console render state: which server's buffer the widget shows and how far
+        self._console_server = None
+        self._console_seq = 0
+        self._console_first_seq = 1
+        self._console_line_count = 0
+        self._console_line_limit = MAX_CONSOLE_LINES
+        # Set once paging back dropped the newest lines; new output waits until the view is back at the bottom
+        self._console_held = False
+        # Server ids whose process state changed, filled by the supervisor's watcher thread
+        self._status_changed = deque()
+        self.supervisor = get_supervisor()
+        self.supervisor.subscribe(lambda event: self._status_changed.append(event.key))
+        self.lifecycle = get_lifecycle()
+        self.startup_scheduler = StartupScheduler(self.supervisor)
+        self.metrics = get_metrics()
+        self._metrics_shown_at = 0.0
+        self.resources = get_resource_sampler()
+        # Callbacks from background threads that must run on the Tk thread
+        self._ui_calls = deque()
         
         # Initialize settings
         self.auto_create_dirs = tk.BooleanVar(value=True)
@@ -89,6 +105,7 @@ class MinecraftServerManagerGUI:
         
         self.setup_ui()
         self.load_servers()
+        self.root.after(CONSOLE_REFRESH_MS, self._render_console)
     
     def load_status_icons(self):
         """Load status icons for server status display"""
@@ -143,6 +160,7 @@ class MinecraftServerManagerGUI:
         self.file_menu.add_separator()
         self.file_menu.add_command(label="Import Servers List", command=self.import_servers_list)
         self.file_menu.add_command(label="Export Servers List", command=self.export_servers_list)
+        self.file_menu.add_command(label="Batch Provision Servers...", command=self.batch_provision_servers)
         self.file_menu.add_separator()
         self.file_menu.add_command(label="Open Project Directory", command=self.open_project_directory)
         self.file_menu.add_command(label="Open Configs Directory", command=self.open_configs_directory)
@@ -260,10 +278,31 @@ class MinecraftServerManagerGUI:
         list_label = ctk.CTkLabel(self.list_frame, text="Minecraft Servers", font=ctk.CTkFont(size=16, weight="bold"))
         list_label.pack(pady=10)
         
-        self.server_list_frame = ctk.CTkScrollableFrame(self.list_frame, height=300)
-        self.server_list_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        # Search, filter and sort controls
+        filter_frame = ctk.CTkFrame(self.list_frame)
+        filter_frame.pack(fill='x', padx=10, pady=(0, 5))
+        
+        self.list_search_var = tk.StringVar()
+        self.list_search_var.trace_add("write", lambda *args: self.apply_server_list_filter())
+        ctk.CTkEntry(filter_frame, textvariable=self.list_search_var, placeholder_text="Search name or directory").pack(side='left', fill='x', expand=True, padx=5)
+        
+        self.list_status_menu = ctk.CTkOptionMenu(filter_frame, values=list(STATUS_FILTERS), width=100, command=lambda _: self.apply_server_list_filter())
+        self.list_status_menu.pack(side='left', padx=5)
+        self.list_version_menu = ctk.CTkOptionMenu(filter_frame, values=["All"], width=110, command=lambda _: self.apply_server_list_filter())
+        self.list_version_menu.pack(side='left', padx=5)
+        self.list_memory_menu = ctk.CTkOptionMenu(filter_frame, values=["All"], width=80, command=lambda _: self.apply_server_list_filter())
+        self.list_memory_menu.pack(side='left', padx=5)
+        
+        ctk.CTkLabel(filter_frame, text="Sort:").pack(side='left', padx=(10, 0))
+        self.list_sort_menu = ctk.CTkOptionMenu(filter_frame, values=[f.capitalize() for f in SORT_FIELDS], width=90, command=lambda _: self.apply_server_list_filter())
+        self.list_sort_menu.pack(side='left', padx=5)
+        self.list_descending_var = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(filter_frame, text="Desc", variable=self.list_descending_var, width=60, command=self.apply_server_list_filter).pack(side='left', padx=5)
         
-        self.server_items = []
+        self.server_list_model = ServerListModel(self.is_server_running)
+        self.server_list_view = VirtualServerList(self.list_frame, self.server_list_model, self.on_server_list_select,
+                                                  self.running_icon, self.stopped_icon)
+        self.server_list_view.pack(fill='both', expand=True, padx=10, pady=10)
         
         buttons_frame = ctk.CTkFrame(self.list_frame)
         buttons_frame.pack(fill='x', padx=10, pady=5)
@@ -320,6 +359,24 @@ class MinecraftServerManagerGUI:
         ctk.CTkLabel(mem_frame, text="Max:").pack(side='left', padx=5)
         self.max_mem_var = tk.StringVar(value="2G")
         ctk.CTkEntry(mem_frame, textvariable=self.max_mem_var, width=60).pack(side='left', padx=5)
+        ctk.CTkButton(mem_frame, text="Auto", command=self.auto_size_memory, width=60).pack(side='left', padx=5)
+        
+        # JVM flag profile
+        ctk.CTkLabel(form_frame, text="JVM Profile:").grid(row=7, column=0, sticky='w', padx=10, pady=5)
+        self.jvm_profile_var = tk.StringVar(value=DEFAULT_PROFILE)
+        ctk.CTkOptionMenu(form_frame, values=list(PROFILES), variable=self.jvm_profile_var,
+                          width=300).grid(row=7, column=1, padx=10, pady=5)
+        
+        # Start priority (Start All launches higher priorities first)
+        ctk.CTkLabel(form_frame, text="Start Priority:").grid(row=5, column=0, sticky='w', padx=10, pady=5)
+        self.priority_var = tk.StringVar(value="0")
+        ctk.CTkEntry(form_frame, textvariable=self.priority_var, width=60).grid(row=5, column=1, sticky='w', padx=10, pady=5)
+        
+        # Java path (blank picks the best installed JDK for the version)
+        ctk.CTkLabel(form_frame, text="Java Path:").grid(row=6, column=0, sticky='w', padx=10, pady=5)
+        self.java_path_var = tk.StringVar()
+        ctk.CTkEntry(form_frame, textvariable=self.java_path_var, width=300,
+                     placeholder_text="Automatic").grid(row=6, column=1, padx=10, pady=5)
         
         # Options
         options_frame = ctk.CTkFrame(scrollable_frame)
@@ -402,6 +459,14 @@ class MinecraftServerManagerGUI:
         self.server_status_label = ctk.CTkLabel(self.control_frame, text="No server selected")
         self.server_status_label.pack(pady=5)
         
+        # Lag, startup and player metrics from the console output
+        self.server_metrics_label = ctk.CTkLabel(self.control_frame, text="")
+        self.server_metrics_label.pack(pady=(0, 5))
+        
+        # CPU, memory, threads and disk I/O of the server process
+        self.server_resources_label = ctk.CTkLabel(self.control_frame, text="")
+        self.server_resources_label.pack(pady=(0, 5))
+        
         # Console
         console_frame = ctk.CTkFrame(self.control_frame)
         console_frame.pack(fill='both', expand=True, padx=10, pady=5)
@@ -539,6 +604,21 @@ class MinecraftServerManagerGUI:
         
         ctk.CTkButton(java_frame, text="Check Java", command=self.check_java).pack(padx=10, pady=5)
         
+        # Resource monitoring
+        monitor_frame = ctk.CTkFrame(self.settings_frame)
+        monitor_frame.pack(fill='x', padx=20, pady=10)
+        ctk.CTkLabel(monitor_frame, text="Resource Monitoring", font=ctk.CTkFont(size=13, weight="bold")).pack(anchor='w', padx=10, pady=(10,5))
+        
+        interval_frame = ctk.CTkFrame(monitor_frame)
+        interval_frame.pack(fill='x', padx=10, pady=5)
+        ctk.CTkLabel(interval_frame, text="Sample every (seconds):").pack(side='left', padx=5)
+        self.sample_interval_var = ctk.StringVar(value=f"{self.resources.interval:g}")
+        ctk.CTkComboBox(interval_frame, variable=self.sample_interval_var, values=["1", "2", "5", "10", "30"],
+                        command=self.change_sample_interval).pack(side='left', padx=5)
+        if not RESOURCES_SUPPORTED:
+            ctk.CTkLabel(monitor_frame, text="Process sampling needs /proc (Linux); not available here.",
+                         text_color="orange").pack(anchor='w', padx=10, pady=5)
+        
         # About
         about_frame = ctk.CTkFrame(self.settings_frame)
         about_frame.pack(fill='x', padx=20, pady=10)
@@ -554,6 +634,13 @@ class MinecraftServerManagerGUI:
         """Change the appearance mode (light/dark/system)"""
         ctk.set_appearance_mode(choice)
 
+    def change_sample_interval(self, choice):
+        """Change how often server processes are sampled for CPU, memory and I/O"""
+        try:
+            self.resources.set_interval(float(choice))
+        except ValueError:
+            messagebox.showerror("Invalid Interval", f"'{choice}' is not a number of seconds")
+
     def change_color_theme(self, choice):
         """Change the color theme (blue/green/dark-blue)"""
         ctk.set_default_color_theme(choice)
@@ -672,14 +759,26 @@ class MinecraftServerManagerGUI:
                 if folder_name:
                     self.name_var.set(self.generate_unique_name(folder_name))
 
+    def auto_size_memory(self):
+        """Fill in Xms/Xmx (and a JVM profile) sized for this host, the other servers and the view distance"""
+        directory = self.dir_var.get().strip()
+        others = sum(1 for server in self.servers if server.directory != directory)
+        view_distance = read_view_distance(directory) if directory else 10
+        heap = recommend_heap(servers=others + 1, view_distance=view_distance)
+        self.min_mem_var.set(heap["min_memory"])
+        self.max_mem_var.set(heap["max_memory"])
+        self.jvm_profile_var.set(heap["profile"])
+        self.log_setup(f"Heap sized to {heap['max_memory']} for {others + 1} server(s) on {heap['host_mb']} MB RAM "
+                       f"at view distance {view_distance} ({heap['profile']} profile)")
+
     def check_java(self):
         def check():
             try:
-                ok, output = check_java_version()
+                ok, output = check_java_version(refresh=True)
                 if ok:
-                    self.java_status.configure(text="✓ Java 17+ detected")
+                    self.java_status.configure(text=f"✓ Java 17+ detected\n{output}")
                 else:
-                    self.java_status.configure(text="⚠ Java 17+ required")
+                    self.java_status.configure(text=f"⚠ Java 17+ required\n{output}")
             except Exception as e:
                 self.java_status.configure(text=f"✗ Java check failed: {e}")
         
@@ -701,6 +800,13 @@ class MinecraftServerManagerGUI:
                 nogui = self.nogui_var.get()
                 accept_eula = self.eula_var.get()
                 force = self.force_var.get()
+                try:
+                    start_priority = int(self.priority_var.get().strip() or 0)
+                except ValueError:
+                    messagebox.showerror("Error", "Start priority must be a whole number")
+                    return
+                java_path = self.java_path_var.get().strip()
+                jvm_profile = self.jvm_profile_var.get()
                 
                 if not name and directory:
                     base_name = os.path.basename(os.path.normpath(directory))
@@ -746,30 +852,32 @@ class MinecraftServerManagerGUI:
                 jar_path = os.path.join(directory, "server.jar")
                 if os.path.exists(jar_path) and not force:
                     self.log_setup("server.jar already exists, skipping download")
+                    if expected_sha1:
+                        self.status_label.configure(text="Verifying SHA1...")
+                        verify_sha1(jar_path, expected_sha1)
+                        self.log_setup("SHA1 verified")
                 else:
                     self.status_label.configure(text="Downloading server.jar...")
                     self.log_setup("Downloading server.jar...")
+                    def on_progress(done, total):
+                        if total:
+                            self.progress_bar.set(0.3 + 0.4 * done / total)
+                            self.status_label.configure(
+                                text=f"Downloading server.jar... {done/1_000_000:.1f}MB / {total/1_000_000:.1f}MB")
                     try:
-                        download_file(url, jar_path)
-                        self.log_setup("Download complete")
+                        result = install_server_jar(url, jar_path, expected_sha1,
+                                                    progress=throttled(on_progress, 0.2))
+                        self.log_setup(f"server.jar {result}" + (", SHA1 verified" if expected_sha1 else ""))
                     except Exception as e:
                         raise RuntimeError(f"Failed to download server.jar: {e}")
                 
-                self.progress_bar.set(0.7)
-                
-                if expected_sha1 and os.path.exists(jar_path):
-                    self.status_label.configure(text="Verifying SHA1...")
-                    actual_sha1 = sha1_file(jar_path)
-                    if actual_sha1.lower() != expected_sha1.lower():
-                        raise RuntimeError(f"SHA1 mismatch for server.jar")
-                    self.log_setup("SHA1 verified")
-                
                 self.progress_bar.set(0.8)
                 
                 self.status_label.configure(text="Writing configuration...")
                 try:
                     write_eula(directory, accept_eula)
-                    write_start_script(directory, min_mem, max_mem, nogui)
+                    write_start_script(directory, min_mem, max_mem, nogui, jvm_profile,
+                                       script_java(version_id, java_path))
                     self.log_setup("Configuration files written")
                 except Exception as e:
                     raise RuntimeError(f"Failed to write configuration files: {e}")
@@ -783,13 +891,15 @@ class MinecraftServerManagerGUI:
                     min_memory=min_mem,
                     max_memory=max_mem,
                     nogui=nogui,
-                    eula_accepted=accept_eula
+                    eula_accepted=accept_eula,
+                    start_priority=start_priority,
+                    java_path=java_path,
+                    jvm_profile=jvm_profile
                 )
                 
                 existing = next((s for s in self.servers if s.name == name), None)
                 if existing:
-                    idx = self.servers.index(existing)
-                    self.servers[idx] = server_config
+                    existing.update_from(server_config)
                 else:
                     self.servers.append(server_config)
                 
@@ -820,10 +930,7 @@ class MinecraftServerManagerGUI:
 
     def load_servers(self):
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    data = json.load(f)
-                    self.servers = [ServerConfig.from_dict(s) for s in data]
+            self.servers = load_configs(self.config_file)
         except Exception as e:
             messagebox.showerror("Load Error", f"Could not load servers: {e}")
         
@@ -832,54 +939,39 @@ class MinecraftServerManagerGUI:
 
     def save_servers(self):
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump([s.to_dict() for s in self.servers], f, indent=2)
+            save_configs(self.servers, self.config_file)
         except Exception as e:
             messagebox.showerror("Save Error", f"Could not save servers: {e}")
 
     def refresh_server_list(self):
-        for item in self.server_items:
-            item.destroy()
-        self.server_items.clear()
-        
-        for i, server in enumerate(self.servers):
-            status = "Stopped"
-            color = "red"
-            icon = self.stopped_icon
-            if server.process and server.process.poll() is None:
-                status = "Running"
-                color = "green"
-                icon = self.running_icon
-            
-            item_frame = ctk.CTkFrame(self.server_list_frame)
-            item_frame.pack(fill='x', padx=5, pady=2)
-            
-            name_label = ctk.CTkLabel(item_frame, text=f"Name: {server.name}", font=ctk.CTkFont(weight="bold"))
-            name_label.pack(anchor='w', padx=10, pady=2)
-            
-            version_label = ctk.CTkLabel(item_frame, text=f"Version: {server.version}")
-            version_label.pack(anchor='w', padx=10)
-            
-            dir_label = ctk.CTkLabel(item_frame, text=f"Directory: {server.directory}")
-            dir_label.pack(anchor='w', padx=10)
-            
-            # Status with icon
-            status_frame = ctk.CTkFrame(item_frame, fg_color="transparent")
-            status_frame.pack(anchor='w', padx=10, pady=2, fill='x')
-            
-            status_icon_label = ctk.CTkLabel(status_frame, text=icon, text_color=color, font=ctk.CTkFont(size=14))
-            status_icon_label.pack(side='left')
-            
-            status_label = ctk.CTkLabel(status_frame, text=f"Status: {status}", text_color=color)
-            status_label.pack(side='left', padx=(5, 0))
-            
-            item_frame.server_index = i
-            self.server_items.append(item_frame)
-            
-            def on_click(event, index=i):
-                self.selected_server = self.servers[index]
-                
-            item_frame.bind("<Button-1>", on_click)
+        """Re-index the servers and redraw the visible rows of the server list"""
+        self.server_list_model.set_servers(self.servers)
+        self.list_version_menu.configure(values=["All"] + self.server_list_model.versions())
+        self.list_memory_menu.configure(values=["All"] + self.server_list_model.memories())
+        self.server_list_view.refresh()
+
+    def refresh_server_row(self, server):
+        """Update the list after a single server's status changed"""
+        if self.server_list_model.update_status(server):
+            self.server_list_view.refresh()
+        else:
+            self.server_list_view.update_server(server)
+
+    def apply_server_list_filter(self):
+        self.server_list_model.set_filter(
+            query=self.list_search_var.get(),
+            status=self.list_status_menu.get(),
+            version=self.list_version_menu.get(),
+            memory=self.list_memory_menu.get()
+        )
+        self.server_list_model.set_sort(self.list_sort_menu.get().lower(), self.list_descending_var.get())
+        self.server_list_view.scroll_to(0)
+
+    def on_server_list_select(self, server):
+        self.selected_server = server
+
+    def is_server_running(self, server):
+        return self.supervisor.is_alive(server.id)
 
     def update_control_server_list(self):
         server_names = [s.name for s in self.servers]
@@ -899,6 +991,9 @@ class MinecraftServerManagerGUI:
         self.max_mem_var.set("2G")
         self.nogui_var.set(True)
         self.eula_var.set(False)
+        self.priority_var.set("0")
+        self.java_path_var.set("")
+        self.jvm_profile_var.set(DEFAULT_PROFILE)
         self.force_var.set(False)
         self.notebook.set("Server Setup")
 
@@ -916,6 +1011,9 @@ class MinecraftServerManagerGUI:
         self.max_mem_var.set(server.max_memory)
         self.nogui_var.set(server.nogui)
         self.eula_var.set(server.eula_accepted)
+        self.priority_var.set(str(server.start_priority))
+        self.java_path_var.set(server.java_path)
+        self.jvm_profile_var.set(server.jvm_profile)
         self.force_var.set(False)
         self.notebook.set("Server Setup")
 
@@ -926,8 +1024,8 @@ class MinecraftServerManagerGUI:
             return
         
         if messagebox.askyesno("Confirm Delete", f"Delete server '{server.name}'?\n\nThis will only remove it from the list, not delete files."):
-            if server.process and server.process.poll() is None:
-                server.process.terminate()
+            if self.is_server_running(server):
+                self.lifecycle.stop(server.id, server.process)
             
             self.servers.remove(server)
             self.save_servers()
@@ -951,89 +1049,86 @@ class MinecraftServerManagerGUI:
         self.stop_server(server)
 
     def start_server(self, server):
-        if server.process and server.process.poll() is None:
+        if self.is_server_running(server):
             messagebox.showinfo("Already Running", f"Server '{server.name}' is already running")
             return
         
         try:
-            java_ok, java_output = check_java_version()
-            if not java_ok:
-                error_msg = f"Java 17+ is required to run Minecraft servers.\n\nJava check result: {java_output}\n\nPlease install Java 17 or newer and ensure it's in your PATH."
-                messagebox.showerror("Java Error", error_msg)
-                return
-            
-            jar_path = os.path.join(server.directory, "server.jar")
-            if not os.path.isfile(jar_path):
-                messagebox.showerror("Error", f"server.jar not found in {server.directory}\n\nRun server setup first.")
-                return
-            
-            if not os.access(server.directory, os.W_OK):
-                messagebox.showerror("Permission Error", f"No write access to server directory: {server.directory}")
-                return
-            
-            cmd = [
-                "java",
-                f"-Xms{server.min_memory}",
-                f"-Xmx{server.max_memory}",
-                "-jar",
-                jar_path,
-            ]
-            if server.nogui:
-                cmd.append("nogui")
-            
-            try:
-                server.process = subprocess.Popen(
-                    cmd,
-                    cwd=server.directory,
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0
-                )
-                
-                threading.Thread(target=self._stream_server_output, args=(server,), daemon=True).start()
-                self.append_console(f"Starting server '{server.name}'...\n")
-                self.update_server_status()
-                self.refresh_server_list()  # Refresh list to update status icons
-                
-            except FileNotFoundError:
-                messagebox.showerror("Java Error", "Java not found. Please ensure Java 17+ is installed and in your PATH.")
-            except Exception as e:
-                messagebox.showerror("Start Error", f"Failed to start server: {e}")
-                
+            self._launch_server(server)
         except Exception as e:
-            messagebox.showerror("Start Error", str(e))
+            messagebox.showerror("Start Error", f"Failed to start server: {e}")
+            return
+        
+        if self.current_server is None:
+            # Show the console of the server that was just started
+            self.control_server_combo.set(server.name)
+            self.current_server = server
+        self.update_server_status()
+        self.refresh_server_row(server)  # Update this server's status icon
+
+    def _launch_server(self, server):
+        """Check the server can run and start its process. Raises on failure; touches no widgets,
+        so the startup scheduler can call it from its own thread"""
+        java = resolve_java(server.version, server.java_path)
+        
+        jar_path = os.path.join(server.directory, "server.jar")
+        if not os.path.isfile(jar_path):
+            raise RuntimeError(f"server.jar not found in {server.directory}\n\nRun server setup first.")
+        
+        if not os.access(server.directory, os.W_OK):
+            raise RuntimeError(f"No write access to server directory: {server.directory}")
+        
+        cmd = server_command(java, server.min_memory, server.max_memory, server.nogui, server.jvm_profile, jar_path)
+        
+        try:
+            server.process = subprocess.Popen(
+                cmd,
+                cwd=server.directory,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0
+            )
+        except FileNotFoundError:
+            raise RuntimeError(f"Java not found at {java}. Please ensure Java 17+ is installed and in your PATH.")
+        
+        self.supervisor.watch(server.id, server.process, server.name)
+        self.resources.set_limit(server.id, memory_mb(server.max_memory))
+        self._stream_server_output(server)
+        self.append_console(server, f"Starting server '{server.name}' with {java}...\n")
 
-    def stop_server(self, server):
-        if not server.process or server.process.poll() is not None:
+    def stop_server(self, server, on_stopped=None):
+        """Stop a server in the background; on_stopped() runs on the Tk thread once it is down"""
+        if not self.is_server_running(server):
             messagebox.showinfo("Not Running", f"Server '{server.name}' is not running")
             return
         
         try:
-            if server.process.stdin and not server.process.stdin.closed:
-                server.process.stdin.write("stop\n")
-                server.process.stdin.flush()
-            
-            # Wait for graceful shutdown
-            try:
-                server.process.wait(timeout=30)
-            except subprocess.TimeoutExpired:
-                # Force kill if graceful shutdown fails
-                if os.name == 'nt':
-                    subprocess.run(['taskkill', '/F', '/T', '/PID', str(server.process.pid)], check=False)
-                else:
-                    server.process.kill()
-                self.append_console(f"[Force killed server '{server.name}']\n")
-            
-            server.process = None
-            self.append_console(f"[Server '{server.name}' stopped]\n")
+            self.append_console(server, f"[Stopping server '{server.name}'...]\n")
+            self.lifecycle.stop(server.id, server.process,
+                                lambda key, outcome, returncode: self._ui_calls.append(
+                                    lambda: self._on_server_stopped(server, outcome, on_stopped)))
             self.update_server_status()
-            self.refresh_server_list()  # Refresh list to update status icons
-            
         except Exception as e:
             messagebox.showerror("Stop Error", f"Failed to stop server: {e}")
 
+    def _on_server_stopped(self, server, outcome, on_stopped=None):
+        if outcome == TERMINATED:
+            self.append_console(server, f"[Server '{server.name}' did not stop in time and was terminated]\n")
+        elif outcome == KILLED:
+            self.append_console(server, f"[Force killed server '{server.name}']\n")
+        elif outcome != STOPPED:
+            self.append_console(server, f"[Server '{server.name}' could not be stopped]\n")
+            return
+        
+        server.process = None
+        self.append_console(server, f"[Server '{server.name}' stopped]\n")
+        self.update_server_status()
+        self.refresh_server_row(server)  # Update this server's status icon
+        if on_stopped:
+            on_stopped()
+
     def on_control_server_selected(self, selection=None):
         if not selection:
             selection = self.control_server_var.get()
@@ -1053,17 +1148,66 @@ class MinecraftServerManagerGUI:
             self.send_btn.configure(state='disabled')
             return
         
-        if self.current_server.process and self.current_server.process.poll() is None:
-            status_text = f"{self.running_icon} Server '{self.current_server.name}' is RUNNING"
-            self.server_status_label.configure(text=status_text, text_color="green")
+        state = self.supervisor.state(self.current_server.id)
+        if state in (STARTING, RUNNING, STOPPING):
+            color = "green" if state == RUNNING else "orange"
+            status_text = f"{self.running_icon} Server '{self.current_server.name}' is {state.upper()}"
+            self.server_status_label.configure(text=status_text, text_color=color)
             self.command_entry.configure(state='normal')
             self.send_btn.configure(state='normal')
         else:
-            status_text = f"{self.stopped_icon} Server '{self.current_server.name}' is STOPPED"
+            label = "CRASHED" if state == CRASHED else "STOPPED"
+            status_text = f"{self.stopped_icon} Server '{self.current_server.name}' is {label}"
             self.server_status_label.configure(text=status_text, text_color="red")
             self.command_entry.configure(state='disabled')
             self.send_btn.configure(state='disabled')
 
+    def update_server_metrics(self):
+        """Summarize the selected server's lag, startup and player metrics under its status"""
+        if not self.current_server:
+            self.server_metrics_label.configure(text="")
+            return
+        metrics = self.metrics.get(self.current_server.id).snapshot(series_seconds=0)
+        lag = metrics["lag"]["5m"]
+        parts = [f"Players: {metrics['players']['online']} (peak 1h: {metrics['players']['peak_1h']:.0f})"]
+        if lag["events"]:
+            parts.append(f"Lag: {lag['events']} in 5m, worst {lag['max_ms']:.0f}ms / {lag['max_ticks']:.0f} ticks")
+        else:
+            parts.append(f"Lag: none in 5m ({metrics['lag']['1h']['events']} in 1h)")
+        if metrics["startup_seconds"] is not None:
+            parts.append(f"Startup: {metrics['startup_seconds']:.1f}s")
+        parts.append(f"Restarts: {metrics['restarts']}")
+        parts.append(f"Crashes: {metrics['crashes']}")
+        if metrics["errors_1h"]:
+            parts.append(f"Errors 1h: {metrics['errors_1h']}")
+        color = "orange" if lag["events"] else ("gray60", "gray70")
+        self.server_metrics_label.configure(text="    ".join(parts), text_color=color)
+        self.update_server_resources()
+
+    def _resource_summary(self, server) -> str:
+        """One line of the server's latest CPU, memory, thread and disk sample ('' if none)"""
+        sample = self.resources.latest(server.id)
+        if sample is None or not self.is_server_running(server):
+            return ""
+        rss = f"RSS: {sample['rss_mb']:.0f} MB"
+        if sample["rss_percent_of_xmx"] is not None:
+            rss += f" ({sample['rss_percent_of_xmx']:.0f}% of -Xmx{server.max_memory})"
+        return "    ".join([
+            f"CPU: {sample['cpu_percent']:.0f}%",
+            rss,
+            f"Threads: {sample['threads']:.0f}",
+            f"FDs: {sample['fds']:.0f}",
+            f"Disk: {sample['read_bps'] / 1024:.0f} KB/s read, {sample['write_bps'] / 1024:.0f} KB/s write",
+        ])
+
+    def update_server_resources(self):
+        """Show the selected server's latest resource sample under its metrics"""
+        if not self.current_server:
+            self.server_resources_label.configure(text="")
+            return
+        self.server_resources_label.configure(text=self._resource_summary(self.current_server),
+                                              text_color=("gray60", "gray70"))
+
     def start_server_control(self):
         if self.current_server:
             self.start_server(self.current_server)
@@ -1074,32 +1218,104 @@ class MinecraftServerManagerGUI:
 
     def restart_server_control(self):
         if self.current_server:
-            self.stop_server(self.current_server)
-            # Wait for stop, then start
-            self.root.after(3000, lambda: self.start_server(self.current_server))
+            self.restart_server(self.current_server)
 
-    def append_console(self, text, tag=None):
-        if hasattr(self, 'console_output'):
-            try:
-                self.console_output.insert(tk.END, text)
-                
-                # Auto-scroll if enabled
-                if self.auto_scroll_var.get():
-                    self.console_output.see(tk.END)
-                
-                # Limit console buffer to prevent memory issues
-                lines = self.console_output.get("1.0", tk.END).split('\n')
-                if len(lines) > 1000:
-                    lines = lines[-800:]
-                    self.console_output.delete("1.0", tk.END)
-                    self.console_output.insert("1.0", '\n'.join(lines))
-                    
-            except Exception as e:
-                print(f"Console append error: {e}")
+    def restart_server(self, server):
+        """Stop the server in the background and start it again once it is down"""
+        if self.is_server_running(server):
+            self.stop_server(server, on_stopped=lambda: self.start_server(server))
+        else:
+            self.start_server(server)
+
+    def append_console(self, server, text):
+        """Queue text for a server's console; safe to call from any thread"""
+        server.console.append(split_lines(text))
+
+    def _render_console(self):
+        """Drain the selected server's console buffer into the widget on the Tk thread"""
+        try:
+            while self._ui_calls:
+                self._ui_calls.popleft()()
+            
+            if self._status_changed:
+                servers_by_id = self.server_list_model.servers
+                while self._status_changed:
+                    server = servers_by_id.get(self._status_changed.popleft())
+                    if server is not None:
+                        self.refresh_server_row(server)
+                self.update_server_status()
+            
+            server = self.current_server
+            now = time.monotonic()
+            if server is not self._console_server or now - self._metrics_shown_at >= METRICS_REFRESH_SECONDS:
+                self._metrics_shown_at = now
+                self.update_server_metrics()
+            if self._console_held and self.console_output.yview()[1] >= 1.0:
+                # Back at the bottom after paging far back: jump to the newest lines
+                self._console_server = None
+            if server is not self._console_server:
+                # Switching servers redraws the newest lines straight from that server's memory buffer
+                self.console_output.delete("1.0", tk.END)
+                self._console_server = server
+                self._console_held = False
+                self._console_line_count = 0
+                self._console_line_limit = MAX_CONSOLE_LINES
+                self._console_seq = max(0, server.console.last_seq - MAX_CONSOLE_LINES) if server else 0
+                self._console_first_seq = self._console_seq + 1
+            
+            if server and not self._console_held:
+                lines, seq, _ = server.console.since(self._console_seq)
+                if lines:
+                    lines = lines[-self._console_line_limit:]
+                    self.console_output.insert(tk.END, "".join(lines))
+                    self._console_line_count += len(lines)
+                    if self._console_line_count == len(lines):
+                        self._console_first_seq = seq - len(lines) + 1
+                    excess = self._console_line_count - self._console_line_limit
+                    if excess > 0:
+                        self.console_output.delete("1.0", f"{excess + 1}.0")
+                        self._console_line_count -= excess
+                        self._console_first_seq += excess
+                    if self.auto_scroll_var.get():
+                        self.console_output.see(tk.END)
+                self._console_seq = seq
+            
+            # Page in older history once the user scrolls a full console to the top
+            top, bottom = self.console_output.yview()
+            if server and self._console_first_seq > 1 and top <= 0.0 and bottom < 1.0:
+                self._page_console_history(server)
+        except Exception as e:
+            print(f"Console render error: {e}")
+        finally:
+            self.root.after(CONSOLE_REFRESH_MS, self._render_console)
+
+    def _page_console_history(self, server):
+        """Prepend the page of history above the first line shown, read from the server's spool"""
+        older = server.console.before(self._console_first_seq, CONSOLE_PAGE_LINES)
+        if not older:
+            self._console_first_seq = 1
+            return
+        self.console_output.insert("1.0", "".join(older))
+        self._console_first_seq -= len(older)
+        self._console_line_count += len(older)
+        excess = self._console_line_count - MAX_CONSOLE_HISTORY_LINES
+        if excess > 0:
+            # Trim the far end; the newest lines come back when the view returns to the bottom
+            self.console_output.delete(f"{MAX_CONSOLE_HISTORY_LINES + 1}.0", tk.END)
+            self._console_line_count = MAX_CONSOLE_HISTORY_LINES
+            self._console_held = True
+        self._console_line_limit = max(self._console_line_limit, self._console_line_count)
+        # Keep the line the user was looking at in view
+        self.console_output.see(f"{len(older) + 1}.0")
 
     def clear_console(self):
         if hasattr(self, 'console_output'):
             self.console_output.delete("1.0", tk.END)
+            self._console_line_count = 0
+            self._console_line_limit = MAX_CONSOLE_LINES
+            self._console_held = False
+            if self._console_server:
+                self._console_first_seq = self._console_server.console.last_seq + 1
 
     def send_command(self, event=None):
         if not self.current_server or not self.current_server.process:
@@ -1113,7 +1329,7 @@ class MinecraftServerManagerGUI:
             if self.current_server.process.stdin and not self.current_server.process.stdin.closed:
                 self.current_server.process.stdin.write(f"{command}\n")
                 self.current_server.process.stdin.flush()
-                self.append_console(f"> {command}\n")
+                self.append_console(self.current_server, f"> {command}\n")
                 self.command_var.set("")
         except Exception as e:
             messagebox.showerror("Send Command Error", str(e))
@@ -1127,7 +1343,7 @@ class MinecraftServerManagerGUI:
             # Auto-create directory if setting is enabled and it doesn't exist
             if self.auto_create_dirs.get() and not os.path.exists(self.current_server.directory):
                 os.makedirs(self.current_server.directory, exist_ok=True)
-                self.append_console(f"Created directory: {self.current_server.directory}\n")
+                self.append_console(self.current_server, f"Created directory: {self.current_server.directory}\n")
             
             if os.name == 'nt':  # Windows
                 os.startfile(self.current_server.directory)
@@ -1147,6 +1363,8 @@ class MinecraftServerManagerGUI:
             try:
                 with open(file_path, 'r') as f:
                     config_data = json.load(f)
+                if any(s.id == config_data.get('id') for s in self.servers):
+                    config_data = {**config_data, 'id': None}
                 server = ServerConfig.from_dict(config_data)
                 server.name = self.generate_unique_name(server.name)
                 self.servers.append(server)
@@ -1190,6 +1408,8 @@ class MinecraftServerManagerGUI:
                 
                 imported_count = 0
                 for server_data in servers_data:
+                    if any(s.id == server_data.get('id') for s in self.servers):
+                        server_data = {**server_data, 'id': None}
                     server = ServerConfig.from_dict(server_data)
                     server.name = self.generate_unique_name(server.name)
                     self.servers.append(server)
@@ -1201,6 +1421,75 @@ class MinecraftServerManagerGUI:
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to import servers list: {e}")
     
+    def batch_provision_servers(self):
+        """Set up every server listed in a batch manifest concurrently"""
+        file_path = filedialog.askopenfilename(
+            title="Select Batch Manifest",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            specs = load_batch_manifest(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to read batch manifest: {e}")
+            return
+        
+        self.notebook.set("Server Setup")
+        self.setup_button.configure(state='disabled')
+        self.log_setup(f"Batch provisioning {len(specs)} servers...")
+        
+        def on_progress(name, message, fraction):
+            if not message.startswith("Downloading"):
+                self._ui_calls.append(lambda: self.log_setup(f"[{name}] {message}"))
+        
+        def finished(results, error):
+            # Runs on the Tk thread; the worker never touches widgets or self.servers
+            try:
+                if error is not None:
+                    self.log_setup(f"Batch error: {error}")
+                    return
+                by_dir = {spec["dir"]: spec for spec in specs}
+                for result in results:
+                    if result["status"] != "ok":
+                        continue
+                    spec = by_dir[result["dir"]]
+                    server_config = ServerConfig(
+                        name=spec["name"],
+                        directory=spec["dir"],
+                        version=result["version"],
+                        min_memory=spec["min_memory"],
+                        max_memory=spec["max_memory"],
+                        nogui=spec["nogui"],
+                        eula_accepted=spec["accept_eula"],
+                        start_priority=spec["start_priority"],
+                        java_path=spec["java_path"],
+                        jvm_profile=spec["jvm_profile"]
+                    )
+                    existing = next((s for s in self.servers if s.name == server_config.name), None)
+                    if existing:
+                        existing.update_from(server_config)
+                    else:
+                        self.servers.append(server_config)
+                self.save_servers()
+                self.refresh_server_list()
+                self.update_control_server_list()
+                self.log_setup(format_summary(results))
+            except Exception as e:
+                self.log_setup(f"Batch error: {e}")
+            finally:
+                self.setup_button.configure(state='normal')
+        
+        def run():
+            try:
+                results = provision_batch(specs, on_progress=on_progress)
+            except Exception as e:
+                self._ui_calls.append(lambda e=e: finished(None, e))
+            else:
+                self._ui_calls.append(lambda: finished(results, None))
+        
+        threading.Thread(target=run, daemon=True).start()
+    
     def export_servers_list(self):
         """Export entire servers list to file"""
         if not self.servers:
@@ -1260,7 +1549,10 @@ class MinecraftServerManagerGUI:
                 min_memory=selected_server.min_memory,
                 max_memory=selected_server.max_memory,
                 nogui=selected_server.nogui,
-                eula_accepted=selected_server.eula_accepted
+                eula_accepted=selected_server.eula_accepted,
+                start_priority=selected_server.start_priority,
+                java_path=selected_server.java_path,
+                jvm_profile=selected_server.jvm_profile
             )
             
             self.servers.append(cloned_server)
@@ -1274,37 +1566,58 @@ class MinecraftServerManagerGUI:
         """Restart the selected server"""
         selected_server = self.get_selected_server()
         if selected_server:
-            self.stop_server(selected_server)
-            time.sleep(2)  # Wait a bit before restarting
-            self.start_server(selected_server)
+            self.restart_server(selected_server)
     
     def start_all_servers(self):
-        """Start all servers"""
-        started_count = 0
-        for server in self.servers:
-            if not server.process or server.process.poll() is not None:
-                try:
-                    self.start_server(server)
-                    started_count += 1
-                except Exception as e:
-                    print(f"Failed to start {server.name}: {e}")
+        """Queue every stopped server on the startup scheduler, highest start priority first"""
+        pending = [server for server in self.servers if not self.is_server_running(server)]
+        if not pending:
+            messagebox.showinfo("Batch Start", "All servers are already running")
+            return
         
-        messagebox.showinfo("Batch Start", f"Started {started_count} servers")
-        self.refresh_server_list()
+        results = {}
+        
+        def finished(server, message):
+            results[server.id] = message is None
+            self.append_console(server, message or f"[Server '{server.name}' is up]\n")
+            if len(results) == len(pending):
+                started = sum(results.values())
+                self.append_console(self.current_server or server,
+                                    f"[Batch start finished: {started} of {len(pending)} servers up]\n")
+        
+        for server in pending:
+            self.append_console(server, f"[Queued server '{server.name}' for startup]\n")
+            self.startup_scheduler.schedule(
+                server.id,
+                lambda server=server: self._launch_server(server),
+                priority=server.start_priority,
+                memory_mb=memory_mb(server.max_memory),
+                on_started=lambda key, server=server: self._ui_calls.append(lambda: finished(server, None)),
+                on_failed=lambda key, reason, server=server: self._ui_calls.append(
+                    lambda: finished(server, f"[Server '{server.name}' failed to start: {reason}]\n")),
+            )
+        self.update_server_status()
     
     def stop_all_servers(self):
-        """Stop all running servers"""
-        stopped_count = 0
-        for server in self.servers:
-            if server.process and server.process.poll() is None:
-                try:
-                    self.stop_server(server)
-                    stopped_count += 1
-                except Exception as e:
-                    print(f"Failed to stop {server.name}: {e}")
+        """Stop all running servers at once, in the background"""
+        running = [server for server in self.servers if self.is_server_running(server)]
+        if not running:
+            messagebox.showinfo("Batch Stop", "No servers are running")
+            return
         
-        messagebox.showinfo("Batch Stop", f"Stopped {stopped_count} servers")
-        self.refresh_server_list()
+        by_id = {server.id: server for server in running}
+        for server in running:
+            self.append_console(server, f"[Stopping server '{server.name}'...]\n")
+        
+        def on_each(key, outcome, returncode):
+            self._ui_calls.append(lambda: self._on_server_stopped(by_id[key], outcome))
+        
+        def on_all(results):
+            stopped = sum(1 for outcome in results.values() if outcome in (STOPPED, TERMINATED, KILLED))
+            self._ui_calls.append(lambda: messagebox.showinfo("Batch Stop", f"Stopped {stopped} of {len(results)} servers"))
+        
+        self.lifecycle.stop_many([(server.id, server.process) for server in running], on_each, on_all)
+        self.update_server_status()
     
     def launch_py_to_java_converter(self):
         """Launch the Python to Java converter"""
@@ -1497,8 +1810,12 @@ Python Version: {platform.python_version()}
 Java Status: {self.java_status.cget('text') if hasattr(self, 'java_status') else 'Unknown'}
 
 Servers Configured: {len(self.servers)}
-Active Servers: {sum(1 for s in self.servers if s.process and s.process.poll() is None)}
+Active Servers: {sum(1 for s in self.servers if self.is_server_running(s))}
 """
+        for server in self.servers:
+            summary = self._resource_summary(server)
+            if summary:
+                system_info += f"\n{server.name}:\n  " + summary.replace("    ", "\n  ") + "\n"
         
         info_text.insert("1.0", system_info)
         info_text.configure(state="disabled")
@@ -1555,22 +1872,25 @@ Created with Python and CustomTkinter for modern, cross-platform server manageme
         ctk.CTkButton(about_frame, text="Close", command=about_window.destroy).pack(pady=10)
 
     def _stream_server_output(self, server):
-        try:
-            while True:
-                if server.process is None:
-                    break
-                line = server.process.stdout.readline()
-                if not line:
-                    if server.process.poll() is not None:
-                        break
-                    time.sleep(0.1)
-                    continue
-                self.append_console(line)
-        except Exception as e:
-            self.append_console(f"[Console reader error: {e}]\n")
-        finally:
-            self.append_console("[Process ended]\n")
-            self.update_server_status()
+        """Hand the server's stdout to the shared console reactor"""
+        parser = LogParser()
+        
+        def on_lines(lines):
+            server.console.append(lines)
+            self._on_log_events(server, parser.feed(lines))
+        
+        def on_close():
+            self._on_log_events(server, parser.flush())
+            server.console.append(["[Process ended]\n"])
+        
+        get_console_reactor().add(server.process.stdout, on_lines, on_close)
+
+    def _on_log_events(self, server, events):
+        """Act on classified server output; runs on the console reactor thread"""
+        for event in events:
+            if event.kind == DONE:
+                self.supervisor.mark_running(server.id)
+        self.metrics.feed(server.id, events)
 
 
 def main():
@@ -2,50 +2,54 @@ import argparse
 import hashlib
 import json
 import os
+import re
 import shutil
+import socket
 import subprocess
 import sys
-import time
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
+import threading
+from http.client import HTTPException
+
+from http_client import get_session
+from manifest_cache import get_manifest_cache, configure_manifest_cache
+from version_catalog import VersionCatalog
+from downloader import Downloader, throttled, read_sha1_record, write_sha1_record
+from jar_store import get_jar_store, LINK_MODES
+from java_runtime import get_java_registry
+from jvm_profiles import build_command, format_command, recommend_heap, DEFAULT_PROFILE, PROFILES
 
 PISTON_META_MANIFEST = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
 
 
 def fetch_json(url: str) -> dict:
-    req = Request(url, headers={"User-Agent": "Mozilla/5.0 (MCserverPy Setup)"})
-    with urlopen(req, timeout=60) as resp:
-        if resp.status != 200:
-            raise RuntimeError(f"HTTP {resp.status} while fetching {url}")
-        data = resp.read()
-        return json.loads(data.decode("utf-8"))
+    status, _, data = get_session().fetch(url, compressed=True)
+    if status != 200:
+        raise RuntimeError(f"HTTP {status} while fetching {url}")
+    return json.loads(data.decode("utf-8"))
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> VersionCatalog:
+    """Return the version catalog for the current manifest revision.
+
+    The catalog is rebuilt only when the cached manifest actually changes.
+    """
+    global _catalog
+    entry = get_manifest_cache().get_entry(PISTON_META_MANIFEST)
+    with _catalog_lock:
+        if _catalog is None or _catalog.revision != entry.digest:
+            _catalog = VersionCatalog(entry.data, revision=entry.digest)
+        return _catalog
 
 
 def get_version_info(version: str | None) -> tuple[str, dict]:
-    manifest = fetch_json(PISTON_META_MANIFEST)
-    if not version or version == "latest":
-        version_id = manifest.get("latest", {}).get("release")
-        if not version_id:
-            raise RuntimeError("Could not determine latest release from manifest")
-    else:
-        version_id = version
-
-    versions = manifest.get("versions", [])
-    selected = next((v for v in versions if v.get("id") == version_id), None)
-    if not selected:
-        # Try snapshot latest if asked explicitly
-        if version in ("latest-snapshot", "snapshot"):
-            snap_id = manifest.get("latest", {}).get("snapshot")
-            if not snap_id:
-                raise RuntimeError("Could not determine latest snapshot from manifest")
-            selected = next((v for v in versions if v.get("id") == snap_id), None)
-            if not selected:
-                raise RuntimeError(f"Snapshot {snap_id} not found in manifest")
-            version_id = snap_id
-        else:
-            raise RuntimeError(f"Version '{version_id}' not found in manifest")
+    selected = get_catalog().resolve(version)
+    version_id = selected["id"]
 
-    version_meta = fetch_json(selected["url"])  # contains server download
+    version_meta = get_manifest_cache().get_json(selected["url"])  # contains server download
     server_download = version_meta.get("downloads", {}).get("server")
     if not server_download:
         raise RuntimeError(f"No server download found for version {version_id}")
@@ -65,29 +69,56 @@ def sha1_file(path: str) -> str:
     return h.hexdigest()
 
 
-def download_file(url: str, dest_path: str):
-    tmp_path = dest_path + ".part"
-    req = Request(url, headers={"User-Agent": "Mozilla/5.0 (MCserverPy Setup)"})
-    with urlopen(req, timeout=300) as resp, open(tmp_path, "wb") as out:
-        total = resp.length or 0
-        downloaded = 0
-        last_print = time.time()
-        while True:
-            chunk = resp.read(1024 * 64)
-            if not chunk:
-                break
-            out.write(chunk)
-            downloaded += len(chunk)
-            now = time.time()
-            if total and (now - last_print) > 0.5:
-                pct = downloaded / total * 100
-                print(f"  Downloaded {downloaded/1_000_000:.1f}MB / {total/1_000_000:.1f}MB ({pct:.1f}%)", end="\r", flush=True)
-                last_print = now
-    # finalize
-    if os.path.exists(dest_path):
-        os.remove(dest_path)
-    os.replace(tmp_path, dest_path)
-    print("")
+def sha1_file_cached(path: str) -> str:
+    """SHA1 of ``path``, reusing the sidecar record while size and mtime are unchanged."""
+    sha1 = read_sha1_record(path)
+    if sha1 is None:
+        sha1 = sha1_file(path)
+        write_sha1_record(path, sha1)
+    return sha1
+
+
+def verify_sha1(path: str, expected_sha1: str):
+    actual_sha1 = sha1_file_cached(path)
+    if actual_sha1.lower() != expected_sha1.lower():
+        raise RuntimeError(f"SHA1 mismatch for {os.path.basename(path)} (got {actual_sha1}, expected {expected_sha1})")
+
+
+def download_file(url: str, dest_path: str, progress=None, connections: int = 1,
+                  expected_sha1: str | None = None) -> str:
+    """Download ``url`` to ``dest_path``, resuming any ``.part`` left by an earlier attempt.
+
+    The SHA1 is computed while streaming and checked against ``expected_sha1``
+    before the file is moved into place. Returns the SHA1 of the file.
+    """
+    return Downloader(connections=connections).download(url, dest_path, progress, expected_sha1)
+
+
+def install_server_jar(url: str, jar_path: str, expected_sha1: str | None = None, progress=None,
+                       connections: int = 1, use_store: bool = True) -> str:
+    """Put server.jar in place, downloading each distinct jar only once per machine.
+
+    With a known SHA1 the jar is fetched into the shared jar store and linked
+    into the server directory. Returns a short description of what happened.
+    """
+    if use_store and expected_sha1:
+        store = get_jar_store()
+        try:
+            downloaded = store.fetch(url, expected_sha1, progress, connections)
+            method = store.deploy(expected_sha1, jar_path)
+            return f"{'downloaded' if downloaded else 'reused'} from shared jar store ({method})"
+        except OSError as e:
+            print(f"Warning: shared jar store unavailable ({e}); downloading directly")
+    download_file(url, jar_path, progress, connections, expected_sha1)
+    return "downloaded"
+
+
+def print_progress(downloaded: int, total: int):
+    if total:
+        pct = downloaded / total * 100
+        print(f"  Downloaded {downloaded/1_000_000:.1f}MB / {total/1_000_000:.1f}MB ({pct:.1f}%)", end="\r", flush=True)
+    else:
+        print(f"  Downloaded {downloaded/1_000_000:.1f}MB", end="\r", flush=True)
 
 
 def write_eula(server_dir: str, accept_eula: bool):
@@ -102,21 +133,42 @@ def write_eula(server_dir: str, accept_eula: bool):
     return eula_path
 
 
-def write_start_script(server_dir: str, min_mem: str, max_mem: str, nogui: bool):
+def read_view_distance(server_dir: str, default: int = 10) -> int:
+    """``view-distance`` from a server's server.properties, or ``default``."""
+    try:
+        with open(os.path.join(server_dir, "server.properties"), "r", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition("=")
+                if key.strip() == "view-distance":
+                    return int(value.strip())
+    except (OSError, ValueError):
+        pass
+    return default
+
+
+def server_command(java: str, min_mem: str, max_mem: str, nogui: bool = True, profile: str = DEFAULT_PROFILE,
+                   jar: str = "server.jar") -> list[str]:
+    """Command line that starts a server with the given Java binary and JVM flag profile."""
+    runtime = get_java_registry().probe(shutil.which(java) or java)
+    return build_command(java, jar, min_mem, max_mem, nogui, profile, runtime.major if runtime else 0)
+
+
+def write_start_script(server_dir: str, min_mem: str, max_mem: str, nogui: bool,
+                       profile: str = DEFAULT_PROFILE, java: str = "java"):
     # Windows batch helper for convenience
-    cmd = f"java -Xms{min_mem} -Xmx{max_mem} -jar server.jar {'nogui' if nogui else ''}".strip()
+    cmd = server_command(java, min_mem, max_mem, nogui, profile)
     bat_path = os.path.join(server_dir, "start.bat")
     with open(bat_path, "w", encoding="utf-8") as f:
         f.write("@echo off\n")
         f.write("REM Generated by MCserverPy setup script\n")
-        f.write(cmd + "\n")
+        f.write(format_command(cmd, windows=True) + "\n")
         f.write("pause\n")
     # Cross-platform shell script as well
     sh_path = os.path.join(server_dir, "start.sh")
     with open(sh_path, "w", encoding="utf-8") as f:
         f.write("#!/usr/bin/env bash\n")
         f.write("# Generated by MCserverPy setup script\n")
-        f.write(cmd + "\n")
+        f.write(format_command(cmd) + "\n")
     try:
         os.chmod(sh_path, 0o755)
     except Exception:
@@ -124,45 +176,160 @@ def write_start_script(server_dir: str, min_mem: str, max_mem: str, nogui: bool)
     return bat_path, sh_path
 
 
-def check_java_version() -> tuple[bool, str]:
+def provision_server(server_dir: str, version: str | None = "latest", min_mem: str = "1G", max_mem: str = "2G",
+                     nogui: bool = True, accept_eula: bool = False, force: bool = False,
+                     connections: int = 1, use_store: bool = True, progress=None,
+                     profile: str = DEFAULT_PROFILE, java_path: str | None = None) -> dict:
+    """Set up one server directory end to end: resolve, install server.jar, write EULA and scripts.
+
+    ``progress`` is called as ``progress(message, fraction)``. The scripts run
+    ``java_path``, or the best installed JDK for the version. Returns a dict
+    with the resolved ``version``, the ``java`` written into the scripts and a
+    description of the ``jar`` step.
+    """
+    def report(message, fraction):
+        if progress:
+            progress(message, fraction)
+
+    server_dir = os.path.abspath(server_dir)
+    ensure_dir(server_dir)
+    report(f"Resolving version '{version}'...", 0.1)
+    version_id, server_download = get_version_info(version)
+    url = server_download.get("url")
+    expected_sha1 = server_download.get("sha1")
+    if not url:
+        raise RuntimeError("Server download URL missing in metadata")
+    report(f"Resolved version: {version_id}", 0.2)
+
+    jar_path = os.path.join(server_dir, "server.jar")
+    if os.path.exists(jar_path) and not force:
+        if expected_sha1:
+            verify_sha1(jar_path, expected_sha1)
+        jar_result = "already present"
+    else:
+        def on_download(done, total):
+            if total:
+                report(f"Downloading server.jar... {done/1_000_000:.1f}MB / {total/1_000_000:.1f}MB",
+                       0.2 + 0.6 * done / total)
+        jar_result = install_server_jar(url, jar_path, expected_sha1, progress=throttled(on_download),
+                                        connections=connections, use_store=use_store)
+    report(f"server.jar {jar_result}", 0.8)
+
+    write_eula(server_dir, accept_eula)
+    java = script_java(version_id, java_path)
+    write_start_script(server_dir, min_mem, max_mem, nogui, profile, java)
+    report("Setup complete", 1.0)
+    return {"version": version_id, "java": java, "jar": jar_result}
+
+
+def check_java_version(refresh: bool = False) -> tuple[bool, str]:
+    """Whether any installed Java runtime is 17+, plus a description of each one found.
+
+    Runtimes are discovered once and cached; ``refresh`` rescans.
+    """
+    runtimes = get_java_registry().runtimes(refresh)
+    if not runtimes:
+        return False, "java not found in PATH or any known JDK location"
+    return any(r.major >= 17 for r in runtimes), "\n".join(r.describe() for r in runtimes)
+
+
+def required_java_major(version: str | None) -> int:
+    """Java major version a Minecraft version needs, from its ``javaVersion`` metadata."""
     try:
-        proc = subprocess.run(["java", "-version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        out = proc.stdout.strip()
-        # Example: 'java version "17.0.12" 2024-07-16 LTS'
-        version_str = ""
-        for line in out.splitlines():
-            if "version" in line and '"' in line:
-                version_str = line.split('"')[1]
-                break
-        is_ok = False
-        try:
-            major = int(version_str.split(".")[0])
-            is_ok = major >= 17
-        except Exception:
-            # fallback: allow if we can find 17 in string
-            is_ok = "17" in version_str or "18" in version_str or "19" in version_str or "20" in version_str or "21" in version_str
-        return is_ok, out
-    except FileNotFoundError:
-        return False, "java not found in PATH"
+        selected = get_catalog().resolve(version)
+        meta = get_manifest_cache().get_json(selected["url"])
+        major = meta.get("javaVersion", {}).get("majorVersion")
+        if major:
+            return int(major)
+    except Exception:
+        pass
+    # Metadata unavailable (offline, custom version): fall back to the known cut-over points
+    numbers = tuple(int(part) for part in re.findall(r"\d+", version or ""))
+    if not numbers or numbers >= (1, 20, 5):
+        return 21
+    if numbers >= (1, 18):
+        return 17
+    if numbers >= (1, 17):
+        return 16
+    return 8
+
+
+def resolve_java(version: str | None = None, java_path: str | None = None) -> str:
+    """Java binary to run a server with.
+
+    An explicit ``java_path`` wins. Otherwise the registry's best runtime for
+    ``version`` is used, or the default runtime when no version is known.
+    """
+    registry = get_java_registry()
+    if java_path:
+        if registry.probe(java_path) is None:
+            raise RuntimeError(f"{java_path} is not a working Java runtime")
+        return java_path
+    required = required_java_major(version) if version else None
+    runtime = registry.select(required)
+    if runtime is None:
+        if required:
+            raise RuntimeError(f"Minecraft {version} needs Java {required} or newer, but none was found. "
+                               "Install it or set the server's Java path.")
+        raise RuntimeError("Java not found. Please ensure Java 17+ is installed and in your PATH.")
+    return runtime.path
+
+
+def script_java(version: str | None, java_path: str | None = None) -> str:
+    """Java binary to write into a server's start scripts.
+
+    Same choice as ``resolve_java``, but when no suitable JDK is installed yet
+    the scripts fall back to ``java`` from PATH instead of failing the setup.
+    An explicit ``java_path`` still has to work.
+    """
+    try:
+        return resolve_java(version, java_path)
+    except RuntimeError:
+        if java_path:
+            raise
+        return "java"
 
 
-def start_server(server_dir: str, min_mem: str, max_mem: str, nogui: bool):
+def start_server(server_dir: str, min_mem: str, max_mem: str, nogui: bool, java: str = "java",
+                 profile: str = DEFAULT_PROFILE):
     jar_path = os.path.join(server_dir, "server.jar")
     if not os.path.isfile(jar_path):
         raise RuntimeError("server.jar not found. Run setup first.")
-    cmd = [
-        "java",
-        f"-Xms{min_mem}",
-        f"-Xmx{max_mem}",
-        "-jar",
-        jar_path,
-    ]
-    if nogui:
-        cmd.append("nogui")
+    cmd = server_command(java, min_mem, max_mem, nogui, profile, jar_path)
     print("Launching server... Press Ctrl+C to stop.")
     subprocess.call(cmd, cwd=server_dir)
 
 
+def run_batch(args):
+    from batch_setup import load_batch_manifest, provision_batch, format_summary
+
+    try:
+        servers = load_batch_manifest(args.batch)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not read batch manifest: {e}")
+        sys.exit(1)
+
+    print(f"Provisioning {len(servers)} servers with up to {args.workers} workers...")
+    last_message = {}
+
+    def on_progress(name, message, fraction):
+        # Download progress is frequent; only print when the step changes
+        step = message.split("...")[0]
+        if last_message.get(name) != step:
+            last_message[name] = step
+            print(f"[{name}] {message}")
+
+    results = provision_batch(servers, workers=args.workers, on_progress=on_progress, force=args.force,
+                              connections=args.connections, use_store=not args.no_jar_store)
+    print(format_summary(results))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Report written to {args.report}")
+    if any(r["status"] != "ok" for r in results):
+        sys.exit(1)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Minecraft Java Edition server setup helper (vanilla)")
     parser.add_argument("--version", default="latest", help="Server version to install (e.g., 1.20.4), or 'latest' (default) or 'snapshot'")
@@ -173,18 +340,55 @@ def main():
     parser.add_argument("--accept-eula", action="store_true", help="Automatically accept the Minecraft EULA (https://aka.ms/MinecraftEULA)")
     parser.add_argument("--start", action="store_true", help="Start the server after setup completes")
     parser.add_argument("--force", action="store_true", help="Re-download server.jar even if it exists")
+    parser.add_argument("--connections", type=int, default=1, help="Number of parallel connections used to download server.jar")
+    parser.add_argument("--no-jar-store", action="store_true", help="Download server.jar directly instead of linking it from the shared jar store")
+    parser.add_argument("--link-mode", choices=LINK_MODES, default="auto", help="How jars are deployed from the shared store (default: reflink, then hardlink, then copy)")
+    parser.add_argument("--gc-jars", action="store_true", help="Delete shared jars no longer used by any server and exit")
+    parser.add_argument("--batch", metavar="FILE", help="Provision every server listed in a JSON manifest concurrently")
+    parser.add_argument("--workers", type=int, default=8, help="Number of servers provisioned at once in --batch mode (default 8)")
+    parser.add_argument("--report", metavar="FILE", help="Write the --batch summary as JSON to this file")
+    parser.add_argument("--offline", action="store_true", help="Resolve versions from the local manifest cache only")
+    parser.add_argument("--java", metavar="PATH", help="Java binary to start the server with (default: best installed JDK for the version)")
+    parser.add_argument("--list-java", action="store_true", help="List the Java runtimes found on this machine and exit")
+    parser.add_argument("--jvm-profile", choices=list(PROFILES), default=DEFAULT_PROFILE, help="JVM flag profile for the start scripts and --start (default: g1)")
+    parser.add_argument("--auto-memory", action="store_true", help="Size the heap from host RAM and the server's view distance instead of --min-memory/--max-memory")
+    parser.add_argument("--cache-ttl", type=float, default=None, help="Seconds before the cached version manifest is revalidated (default 600)")
 
     args = parser.parse_args()
+    configure_manifest_cache(ttl=args.cache_ttl, offline=args.offline)
+    get_jar_store().link_mode = args.link_mode
+
+    if args.gc_jars:
+        removed = get_jar_store().gc()
+        print(f"Removed {len(removed)} unused jar(s) from {get_jar_store().root}")
+        return
+
+    if args.batch:
+        run_batch(args)
+        return
+
+    if args.list_java:
+        runtimes = get_java_registry().runtimes(refresh=True)
+        for runtime in runtimes:
+            print(runtime.describe())
+        if not runtimes:
+            print("No Java runtimes found")
+        return
 
     server_dir = os.path.abspath(args.dir)
     ensure_dir(server_dir)
 
     print(f"Target directory: {server_dir}")
 
+    if args.auto_memory:
+        heap = recommend_heap(view_distance=read_view_distance(server_dir))
+        args.min_memory, args.max_memory = heap["min_memory"], heap["max_memory"]
+        print(f"Heap sized to {args.max_memory} (suggested JVM profile: {heap['profile']})")
+
     ok_java, java_out = check_java_version()
     if not ok_java:
         print("WARNING: Java 17+ not detected. Minecraft 1.18+ requires Java 17 or newer.")
-        print("java -version output:")
+        print("Java runtimes found:")
         print(java_out)
         print("You can continue setup, but starting the server will likely fail until Java is installed.")
 
@@ -200,17 +404,16 @@ def main():
         jar_path = os.path.join(server_dir, "server.jar")
         if os.path.exists(jar_path) and not args.force:
             print("server.jar already exists. Skipping download (use --force to re-download).")
+            if expected_sha1:
+                print("Verifying SHA1...")
+                verify_sha1(jar_path, expected_sha1)
+                print("SHA1 verified.")
         else:
             print("Downloading server.jar ...")
-            download_file(url, jar_path)
-            print("Download complete.")
-
-        if expected_sha1 and os.path.exists(jar_path):
-            print("Verifying SHA1...")
-            actual_sha1 = sha1_file(jar_path)
-            if actual_sha1.lower() != expected_sha1.lower():
-                raise RuntimeError(f"SHA1 mismatch for server.jar (got {actual_sha1}, expected {expected_sha1})")
-            print("SHA1 verified.")
+            result = install_server_jar(url, jar_path, expected_sha1, progress=throttled(print_progress),
+                                        connections=args.connections, use_store=not args.no_jar_store)
+            print("")
+            print(f"server.jar {result}." + (" SHA1 verified." if expected_sha1 else ""))
 
         eula_path = write_eula(server_dir, args.accept_eula)
         if args.accept_eula:
@@ -218,21 +421,26 @@ def main():
         else:
             print(f"EULA not accepted yet. Update {eula_path} to 'eula=true' before starting the server.")
 
-        bat_path, sh_path = write_start_script(server_dir, args.min_memory, args.max_memory, args.nogui)
+        java = script_java(version_id, args.java)
+        bat_path, sh_path = write_start_script(server_dir, args.min_memory, args.max_memory, args.nogui,
+                                               args.jvm_profile, java)
         print(f"Created helper scripts: {os.path.basename(bat_path)}, {os.path.basename(sh_path)}")
 
         if args.start:
             if not args.accept_eula:
                 print("Refusing to auto-start because EULA not accepted. Re-run with --accept-eula to start automatically.")
             else:
-                start_server(server_dir, args.min_memory, args.max_memory, args.nogui)
+                java = resolve_java(version_id, args.java)
+                print(f"Using {java}")
+                start_server(server_dir, args.min_memory, args.max_memory, args.nogui, java, args.jvm_profile)
 
         print("Setup complete.")
         print("Next steps:")
         print(f"  - Review {os.path.join(server_dir, 'eula.txt')} and ensure eula=true.")
-        print(f"  - Start the server using start.bat (Windows) or start.sh (macOS/Linux), or run:\n        java -Xms{args.min_memory} -Xmx{args.max_memory} -jar server.jar {'nogui' if args.nogui else ''}")
+        print(f"  - Start the server using start.bat (Windows) or start.sh (macOS/Linux), or run:\n        "
+              + format_command(server_command(java, args.min_memory, args.max_memory, args.nogui, args.jvm_profile)))
 
-    except (HTTPError, URLError) as e:
+    except (HTTPException, ConnectionError, TimeoutError, socket.gaierror) as e:
         print(f"Network error: {e}")
         sys.exit(1)
     except Exception as e:
@@ -0,0 +1,210 @@
+import os
+import selectors
+import threading
+import time
+
+STARTING = "starting"
+RUNNING = "running"
+STOPPING = "stopping"
+EXITED = "exited"
+CRASHED = "crashed"
+ALIVE_STATES = (STARTING, RUNNING, STOPPING)
+
+
+class ProcessEvent:
+    """A state change of a supervised process."""
+
+    __slots__ = ("key", "name", "state", "previous", "pid", "returncode", "time")
+
+    def __init__(self, key, name, state, previous, pid, returncode=None):
+        self.key = key
+        self.name = name
+        self.state = state
+        self.previous = previous
+        self.pid = pid
+        self.returncode = returncode
+        self.time = time.time()
+
+    def to_dict(self):
+        return {
+            "key": self.key,
+            "name": self.name,
+            "status": self.state,
+            "previous": self.previous,
+            "pid": self.pid,
+            "returncode": self.returncode,
+            "time": self.time,
+        }
+
+
+class _Managed:
+    __slots__ = ("key", "name", "process", "state", "stop_requested")
+
+    def __init__(self, key, name, process, state):
+        self.key = key
+        self.name = name
+        self.process = process
+        self.state = state
+        self.stop_requested = False
+
+
+class ProcessSupervisor:
+    """Tracks child processes and publishes their state changes.
+
+    Processes are registered with ``watch(key, process)``. Exits are detected
+    without polling: on Linux a pidfd per child is registered with a single
+    selector thread, elsewhere a waiter thread blocks in ``process.wait()``.
+    Subscribers get a ``ProcessEvent`` for every transition between
+    starting, running, stopping, exited (clean exit or requested stop) and
+    crashed. Callbacks run on the watcher thread and must not block.
+    """
+
+    def __init__(self):
+        self._procs: dict[object, _Managed] = {}
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._use_pidfd = hasattr(os, "pidfd_open")
+        self._selector = None
+        self._thread = None
+        self._pending: list[tuple[int, _Managed]] = []
+
+    def subscribe(self, callback):
+        """Call ``callback(event)`` on every state change. Returns a function that unsubscribes."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def watch(self, key, process, name: str | None = None, state: str = STARTING):
+        """Start supervising ``process`` under ``key``, replacing whatever was there."""
+        managed = _Managed(key, name or str(key), process, None)
+        with self._lock:
+            self._procs[key] = managed
+        self._set_state(managed, state)
+        if not self._watch_pidfd(managed):
+            threading.Thread(target=self._wait, args=(managed,), daemon=True,
+                             name=f"process-waiter-{process.pid}").start()
+
+    def mark_running(self, key):
+        """Report that a starting process is ready (e.g. the server printed "Done")."""
+        managed = self._procs.get(key)
+        if managed is not None and managed.state == STARTING:
+            self._set_state(managed, RUNNING)
+
+    def mark_stopping(self, key):
+        """Report that a stop was requested, so the coming exit counts as clean."""
+        managed = self._procs.get(key)
+        if managed is not None and managed.state in ALIVE_STATES:
+            managed.stop_requested = True
+            self._set_state(managed, STOPPING)
+
+    def state(self, key) -> str | None:
+        managed = self._procs.get(key)
+        return managed.state if managed is not None else None
+
+    def is_alive(self, key) -> bool:
+        return self.state(key) in ALIVE_STATES
+
+    def process(self, key):
+        managed = self._procs.get(key)
+        return managed.process if managed is not None else None
+
+    def alive(self) -> dict:
+        """``{key: process}`` for every process that is starting, running or stopping."""
+        with self._lock:
+            return {key: managed.process for key, managed in self._procs.items() if managed.state in ALIVE_STATES}
+
+    def forget(self, key):
+        with self._lock:
+            self._procs.pop(key, None)
+
+    def _set_state(self, managed: _Managed, state: str):
+        with self._lock:
+            previous = managed.state
+            if previous == state or previous in (EXITED, CRASHED):
+                return
+            managed.state = state
+            if self._procs.get(managed.key) is not managed:
+                return  # replaced by a newer process under the same key
+            subscribers = list(self._subscribers)
+        event = ProcessEvent(managed.key, managed.name, state, previous,
+                             managed.process.pid, managed.process.returncode)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Process event subscriber error: {e}")
+
+    def _exited(self, managed: _Managed):
+        returncode = managed.process.wait()
+        clean = returncode == 0 or managed.stop_requested
+        self._set_state(managed, EXITED if clean else CRASHED)
+
+    def _wait(self, managed: _Managed):
+        try:
+            managed.process.wait()
+        finally:
+            self._exited(managed)
+
+    def _watch_pidfd(self, managed: _Managed) -> bool:
+        if not self._use_pidfd:
+            return False
+        try:
+            pidfd = os.pidfd_open(managed.process.pid)
+        except OSError:
+            # Already reaped, or pidfds are unavailable on this kernel
+            if managed.process.poll() is not None:
+                self._exited(managed)
+                return True
+            return False
+        with self._lock:
+            if self._selector is None:
+                self._selector = selectors.DefaultSelector()
+                self._wake_r, self._wake_w = os.pipe()
+                os.set_blocking(self._wake_r, False)
+                os.set_blocking(self._wake_w, False)
+                self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+                self._thread = threading.Thread(target=self._run, daemon=True, name="process-watcher")
+                self._thread.start()
+            self._pending.append((pidfd, managed))
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass
+        return True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            for pidfd, managed in pending:
+                self._selector.register(pidfd, selectors.EVENT_READ, managed)
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    try:
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                # A pidfd becomes readable once its process has exited
+                self._selector.unregister(key.fd)
+                os.close(key.fd)
+                self._exited(key.data)
+
+
+_default_supervisor = None
+_default_supervisor_lock = threading.Lock()
+
+
+def get_supervisor() -> ProcessSupervisor:
+    """Return the process-wide supervisor."""
+    global _default_supervisor
+    with _default_supervisor_lock:
+        if _default_supervisor is None:
+            _default_supervisor = ProcessSupervisor()
+        return _default_supervisor
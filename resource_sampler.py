@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+from array import array
+
+from process_supervisor import get_supervisor
+
+DEFAULT_INTERVAL = float(os.environ.get("MCSERVER_SAMPLE_INTERVAL", "5"))
+# Samples kept per server: one hour at the default interval
+DEFAULT_CAPACITY = 720
+SUPPORTED = os.path.isdir("/proc/self")
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") and SUPPORTED else 100
+_FIELDS = ("time", "cpu_percent", "rss_mb", "threads", "fds", "read_bps", "write_bps")
+
+
+class ResourceSeries:
+    """Fixed-capacity ring of resource samples for one server, one ``array`` per field."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.count = 0
+        self._next = 0
+        self._columns = {name: array("d", [0.0]) * capacity for name in _FIELDS}
+
+    def append(self, sample: dict):
+        for name, column in self._columns.items():
+            column[self._next] = sample[name]
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def latest(self) -> dict | None:
+        if not self.count:
+            return None
+        i = (self._next - 1) % self.capacity
+        return {name: column[i] for name, column in self._columns.items()}
+
+    def to_dict(self, limit: int | None = None) -> dict:
+        """The newest ``limit`` samples (all by default) as ``{field: [oldest, ..., newest]}``."""
+        n = self.count if limit is None else max(0, min(limit, self.count))
+        start = (self._next - n) % self.capacity
+        out = {}
+        for name, column in self._columns.items():
+            if start + n <= self.capacity:
+                out[name] = column[start:start + n].tolist()
+            else:
+                out[name] = column[start:].tolist() + column[:self._next].tolist()
+        return out
+
+
+class _Counters:
+    __slots__ = ("time", "cpu_ticks", "read_bytes", "write_bytes")
+
+    def __init__(self, when, cpu_ticks, read_bytes, write_bytes):
+        self.time = when
+        self.cpu_ticks = cpu_ticks
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+
+
+def _children(pid: int) -> list[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r", encoding="ascii") as f:
+            return [int(child) for child in f.read().split()]
+    except (OSError, ValueError):
+        return []
+
+
+def _read_process(pid: int) -> dict | None:
+    """Raw counters for one pid from /proc/<pid>/stat, status, io and fd."""
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="ascii", errors="replace") as f:
+            stat = f.read()
+        # The command name may contain spaces or parentheses; fields resume after the last ')'
+        fields = stat[stat.rindex(")") + 2:].split()
+        info = {"cpu_ticks": int(fields[11]) + int(fields[12]), "threads": int(fields[17]),
+                "rss_kb": 0, "read_bytes": 0, "write_bytes": 0, "fds": 0}
+        with open(f"/proc/{pid}/status", "r", encoding="ascii", errors="replace") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    info["rss_kb"] = int(line.split()[1])
+                    break
+    except (OSError, ValueError, IndexError):
+        return None  # exited between listing and reading
+    try:
+        with open(f"/proc/{pid}/io", "r", encoding="ascii") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name == "read_bytes":
+                    info["read_bytes"] = int(value)
+                elif name == "write_bytes":
+                    info["write_bytes"] = int(value)
+    except (OSError, ValueError):
+        pass  # /proc/<pid>/io needs ptrace access; leave disk rates at zero
+    try:
+        info["fds"] = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        pass
+    return info
+
+
+class ResourceSampler:
+    """Samples CPU, RSS, threads, open files and disk I/O of every supervised server.
+
+    Every ``interval`` seconds one background pass reads ``/proc`` for each
+    live process and its child tree (a JVM started through a script is a
+    child of the shell), turns the counters into rates against the previous
+    pass and appends the result to that server's ``ResourceSeries``. Nothing
+    is sampled on platforms without ``/proc``.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, capacity: int = DEFAULT_CAPACITY, supervisor=None):
+        self.interval = interval
+        self.capacity = capacity
+        self.supervisor = supervisor or get_supervisor()
+        self._series: dict[object, ResourceSeries] = {}
+        self._previous: dict[object, _Counters] = {}
+        self._limits: dict[object, int] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if SUPPORTED and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="resource-sampler")
+            self._thread.start()
+
+    def set_interval(self, interval: float):
+        self.interval = max(0.5, interval)
+        self._wake.set()
+
+    def set_limit(self, key, max_memory_mb: int):
+        """Record a server's -Xmx so RSS can be reported against it."""
+        with self._lock:
+            self._limits[key] = max_memory_mb
+
+    def series(self, key) -> ResourceSeries | None:
+        with self._lock:
+            return self._series.get(key)
+
+    def latest(self, key) -> dict | None:
+        """The newest sample for ``key`` with its -Xmx comparison, or None."""
+        with self._lock:
+            series = self._series.get(key)
+            sample = series.latest() if series else None
+            limit = self._limits.get(key)
+        if sample is not None:
+            sample["xmx_mb"] = limit
+            sample["rss_percent_of_xmx"] = round(sample["rss_mb"] / limit * 100, 1) if limit else None
+        return sample
+
+    def snapshot(self, limit: int | None = None) -> dict:
+        """Latest sample and history per server; ``limit`` caps the history length."""
+        with self._lock:
+            keys = list(self._series)
+        out = {}
+        for key in keys:
+            series = self.series(key)
+            out[str(key)] = {"latest": self.latest(key), "history": series.to_dict(limit)}
+        return out
+
+    def sample_once(self, now: float | None = None):
+        """Take one sample of every live server."""
+        now = time.time() if now is None else now
+        alive = self.supervisor.alive()
+        for key, process in alive.items():
+            totals = self._sample_tree(process.pid)
+            if totals is None:
+                continue
+            counters = _Counters(now, totals["cpu_ticks"], totals["read_bytes"], totals["write_bytes"])
+            with self._lock:
+                previous = self._previous.get(key)
+                self._previous[key] = counters
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = ResourceSeries(self.capacity)
+            elapsed = now - previous.time if previous else 0.0
+            if elapsed > 0:
+                cpu = (counters.cpu_ticks - previous.cpu_ticks) / _CLOCK_TICKS / elapsed * 100
+                read = max(0, counters.read_bytes - previous.read_bytes) / elapsed
+                write = max(0, counters.write_bytes - previous.write_bytes) / elapsed
+            else:
+                cpu = read = write = 0.0
+            series.append({
+                "time": now,
+                "cpu_percent": round(max(0.0, cpu), 1),
+                "rss_mb": round(totals["rss_kb"] / 1024, 1),
+                "threads": totals["threads"],
+                "fds": totals["fds"],
+                "read_bps": round(read),
+                "write_bps": round(write),
+            })
+        with self._lock:
+            # A restarted server gets fresh counters; its history is kept
+            for key in [key for key in self._previous if key not in alive]:
+                del self._previous[key]
+
+    def _sample_tree(self, pid: int) -> dict | None:
+        totals = None
+        pending = [pid]
+        seen = set()
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            info = _read_process(current)
+            if info is None:
+                continue
+            if totals is None:
+                totals = info
+            else:
+                for name, value in info.items():
+                    totals[name] += value
+            pending.extend(_children(current))
+        return totals
+
+    def _run(self):
+        while True:
+            try:
+                self.sample_once()
+            except Exception as e:
+                print(f"Resource sampler error: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+_default_sampler = None
+_default_sampler_lock = threading.Lock()
+
+
+def get_resource_sampler() -> ResourceSampler:
+    """Return the process-wide resource sampler, started on first use."""
+    global _default_sampler
+    with _default_sampler_lock:
+        if _default_sampler is None:
+            _default_sampler = ResourceSampler()
+            _default_sampler.start()
+        return _default_sampler
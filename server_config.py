@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import uuid
+
+from console_buffer import ConsoleBuffer, ConsoleSpool, console_spool_path
+from jvm_profiles import DEFAULT_PROFILE
+
+DEFAULT_CONFIG_FILE = "servers_config.json"
+
+
+class ServerConfig:
+    def __init__(self, name="", directory="", version="latest", min_memory="1G",
+                 max_memory="2G", nogui=True, eula_accepted=False, start_priority=0, java_path="",
+                 jvm_profile=DEFAULT_PROFILE, server_id=None):
+        # Stable key for this server; names can be edited and aren't guaranteed unique
+        self.id = server_id or uuid.uuid4().hex
+        self.name = name
+        self.directory = directory
+        self.version = version
+        self.min_memory = min_memory
+        self.max_memory = max_memory
+        self.nogui = nogui
+        self.eula_accepted = eula_accepted
+        # Start All launches higher priorities first
+        self.start_priority = start_priority
+        # Java binary to run with; empty picks the best installed JDK for the version
+        self.java_path = java_path
+        # Named set of GC flags from jvm_profiles
+        self.jvm_profile = jvm_profile
+        self.process = None
+        self.console = ConsoleBuffer(spool=ConsoleSpool(console_spool_path(self.id)))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'directory': self.directory,
+            'version': self.version,
+            'min_memory': self.min_memory,
+            'max_memory': self.max_memory,
+            'nogui': self.nogui,
+            'eula_accepted': self.eula_accepted,
+            'start_priority': self.start_priority,
+            'java_path': self.java_path,
+            'jvm_profile': self.jvm_profile
+        }
+
+    def update_from(self, other):
+        """Take over the saved settings of another config, keeping this server's id, process and console"""
+        self.name = other.name
+        self.directory = other.directory
+        self.version = other.version
+        self.min_memory = other.min_memory
+        self.max_memory = other.max_memory
+        self.nogui = other.nogui
+        self.eula_accepted = other.eula_accepted
+        self.start_priority = other.start_priority
+        self.java_path = other.java_path
+        self.jvm_profile = other.jvm_profile
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        server_id = data.pop('id', None)
+        return cls(server_id=server_id, **data)
+
+
+def load_configs(path: str = DEFAULT_CONFIG_FILE) -> list[ServerConfig]:
+    """The servers saved in ``path`` (empty if the file doesn't exist yet).
+
+    Configs saved before servers had ids get one derived from their directory
+    and name, and the file is rewritten with it, so a server keeps its id (and
+    with it its console history and metrics) across restarts and between the
+    desktop and web apps.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    taken = {entry['id'] for entry in entries if entry.get('id')}
+    missing = False
+    for entry in entries:
+        if not entry.get('id'):
+            entry['id'] = legacy_server_id(entry.get('directory', ''), entry.get('name', ''), taken)
+            taken.add(entry['id'])
+            missing = True
+    configs = [ServerConfig.from_dict(entry) for entry in entries]
+    if missing:
+        try:
+            save_configs(configs, path)
+        except OSError as e:
+            print(f"Warning: could not save server ids to {path}: {e}")
+    return configs
+
+
+def legacy_server_id(directory: str, name: str, taken=()) -> str:
+    """Stable id for a config saved without one, unique among ``taken``."""
+    key = f"{os.path.normcase(os.path.abspath(directory)) if directory else ''}\0{name}"
+    server_id = base = hashlib.sha1(key.encode('utf-8')).hexdigest()[:32]
+    n = 2
+    while server_id in taken:
+        server_id = f"{base}-{n}"
+        n += 1
+    return server_id
+
+
+def save_configs(servers, path: str = DEFAULT_CONFIG_FILE):
+    """Write ``servers`` to ``path``, replacing it in one step so a reader never sees half a file."""
+    tmp_path = path + ".part"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump([s.to_dict() for s in servers], f, indent=2)
+    os.replace(tmp_path, path)
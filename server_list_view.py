@@ -0,0 +1,307 @@
+import re
+
+import customtkinter as ctk
+
+from jvm_profiles import memory_mb
+
+ROW_HEIGHT = 76
+OVERSCAN = 2
+SCROLL_STEP = ROW_HEIGHT // 2
+SORT_FIELDS = ("name", "version", "status", "memory")
+STATUS_FILTERS = ("All", "Running", "Stopped")
+ALL = "All"
+
+
+def version_key(version: str):
+    """Sort key that orders 1.9 before 1.10 and keeps non-numeric versions stable."""
+    return tuple(int(part) for part in re.findall(r"\d+", version)), version
+
+
+class ServerListModel:
+    """Filtered and sorted view over the servers list, backed by in-memory indexes.
+
+    ``set_servers`` indexes the servers by status, version and max memory and
+    precomputes sort keys, so changing a filter intersects the matching index
+    sets instead of rescanning every server, and a status flip only touches
+    the running-set. ``view()`` returns the ids to show, in order, and is
+    cached until a filter, the sort or the servers change.
+    """
+
+    def __init__(self, is_running):
+        self.is_running = is_running
+        self.servers = {}
+        self.query = ""
+        self.status = ALL
+        self.version = ALL
+        self.memory = ALL
+        self.sort_by = "name"
+        self.descending = False
+        self._order: list[str] = []
+        self._running: set[str] = set()
+        self._by_version: dict[str, set[str]] = {}
+        self._by_memory: dict[str, set[str]] = {}
+        self._search_text: dict[str, str] = {}
+        self._sort_keys: dict[str, dict] = {field: {} for field in SORT_FIELDS}
+        self._view = None
+
+    def set_servers(self, servers):
+        self.servers = {server.id: server for server in servers}
+        self._order = [server.id for server in servers]
+        self._running = set()
+        self._by_version = {}
+        self._by_memory = {}
+        self._search_text = {}
+        self._sort_keys = {field: {} for field in SORT_FIELDS}
+        for server in servers:
+            running = self.is_running(server)
+            if running:
+                self._running.add(server.id)
+            self._by_version.setdefault(server.version, set()).add(server.id)
+            self._by_memory.setdefault(server.max_memory, set()).add(server.id)
+            self._search_text[server.id] = f"{server.name}\0{server.directory}".lower()
+            self._sort_keys["name"][server.id] = server.name.lower()
+            self._sort_keys["version"][server.id] = version_key(server.version)
+            self._sort_keys["status"][server.id] = not running
+            self._sort_keys["memory"][server.id] = memory_mb(server.max_memory)
+        self._view = None
+
+    def update_status(self, server) -> bool:
+        """Record a server's running state; returns True if the visible order may have changed."""
+        running = self.is_running(server)
+        if server.id not in self.servers or (server.id in self._running) == running:
+            return False
+        if running:
+            self._running.add(server.id)
+        else:
+            self._running.discard(server.id)
+        self._sort_keys["status"][server.id] = not running
+        if self.status != ALL or self.sort_by == "status":
+            self._view = None
+            return True
+        return False
+
+    def set_filter(self, query=None, status=None, version=None, memory=None):
+        if query is not None:
+            self.query = query.strip().lower()
+        if status is not None:
+            self.status = status
+        if version is not None:
+            self.version = version
+        if memory is not None:
+            self.memory = memory
+        self._view = None
+
+    def set_sort(self, sort_by: str, descending: bool = False):
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of {SORT_FIELDS}")
+        self.sort_by = sort_by
+        self.descending = descending
+        self._view = None
+
+    def versions(self) -> list[str]:
+        return sorted(self._by_version, key=version_key)
+
+    def memories(self) -> list[str]:
+        return sorted(self._by_memory, key=memory_mb)
+
+    def view(self) -> list[str]:
+        if self._view is None:
+            self._view = self._compute_view()
+        return self._view
+
+    def _compute_view(self) -> list[str]:
+        candidates = []
+        if self.status == "Running":
+            candidates.append(self._running)
+        if self.version != ALL:
+            candidates.append(self._by_version.get(self.version, set()))
+        if self.memory != ALL:
+            candidates.append(self._by_memory.get(self.memory, set()))
+
+        if candidates:
+            candidates.sort(key=len)
+            matches = set(candidates[0]).intersection(*candidates[1:])
+            ids = [server_id for server_id in self._order if server_id in matches]
+        else:
+            ids = self._order
+        if self.status == "Stopped":
+            ids = [server_id for server_id in ids if server_id not in self._running]
+        if self.query:
+            text = self._search_text
+            ids = [server_id for server_id in ids if self.query in text[server_id]]
+        keys = self._sort_keys[self.sort_by]
+        # sorted() is stable, so ties keep the configured order
+        return sorted(ids, key=keys.__getitem__, reverse=self.descending)
+
+
+class VirtualServerList:
+    """Scrollable server list that only creates widgets for the rows in view.
+
+    Rows have a fixed height and are placed at pixel offsets inside a plain
+    frame; scrolling re-binds a small pool of row widgets (the visible rows
+    plus ``OVERSCAN`` on each side) to different servers, updating only the
+    labels whose text changed, so the widget count stays constant no matter
+    how many servers the model holds.
+    """
+
+    def __init__(self, parent, model: ServerListModel, on_select, running_icon: str, stopped_icon: str):
+        self.model = model
+        self.on_select = on_select
+        self.running_icon = running_icon
+        self.stopped_icon = stopped_icon
+        self.selected_id = None
+        self._top = 0
+        self._rows = []
+
+        self.frame = ctk.CTkFrame(parent)
+        self.body = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.body.pack(side='left', fill='both', expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.body.bind("<Configure>", lambda event: self.render())
+        self._bind_scroll(self.body)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def refresh(self):
+        """Re-read the model's view and redraw."""
+        self.render()
+
+    def update_server(self, server):
+        """Redraw the row showing ``server``, if it is materialized."""
+        for row in self._rows:
+            if row["server_id"] == server.id:
+                self._update_row(row, server)
+                return
+
+    def select(self, server_id):
+        self.selected_id = server_id
+        for row in self._rows:
+            if row["server_id"] is not None:
+                self._update_row(row, self.model.servers[row["server_id"]])
+
+    def render(self):
+        ids = self.model.view()
+        height = max(self.body.winfo_height(), ROW_HEIGHT)
+        max_top = max(0, len(ids) * ROW_HEIGHT - height)
+        self._top = min(max(0, self._top), max_top)
+
+        first = max(0, self._top // ROW_HEIGHT - OVERSCAN)
+        last = min(len(ids), (self._top + height) // ROW_HEIGHT + 1 + OVERSCAN)
+        needed = last - first
+        while len(self._rows) < needed:
+            self._rows.append(self._create_row())
+
+        for slot, row in enumerate(self._rows):
+            index = first + slot
+            if index < last:
+                server_id = ids[index]
+                row["server_id"] = server_id
+                self._update_row(row, self.model.servers[server_id])
+                y = index * ROW_HEIGHT - self._top
+                if row["y"] != y:
+                    row["frame"].place(x=0, y=y, relwidth=1.0, height=ROW_HEIGHT - 4)
+                    row["y"] = y
+            elif row["server_id"] is not None:
+                row["server_id"] = None
+                row["y"] = None
+                row["frame"].place_forget()
+
+        if ids:
+            total = len(ids) * ROW_HEIGHT
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, pixels: int):
+        self._top = pixels
+        self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        total = len(self.model.view()) * ROW_HEIGHT
+        if action == "moveto":
+            self.scroll_to(int(float(value) * total))
+        elif action == "scroll":
+            step = self.body.winfo_height() if unit == "pages" else SCROLL_STEP
+            self.scroll_to(self._top + int(value) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            delta = -1
+        elif getattr(event, "num", None) == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self.scroll_to(self._top + delta * SCROLL_STEP)
+
+    def _bind_scroll(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", self._on_wheel)
+        widget.bind("<Button-5>", self._on_wheel)
+
+    def _create_row(self):
+        item_frame = ctk.CTkFrame(self.body)
+
+        name_label = ctk.CTkLabel(item_frame, font=ctk.CTkFont(weight="bold"), anchor='w')
+        name_label.pack(anchor='w', padx=10)
+
+        details_label = ctk.CTkLabel(item_frame, anchor='w')
+        details_label.pack(anchor='w', padx=10)
+
+        # Status with icon
+        status_frame = ctk.CTkFrame(item_frame, fg_color="transparent")
+        status_frame.pack(anchor='w', padx=10, fill='x')
+
+        status_icon_label = ctk.CTkLabel(status_frame, font=ctk.CTkFont(size=14))
+        status_icon_label.pack(side='left')
+
+        status_label = ctk.CTkLabel(status_frame)
+        status_label.pack(side='left', padx=(5, 0))
+
+        row = {
+            "frame": item_frame,
+            "name": name_label,
+            "details": details_label,
+            "icon": status_icon_label,
+            "status": status_label,
+            "server_id": None,
+            "y": None,
+            "shown": {},
+        }
+
+        def on_click(event):
+            if row["server_id"] is not None:
+                self.select(row["server_id"])
+                self.on_select(self.model.servers[row["server_id"]])
+
+        for widget in (item_frame, name_label, details_label, status_frame, status_icon_label, status_label):
+            widget.bind("<Button-1>", on_click)
+            self._bind_scroll(widget)
+        return row
+
+    def _update_row(self, row, server):
+        running = self.model.is_running(server)
+        color = "green" if running else "red"
+        fields = {
+            "name": (f"Name: {server.name}", None),
+            "details": (f"Version: {server.version}    Memory: {server.min_memory}-{server.max_memory}"
+                        f"    Directory: {server.directory}", None),
+            "icon": (self.running_icon if running else self.stopped_icon, color),
+            "status": (f"Status: {'Running' if running else 'Stopped'}", color),
+            "frame": server.id == self.selected_id,
+        }
+        shown = row["shown"]
+        for key, value in fields.items():
+            if shown.get(key) == value:
+                continue
+            if key == "frame":
+                row["frame"].configure(border_width=2 if value else 0)
+            else:
+                text, color = value
+                if color:
+                    row[key].configure(text=text, text_color=color)
+                else:
+                    row[key].configure(text=text)
+            shown[key] = value
@@ -0,0 +1,235 @@
+import threading
+import time
+from array import array
+
+from log_parser import DONE, JOIN, LEAVE, LAG, EXCEPTION, CRASH
+from process_supervisor import get_supervisor, STARTING, EXITED, CRASHED
+
+# One hour of history at ten second resolution
+BUCKETS = 360
+BUCKET_SECONDS = 10.0
+SUMMARY_WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+
+
+class RollingWindow:
+    """Count, sum and max of values added over the last ``buckets * bucket_seconds`` seconds.
+
+    Values land in fixed time buckets kept in preallocated arrays used as a
+    ring; a bucket is reset when the ring comes back around to it, so memory
+    stays the same however long the server runs.
+    """
+
+    def __init__(self, buckets: int = BUCKETS, bucket_seconds: float = BUCKET_SECONDS):
+        self.buckets = buckets
+        self.bucket_seconds = bucket_seconds
+        self._epoch = array("q", [-1]) * buckets
+        self._count = array("l", [0]) * buckets
+        self._sum = array("d", [0.0]) * buckets
+        self._max = array("d", [0.0]) * buckets
+
+    def _slot(self, now: float) -> int:
+        epoch = int(now // self.bucket_seconds)
+        slot = epoch % self.buckets
+        if self._epoch[slot] != epoch:
+            self._epoch[slot] = epoch
+            self._count[slot] = 0
+            self._sum[slot] = 0.0
+            self._max[slot] = 0.0
+            self._reset(slot)
+        return slot
+
+    def _reset(self, slot: int):
+        pass
+
+    def _recent(self, seconds: float, now: float):
+        """Slots covering the last ``seconds``, newest first, with whether each holds current data."""
+        newest = int(now // self.bucket_seconds)
+        count = min(self.buckets, max(1, int(seconds // self.bucket_seconds)))
+        for epoch in range(newest, newest - count, -1):
+            slot = epoch % self.buckets
+            yield slot, self._epoch[slot] == epoch
+
+    def add(self, value: float = 1.0, now: float | None = None):
+        slot = self._slot(time.time() if now is None else now)
+        if self._count[slot] == 0 or value > self._max[slot]:
+            self._max[slot] = value
+        self._count[slot] += 1
+        self._sum[slot] += value
+
+    def summary(self, seconds: float, now: float | None = None) -> dict:
+        now = time.time() if now is None else now
+        count = 0
+        total = 0.0
+        peak = None
+        for slot, live in self._recent(seconds, now):
+            if live and self._count[slot]:
+                count += self._count[slot]
+                total += self._sum[slot]
+                peak = self._max[slot] if peak is None else max(peak, self._max[slot])
+        return {"count": count, "sum": total, "max": peak or 0.0, "avg": total / count if count else 0.0}
+
+    def series(self, seconds: float, now: float | None = None, field: str = "count") -> list:
+        """Per-bucket ``count``, ``sum`` or ``max`` over the last ``seconds``, oldest first."""
+        now = time.time() if now is None else now
+        values = getattr(self, "_" + field)
+        out = [values[slot] if live else 0 for slot, live in self._recent(seconds, now)]
+        out.reverse()
+        return out
+
+
+class RollingGauge(RollingWindow):
+    """A value that changes now and then (e.g. players online), with its peak per bucket."""
+
+    def __init__(self, buckets: int = BUCKETS, bucket_seconds: float = BUCKET_SECONDS):
+        super().__init__(buckets, bucket_seconds)
+        self.value = 0
+        # The gauge's value when each bucket started, so quiet buckets can be filled in
+        self._before = array("d", [0.0]) * buckets
+
+    def _reset(self, slot: int):
+        self._before[slot] = self.value
+
+    def set(self, value: float, now: float | None = None):
+        self.add(value, now)
+        self.value = value
+
+    def series(self, seconds: float, now: float | None = None, field: str = "max") -> list:
+        """Peak value per bucket over the last ``seconds``, oldest first."""
+        now = time.time() if now is None else now
+        out = []
+        carry = self.value
+        for slot, live in self._recent(seconds, now):
+            if live and self._count[slot]:
+                out.append(max(self._max[slot], self._before[slot]))
+                carry = self._before[slot]
+            else:
+                out.append(carry)
+        out.reverse()
+        return out
+
+    def peak(self, seconds: float, now: float | None = None) -> float:
+        return max(self.series(seconds, now))
+
+
+class ServerMetrics:
+    """Lag, startup, restart and player metrics for one server, fed by its log events."""
+
+    def __init__(self, key):
+        self.key = key
+        self.lag_ms = RollingWindow()
+        self.lag_ticks = RollingWindow()
+        self.errors = RollingWindow()
+        self.players = RollingGauge()
+        self.online: set[str] = set()
+        self.starts = 0
+        self.crashes = 0
+        self.started_at = None
+        self.startup_seconds = None
+        self.startup_wall_seconds = None
+        self.last_lag = None
+        self._lock = threading.Lock()
+
+    def feed(self, events):
+        with self._lock:
+            for event in events:
+                kind = event.kind
+                if kind == LAG:
+                    self.lag_ms.add(event.ms, event.received)
+                    self.lag_ticks.add(event.ticks, event.received)
+                    self.last_lag = {"ms": event.ms, "ticks": event.ticks, "time": event.received}
+                elif kind == JOIN:
+                    self.online.add(event.player)
+                    self.players.set(len(self.online), event.received)
+                elif kind == LEAVE:
+                    self.online.discard(event.player)
+                    self.players.set(len(self.online), event.received)
+                elif kind == DONE:
+                    self.startup_seconds = event.seconds
+                    if self.started_at is not None:
+                        self.startup_wall_seconds = round(event.received - self.started_at, 3)
+                elif kind in (EXCEPTION, CRASH):
+                    self.errors.add(1, event.received)
+
+    def on_process_event(self, event):
+        with self._lock:
+            if event.state == STARTING:
+                self.starts += 1
+                self.started_at = event.time
+            elif event.state in (EXITED, CRASHED):
+                if event.state == CRASHED:
+                    self.crashes += 1
+                if self.online:
+                    self.online.clear()
+                    self.players.set(0, event.time)
+
+    def snapshot(self, now: float | None = None, series_seconds: float = 3600) -> dict:
+        now = time.time() if now is None else now
+        with self._lock:
+            lag = {}
+            for name, seconds in SUMMARY_WINDOWS.items():
+                ms = self.lag_ms.summary(seconds, now)
+                lag[name] = {"events": ms["count"], "max_ms": ms["max"], "avg_ms": round(ms["avg"], 1),
+                             "max_ticks": self.lag_ticks.summary(seconds, now)["max"]}
+            return {
+                "key": self.key,
+                "players": {"online": len(self.online), "names": sorted(self.online),
+                            "peak_1h": self.players.peak(3600, now)},
+                "lag": lag,
+                "last_lag": self.last_lag,
+                "errors_1h": self.errors.summary(3600, now)["count"],
+                "startup_seconds": self.startup_seconds,
+                "startup_wall_seconds": self.startup_wall_seconds,
+                "restarts": max(0, self.starts - 1),
+                "crashes": self.crashes,
+                "series": {
+                    "bucket_seconds": self.lag_ms.bucket_seconds,
+                    "lag_events": self.lag_ms.series(series_seconds, now),
+                    "lag_max_ms": self.lag_ms.series(series_seconds, now, "max"),
+                    "players": self.players.series(series_seconds, now),
+                },
+            }
+
+
+class MetricsRegistry:
+    """``ServerMetrics`` per supervised process key, updated from log and process events."""
+
+    def __init__(self, supervisor=None):
+        self._servers: dict[object, ServerMetrics] = {}
+        self._lock = threading.Lock()
+        (supervisor or get_supervisor()).subscribe(lambda event: self.get(event.key).on_process_event(event))
+
+    def get(self, key) -> ServerMetrics:
+        with self._lock:
+            metrics = self._servers.get(key)
+            if metrics is None:
+                metrics = self._servers[key] = ServerMetrics(key)
+            return metrics
+
+    def __contains__(self, key):
+        return key in self._servers
+
+    def feed(self, key, events):
+        if events:
+            self.get(key).feed(events)
+
+    def forget(self, key):
+        with self._lock:
+            self._servers.pop(key, None)
+
+    def snapshot(self, now: float | None = None) -> dict:
+        with self._lock:
+            servers = list(self._servers.values())
+        return {str(metrics.key): metrics.snapshot(now) for metrics in servers}
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = MetricsRegistry()
+        return _default_registry
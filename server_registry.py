@@ -0,0 +1,135 @@
+import os
+import threading
+
+from process_supervisor import get_supervisor
+from server_config import ServerConfig, load_configs, save_configs, DEFAULT_CONFIG_FILE
+
+
+class ServerRegistry:
+    """The servers a backend manages, keyed by server id, shared between request threads.
+
+    Servers come from the same ``servers_config.json`` the desktop app
+    writes, plus any added at runtime. Lookups by id or directory are dict
+    lookups. Each server has its own lock, so starting or stopping one server
+    never waits on another; the registry lock only guards the dicts
+    themselves and is never held while a server is being worked on.
+    """
+
+    def __init__(self, config_file: str = DEFAULT_CONFIG_FILE, supervisor=None):
+        self.config_file = config_file
+        self.supervisor = supervisor or get_supervisor()
+        self._servers: dict[str, ServerConfig] = {}
+        self._by_directory: dict[str, str] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        # Servers added without a saved config (e.g. started ad hoc from a directory)
+        self._transient: set[str] = set()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read the config file, updating known servers in place so running ones keep their process."""
+        try:
+            configs = load_configs(self.config_file)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Warning: could not load {self.config_file}: {e}")
+            return
+        with self._lock:
+            for config in configs:
+                server = self._servers.get(config.id)
+                if server is None:
+                    self._servers[config.id] = server = config
+                else:
+                    self._by_directory.pop(_dir_key(server.directory), None)
+                    server.update_from(config)
+                self._transient.discard(server.id)
+                self._by_directory[_dir_key(server.directory)] = server.id
+
+    def save(self):
+        with self._lock:
+            servers = [s for s in self._servers.values() if s.id not in self._transient]
+        save_configs(servers, self.config_file)
+
+    def add(self, server: ServerConfig, persist: bool = True) -> ServerConfig:
+        with self._lock:
+            self._servers[server.id] = server
+            self._by_directory[_dir_key(server.directory)] = server.id
+            if not persist:
+                self._transient.add(server.id)
+        if persist:
+            self.save()
+        return server
+
+    def remove(self, server_id: str):
+        with self._lock:
+            server = self._servers.pop(server_id, None)
+            if server is None:
+                return
+            if self._by_directory.get(_dir_key(server.directory)) == server_id:
+                del self._by_directory[_dir_key(server.directory)]
+            self._locks.pop(server_id, None)
+            persisted = server_id not in self._transient
+            self._transient.discard(server_id)
+        if persisted:
+            self.save()
+
+    def move(self, server: ServerConfig, directory: str):
+        """Point ``server`` at another directory, keeping the directory index in step."""
+        with self._lock:
+            if self._by_directory.get(_dir_key(server.directory)) == server.id:
+                del self._by_directory[_dir_key(server.directory)]
+            server.directory = directory
+            self._by_directory[_dir_key(directory)] = server.id
+
+    def get(self, server_id: str) -> ServerConfig | None:
+        return self._servers.get(server_id)
+
+    def find_by_directory(self, directory: str) -> ServerConfig | None:
+        server_id = self._by_directory.get(_dir_key(directory))
+        return self._servers.get(server_id) if server_id is not None else None
+
+    def servers(self) -> list[ServerConfig]:
+        with self._lock:
+            return list(self._servers.values())
+
+    def lock(self, server_id: str) -> threading.Lock:
+        """The lock serializing start and stop of one server."""
+        with self._lock:
+            lock = self._locks.get(server_id)
+            if lock is None:
+                lock = self._locks[server_id] = threading.Lock()
+            return lock
+
+    def status(self, server: ServerConfig) -> dict:
+        state = self.supervisor.state(server.id)
+        process = self.supervisor.process(server.id)
+        data = {"id": server.id, "name": server.name, "state": state}
+        if state is None:
+            data["status"] = "not_started"
+        elif self.supervisor.is_alive(server.id):
+            data.update(status="running", pid=process.pid)
+        else:
+            data.update(status="stopped", exit_code=process.returncode)
+        return data
+
+    def __contains__(self, server_id):
+        return server_id in self._servers
+
+    def __len__(self):
+        return len(self._servers)
+
+
+def _dir_key(directory: str) -> str:
+    return os.path.normcase(os.path.abspath(directory)) if directory else ""
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_server_registry() -> ServerRegistry:
+    """Return the process-wide server registry, loaded from ``servers_config.json``."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ServerRegistry()
+            _default_registry.load()
+        return _default_registry
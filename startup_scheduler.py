@@ -0,0 +1,151 @@
+import heapq
+import itertools
+import threading
+import time
+
+from host_memory import free_memory_mb
+from process_supervisor import get_supervisor, RUNNING, EXITED, CRASHED
+
+DEFAULT_MAX_CONCURRENT = 2
+DEFAULT_RAM_HEADROOM_MB = 512
+DEFAULT_START_TIMEOUT = 300
+# How often a start held back for lack of memory re-checks free RAM
+RAM_RECHECK_INTERVAL = 2.0
+
+
+class _StartJob:
+    __slots__ = ("key", "start", "priority", "memory_mb", "on_started", "on_failed", "deadline")
+
+    def __init__(self, key, start, priority, memory_mb, on_started, on_failed):
+        self.key = key
+        self.start = start
+        self.priority = priority
+        self.memory_mb = memory_mb
+        self.on_started = on_started
+        self.on_failed = on_failed
+        self.deadline = 0.0
+
+
+class StartupScheduler:
+    """Starts servers a few at a time instead of all at once.
+
+    Queued starts run highest ``priority`` first (ties in submission order).
+    At most ``max_concurrent`` servers may be starting at any time; a server
+    stops counting once the supervisor reports it running, i.e. once it has
+    printed its ``Done (...)!`` line, or when it exits. A start is only
+    admitted while free RAM minus ``ram_headroom_mb`` covers its ``memory_mb``
+    plus the ``memory_mb`` of every start still in progress (a JVM that has
+    just launched hasn't touched most of its heap yet), unless nothing else is
+    starting, in which case it fails instead of waiting forever.
+
+    ``start()`` is called on the scheduler thread, must launch the process and
+    register it with the supervisor under ``key``, and may raise to fail the
+    job. ``on_started(key)`` and ``on_failed(key, reason)`` are called from
+    background threads.
+    """
+
+    def __init__(self, supervisor=None, max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 ram_headroom_mb: int = DEFAULT_RAM_HEADROOM_MB, start_timeout: float = DEFAULT_START_TIMEOUT):
+        self.supervisor = supervisor or get_supervisor()
+        self.max_concurrent = max(1, max_concurrent)
+        self.ram_headroom_mb = ram_headroom_mb
+        self.start_timeout = start_timeout
+        self._queue = []
+        self._counter = itertools.count()
+        self._starting: dict[object, _StartJob] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self.supervisor.subscribe(self._on_process_event)
+
+    def schedule(self, key, start, priority: int = 0, memory_mb: int = 0, on_started=None, on_failed=None):
+        job = _StartJob(key, start, priority, memory_mb, on_started, on_failed)
+        with self._cond:
+            heapq.heappush(self._queue, (-priority, next(self._counter), job))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="startup-scheduler")
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel_pending(self) -> int:
+        """Drop every start that hasn't been admitted yet. Returns how many were dropped."""
+        with self._cond:
+            dropped = len(self._queue)
+            self._queue.clear()
+            return dropped
+
+    def status(self) -> dict:
+        with self._cond:
+            return {"queued": len(self._queue), "starting": list(self._starting)}
+
+    def _on_process_event(self, event):
+        if event.state not in (RUNNING, EXITED, CRASHED):
+            return
+        with self._cond:
+            job = self._starting.pop(event.key, None)
+            self._cond.notify()
+        if job is None:
+            return
+        if event.state == RUNNING:
+            self._callback(job.on_started, job.key)
+        else:
+            self._callback(job.on_failed, job.key, f"exited during startup (code {event.returncode})")
+
+    def _run(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                for job in [j for j in self._starting.values() if j.deadline <= now]:
+                    # Still no "Done" line; free the slot but leave the server running
+                    del self._starting[job.key]
+                    self._defer(job.on_failed, job.key, f"not ready after {self.start_timeout:.0f}s")
+
+                wait = None
+                while self._queue and len(self._starting) < self.max_concurrent:
+                    job = self._queue[0][2]
+                    free = free_memory_mb() if job.memory_mb else None
+                    reserved = sum(j.memory_mb for j in self._starting.values())
+                    if free is not None and free - self.ram_headroom_mb - reserved < job.memory_mb:
+                        if self._starting:
+                            wait = RAM_RECHECK_INTERVAL  # wait for a running start to settle
+                            break
+                        heapq.heappop(self._queue)
+                        self._defer(job.on_failed, job.key,
+                                    f"not enough free memory ({free} MB free, {job.memory_mb} MB needed)")
+                        continue
+                    heapq.heappop(self._queue)
+                    self._admit(job)
+
+                if self._starting:
+                    until_deadline = min(j.deadline for j in self._starting.values()) - time.monotonic()
+                    wait = max(0.0, until_deadline) if wait is None else min(wait, max(0.0, until_deadline))
+                self._cond.wait(wait)
+
+    def _admit(self, job: _StartJob):
+        """Launch ``job``. Called with the condition held."""
+        job.deadline = time.monotonic() + self.start_timeout
+        self._starting[job.key] = job
+        self._cond.release()
+        try:
+            job.start()
+        except Exception as e:
+            with self._cond:
+                self._starting.pop(job.key, None)
+            self._defer(job.on_failed, job.key, str(e))
+        finally:
+            self._cond.acquire()
+        if job.key in self._starting and not self.supervisor.is_alive(job.key):
+            # start() returned without registering a live process
+            del self._starting[job.key]
+            self._defer(job.on_failed, job.key, "did not start")
+
+    def _defer(self, callback, *args):
+        if callback:
+            threading.Thread(target=self._callback, args=(callback, *args), daemon=True).start()
+
+    @staticmethod
+    def _callback(callback, *args):
+        if callback:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Startup callback error: {e}")
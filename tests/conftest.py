@@ -0,0 +1,75 @@
+import hashlib
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# What the local file server serves
+BLOB = os.urandom(300_000)
+SHA1 = hashlib.sha1(BLOB).hexdigest()
+
+
+class FileServer(ThreadingHTTPServer):
+    """Serves BLOB at any path, honouring Range unless told not to."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.honour_range = True
+        # Range requests honoured before the server starts ignoring Range, or None for no limit
+        self.range_budget = None
+        # Bytes sent before the first response is cut off, or None
+        self.cut_after = None
+        self.ranges = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/server.jar"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        header = self.headers.get("Range")
+        server.ranges.append(header)
+        start, end = 0, len(BLOB) - 1
+        if header and server.honour_range and server.range_budget != 0:
+            if server.range_budget is not None:
+                server.range_budget -= 1
+            first, _, last = header.split("=")[1].partition("-")
+            start, end = int(first), min(int(last), end) if last else end
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(BLOB)}")
+        else:
+            self.send_response(200)
+        body = BLOB[start:end + 1]
+        self.send_header("Content-Length", str(len(body)))
+        if server.cut_after is not None:
+            body, server.cut_after = body[:server.cut_after], None
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    for name in ("http_proxy", "HTTP_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    server = FileServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,104 @@
+import os
+
+import console_buffer
+from console_buffer import ConsoleBuffer, ConsoleSpool, split_lines
+from console_reactor import _Stream
+
+
+def test_split_lines_only_breaks_on_newline():
+    assert split_lines("a\rb\x0cc d\ne\n") == ["a\rb\x0cc d\n", "e\n"]
+    assert split_lines("partial") == ["partial\n"]
+
+
+def test_reactor_stream_only_breaks_on_newline():
+    received = []
+    with open(os.devnull, "rb") as pipe:
+        stream = _Stream(pipe, received.extend, None, "utf-8")
+        stream.feed("progress 10%\rprogress 20%\r\nnext\x0cpage\nhalf".encode())
+    assert received == ["progress 10%\rprogress 20%\r\n", "next\x0cpage\n"]
+    assert stream.pending == "half"
+
+
+def test_sequence_numbers_match_the_spool_after_reopening(tmp_path):
+    path = str(tmp_path / "console.log")
+    buffer = ConsoleBuffer(max_lines=2, spool=ConsoleSpool(path, checkpoint_every=2))
+    buffer.append(["one\rstill one\n", "two\x0bstill two\n", "three\nfour\n", "five"])
+    assert buffer.last_seq == 5
+    assert buffer.before(3, 2) == ["one\rstill one\n", "two\x0bstill two\n"]
+    buffer.spool.close()
+
+    reopened = ConsoleBuffer(max_lines=2, spool=ConsoleSpool(path, checkpoint_every=2))
+    assert reopened.last_seq == 5
+    assert reopened.tail(2) == ["four\n", "five\n"]
+    assert reopened.before(5, 2) == ["three\n", "four\n"]
+
+
+def test_spool_rotates_while_appending(tmp_path, monkeypatch):
+    monkeypatch.setattr(console_buffer, "MAX_SPOOL_BYTES", 100)
+    path = tmp_path / "console.log"
+    buffer = ConsoleBuffer(max_lines=3, spool=ConsoleSpool(str(path), checkpoint_every=4))
+    lines = [f"line {i:04}\n" for i in range(30)]
+    for line in lines:
+        buffer.append([line])
+        assert path.stat().st_size <= 100
+    assert (tmp_path / "console.log.1").exists()
+    assert buffer.last_seq == 30
+    # Lines still in the current file page back in; rotated ones are gone
+    assert buffer.before(28, 4) == lines[23:27]
+    assert buffer.before(2, 1) == []
+
+
+def test_entries_are_stored_next_to_their_lines():
+    buffer = ConsoleBuffer(max_lines=3)
+    buffer.append(["plain\n"])
+    buffer.append(["a\n", "b\n", "c\n"], entries=[{"n": 1}, {"n": 2}, {"n": 3}])
+    assert buffer.entries_since(0) == (["a\n", "b\n", "c\n"], [{"n": 1}, {"n": 2}, {"n": 3}], 4, True)
+    buffer.append(["d\n"])
+    assert buffer.entries_since(3) == (["c\n", "d\n"], [{"n": 3}, None], 5, False)
+    assert buffer.since(3) == (["c\n", "d\n"], 5, False)
+
+
+def test_reopening_keeps_the_line_count(tmp_path):
+    path = str(tmp_path / "console.log")
+    spool = ConsoleSpool(path, checkpoint_every=2)
+    spool.append([f"{i}\n" for i in range(5)])
+    spool.close()
+    for _ in range(3):
+        spool = ConsoleSpool(path, checkpoint_every=2)
+        assert spool.read(0, 10) == [f"{i}\n" for i in range(5)]
+        assert spool.line_count == 5
+        spool.close()
+
+
+def test_sequence_numbers_continue_across_rotation_and_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(console_buffer, "MAX_SPOOL_BYTES", 100)
+    path = str(tmp_path / "console.log")
+    buffer = ConsoleBuffer(max_lines=3, spool=ConsoleSpool(path, checkpoint_every=4))
+    lines = [f"line {i:04}\n" for i in range(30)]
+    for line in lines:
+        buffer.append([line])
+    buffer.spool.close()
+
+    reopened = ConsoleBuffer(max_lines=3, spool=ConsoleSpool(path, checkpoint_every=4))
+    assert reopened.last_seq == 30
+    assert reopened.tail(3) == lines[27:]
+    assert reopened.before(28, 4) == lines[23:27]
+    reopened.append(["after restart\n"])
+    assert reopened.since(30) == (["after restart\n"], 31, False)
+
+
+def test_rotating_when_opened_keeps_counting(tmp_path, monkeypatch):
+    path = str(tmp_path / "console.log")
+    spool = ConsoleSpool(path)
+    # One write into an empty spool is never split, so it can leave the file over the cap
+    spool.append([f"line {i:04}\n" for i in range(30)])
+    spool.close()
+    monkeypatch.setattr(console_buffer, "MAX_SPOOL_BYTES", 100)
+
+    buffer = ConsoleBuffer(spool=ConsoleSpool(path))
+    assert buffer.last_seq == 30
+    assert (tmp_path / "console.log.1").exists()
+    buffer.append(["next\n"])
+    assert buffer.since(30) == (["next\n"], 31, False)
+    buffer.spool.close()
+    assert ConsoleBuffer(spool=ConsoleSpool(path)).tail(1) == ["next\n"]
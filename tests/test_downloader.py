@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from conftest import BLOB, SHA1
+from downloader import Downloader, DownloadError
+
+
+def downloader():
+    return Downloader(retries=2, backoff=0, timeout=5, chunk_size=16_384)
+
+
+def test_resumes_a_partial_download(server, tmp_path):
+    dest = tmp_path / "server.jar"
+    (tmp_path / "server.jar.part").write_bytes(BLOB[:100_000])
+    assert downloader().download(server.url, str(dest), expected_sha1=SHA1) == SHA1
+    assert dest.read_bytes() == BLOB
+    assert server.ranges == ["bytes=100000-"]
+    assert not (tmp_path / "server.jar.part").exists()
+
+
+def test_resumes_after_the_connection_drops(server, tmp_path):
+    server.cut_after = 120_000
+    dest = tmp_path / "server.jar"
+    assert downloader().download(server.url, str(dest), expected_sha1=SHA1) == SHA1
+    assert dest.read_bytes() == BLOB
+    assert server.ranges == [None, "bytes=120000-"]
+
+
+def test_hash_mismatch_keeps_the_existing_file(server, tmp_path):
+    dest = tmp_path / "server.jar"
+    dest.write_bytes(b"previous release")
+    with pytest.raises(DownloadError, match="SHA1 mismatch"):
+        downloader().download(server.url, str(dest), expected_sha1="0" * 40)
+    assert dest.read_bytes() == b"previous release"
+    assert not (tmp_path / "server.jar.part").exists()
+
+
+def test_starts_over_when_the_server_ignores_range(server, tmp_path):
+    server.honour_range = False
+    dest = tmp_path / "server.jar"
+    # A stale prefix that doesn't match the remote file must not survive
+    (tmp_path / "server.jar.part").write_bytes(b"x" * 50_000)
+    assert downloader().download(server.url, str(dest), expected_sha1=SHA1) == SHA1
+    assert dest.read_bytes() == BLOB
+    assert server.ranges == ["bytes=50000-"]
+
+
+def test_replaces_an_existing_file(server, tmp_path):
+    dest = tmp_path / "server.jar"
+    dest.write_bytes(b"previous release")
+    downloader().download(server.url, str(dest))
+    assert dest.read_bytes() == BLOB
+
+
+def segmented(connections=4):
+    return Downloader(connections=connections, retries=2, backoff=0, timeout=5, chunk_size=16_384,
+                      min_split_size=64 * 1024)
+
+
+def test_segmented_download(server, tmp_path):
+    dest = tmp_path / "server.jar"
+    assert segmented().download(server.url, str(dest), expected_sha1=SHA1) == SHA1
+    assert dest.read_bytes() == BLOB
+    assert server.ranges[0] == "bytes=0-0"
+    assert sorted(server.ranges[1:]) == ["bytes=0-74999", "bytes=150000-224999",
+                                         "bytes=225000-299999", "bytes=75000-149999"]
+    assert not (tmp_path / "server.jar.part.json").exists()
+
+
+def test_segmented_download_resumes_from_its_state_file(server, tmp_path):
+    dest = tmp_path / "server.jar"
+    part = tmp_path / "server.jar.part"
+    part.write_bytes(BLOB[:200_000] + bytes(100_000))
+    (tmp_path / "server.jar.part.json").write_text(json.dumps({
+        "url": server.url, "size": len(BLOB),
+        "segments": [[0, 149_999, 150_000], [150_000, 299_999, 50_000]],
+    }))
+    assert segmented().download(server.url, str(dest), expected_sha1=SHA1) == SHA1
+    assert dest.read_bytes() == BLOB
+    assert server.ranges == ["bytes=0-0", "bytes=200000-299999"]
+
+
+def test_segmented_download_keeps_a_single_stream_prefix(server, tmp_path):
+    dest = tmp_path / "server.jar"
+    (tmp_path / "server.jar.part").write_bytes(BLOB[:100_000])
+    assert segmented(connections=2).download(server.url, str(dest), expected_sha1=SHA1) == SHA1
+    assert dest.read_bytes() == BLOB
+    assert sorted(server.ranges[1:]) == ["bytes=100000-199999", "bytes=200000-299999"]
+
+
+def test_segmented_download_fails_when_the_server_stops_honouring_range(server, tmp_path):
+    server.range_budget = 1  # the probe only
+    with pytest.raises(DownloadError, match="stopped honouring Range"):
+        segmented().download(server.url, str(tmp_path / "server.jar"))
+    assert not (tmp_path / "server.jar").exists()
+
+
+def test_small_files_are_not_split(server, tmp_path):
+    dest = tmp_path / "server.jar"
+    Downloader(connections=4, min_split_size=len(BLOB) + 1).download(server.url, str(dest))
+    assert dest.read_bytes() == BLOB
+    assert server.ranges == ["bytes=0-0", None]
@@ -0,0 +1,95 @@
+import pytest
+
+from event_bus import EventBus, COALESCE, DROP_OLDEST
+
+
+def texts(messages):
+    return [m.data["n"] for m in messages]
+
+
+def test_drop_oldest_keeps_the_newest_and_counts_drops():
+    bus = EventBus()
+    subscription = bus.subscribe("jobs", maxlen=3, policy=DROP_OLDEST)
+    for n in range(5):
+        bus.publish("jobs", {"type": "progress", "n": n})
+    assert texts(subscription.get(timeout=0)) == [2, 3, 4]
+    assert subscription.dropped == 2
+    assert subscription.get(timeout=0) == []
+
+
+def test_coalesce_replaces_pending_messages_with_the_same_key():
+    bus = EventBus()
+    subscription = bus.subscribe("setup:*", maxlen=10, policy=COALESCE)
+    bus.publish("setup:a", {"type": "progress", "n": 1})
+    bus.publish("setup:b", {"type": "progress", "n": 2})
+    bus.publish("setup:a", {"type": "progress", "n": 3})
+    bus.publish("setup:a", {"type": "success", "n": 4})
+    # Per topic and key, moved to the back on replacement
+    assert texts(subscription.get(timeout=0)) == [2, 3, 4]
+    assert subscription.dropped == 1
+
+
+def test_coalesce_without_a_key_drops_the_oldest():
+    bus = EventBus()
+    subscription = bus.subscribe("t", maxlen=2, policy=COALESCE, coalesce_key=lambda data: None)
+    for n in range(4):
+        bus.publish("t", {"n": n})
+    assert texts(subscription.get(timeout=0)) == [2, 3]
+    assert subscription.dropped == 2
+
+
+def test_late_subscribers_get_the_retained_message_of_each_topic():
+    bus = EventBus()
+    bus.publish("setup:a", {"n": 1})
+    bus.publish("setup:b", {"n": 2})
+    bus.publish("setup:a", {"n": 3})
+    bus.publish("server:x", {"n": 4})
+    assert texts(bus.subscribe("setup:*").get(timeout=0)) == [2, 3]
+    assert texts(bus.subscribe("setup:a").get(timeout=0)) == [3]
+    assert bus.subscribe("setup:a", replay=False).get(timeout=0) == []
+    assert texts(bus.retained("setup:b", "server:*")) == [2, 4]
+
+
+def test_retained_topics_are_bounded():
+    bus = EventBus(max_retained=2)
+    for n, topic in enumerate(["a", "b", "c", "b"]):
+        bus.publish(topic, {"n": n})
+    assert texts(bus.retained("*")) == [2, 3]
+
+
+def test_prefix_and_exact_subscriptions_only_see_their_topics():
+    bus = EventBus()
+    prefix = bus.subscribe("logs:*")
+    exact = bus.subscribe("logs:a")
+    heard = []
+    stop = bus.listen(lambda message: heard.append(message.topic), "logs:b", "server:*")
+    for topic in ("logs:a", "logs:b", "server:a", "setup:a"):
+        bus.publish(topic, {"n": topic})
+    assert texts(prefix.get(timeout=0)) == ["logs:a", "logs:b"]
+    assert texts(exact.get(timeout=0)) == ["logs:a"]
+    assert heard == ["logs:b", "server:a"]
+
+    stop()
+    prefix.close()
+    bus.publish("logs:b", {"n": "after"})
+    assert heard == ["logs:b", "server:a"]
+    assert prefix.get(timeout=0) == []
+    assert texts(exact.get(timeout=0)) == []
+
+
+def test_a_failing_listener_does_not_stop_delivery():
+    bus = EventBus()
+
+    def broken(message):
+        raise RuntimeError("boom")
+
+    bus.listen(broken, "t")
+    subscription = bus.subscribe("t")
+    message = bus.publish("t", {"n": 1})
+    assert subscription.get(timeout=0) == [message]
+    assert message.json() == '{"n": 1}'
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        EventBus().subscribe("t", policy="keep_everything")
@@ -0,0 +1,89 @@
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import jar_store
+from conftest import BLOB, SHA1 as SERVED_SHA1
+from jar_store import JarStore
+
+SHA1 = "a" * 40
+
+
+def deploy_many(root, target_dir, worker, count):
+    store = JarStore(root, link_mode="hardlink")
+    for i in range(count):
+        store.deploy(SHA1, os.path.join(target_dir, f"{worker}-{i}", "server.jar"))
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_concurrent_processes_keep_every_reference(tmp_path):
+    root = str(tmp_path / "store")
+    store = JarStore(root, link_mode="hardlink")
+    os.makedirs(os.path.dirname(store.object_path(SHA1)))
+    with open(store.object_path(SHA1), "wb") as f:
+        f.write(b"jar")
+    servers = tmp_path / "servers"
+    for worker in range(4):
+        for i in range(25):
+            (servers / f"{worker}-{i}").mkdir(parents=True)
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=deploy_many, args=(root, str(servers), worker, 25)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+        assert process.exitcode == 0
+
+    with open(os.path.join(root, "refs.json"), encoding="utf-8") as f:
+        refs = json.load(f)
+    assert len(refs[SHA1]) == 100
+    assert store.gc() == []
+
+    for worker in range(4):
+        for i in range(25):
+            store.release(str(servers / f"{worker}-{i}" / "server.jar"))
+    assert store.gc() == [store.object_path(SHA1)]
+
+
+def fetch_and_deploy(root, url, dest):
+    store = JarStore(root, link_mode="hardlink")
+    store.fetch(url, SERVED_SHA1)
+    store.deploy(SERVED_SHA1, dest)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_concurrent_processes_download_a_jar_once(server, tmp_path):
+    root = str(tmp_path / "store")
+    context = multiprocessing.get_context("fork")
+    dests = [str(tmp_path / f"server-{i}.jar") for i in range(3)]
+    workers = [context.Process(target=fetch_and_deploy, args=(root, server.url, dest)) for dest in dests]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+        assert process.exitcode == 0
+
+    assert server.ranges == [None]
+    store = JarStore(root)
+    for dest in dests:
+        with open(dest, "rb") as f:
+            assert f.read() == BLOB
+    assert not os.path.exists(store.object_path(SERVED_SHA1) + ".part")
+
+
+def test_gc_keeps_a_freshly_fetched_jar_until_it_is_deployed(server, tmp_path):
+    store = JarStore(str(tmp_path / "store"), link_mode="copy")
+    assert store.fetch(server.url, SERVED_SHA1)
+    assert store.gc() == []
+    assert os.path.exists(store.object_path(SERVED_SHA1))
+    store.deploy(SERVED_SHA1, str(tmp_path / "server.jar"))
+    store.release(str(tmp_path / "server.jar"))
+    assert store.gc() == []  # still within the grace period
+
+    with open(store.object_path(SERVED_SHA1) + ".lock", "w") as f:
+        f.write(str(time.time() - jar_store.GC_GRACE_SECONDS - 1))
+    assert store.gc() == [store.object_path(SERVED_SHA1)]
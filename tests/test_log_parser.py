@@ -0,0 +1,46 @@
+import pytest
+
+from log_parser import LogParser, LOG, DONE, JOIN, LEAVE, CHAT, LAG, EXCEPTION, CRASH
+
+
+def parse(line):
+    return LogParser().parse(line)
+
+
+@pytest.mark.parametrize("player", ["Steve", "Dave", "Dinnerbone", "Creeper_Hunter", "<3Steve", "[Bot]"])
+def test_join_and_leave_for_any_player_name(player):
+    joined = parse(f"[12:00:00] [Server thread/INFO]: {player} joined the game")
+    left = parse(f"[12:00:01 INFO]: {player} left the game")
+    assert (joined.kind, joined.player) == (JOIN, player)
+    assert (left.kind, left.player) == (LEAVE, player)
+
+
+def test_prefix_branches_still_classify_their_own_lines():
+    assert parse("[12:00:00] [Server thread/INFO]: Done (12.345s)! For help, type \"help\"").seconds == 12.345
+    lag = parse("[12:00:00] [Server thread/WARN]: Can't keep up! Is the server overloaded? "
+                "Running 2042ms or 40 ticks behind")
+    assert (lag.kind, lag.ms, lag.ticks) == (LAG, 2042, 40)
+    chat = parse("[12:00:00 INFO]: [Not Secure] <Alex> I joined the game")
+    assert (chat.kind, chat.player, chat.message) == (CHAT, "Alex", "I joined the game")
+
+
+def test_plain_lines_with_matching_prefixes_stay_plain():
+    for message in ("Dimension loaded", "Can't find spawn", "[Server] hello", "<html>"):
+        assert parse(f"[12:00:00] [Server thread/INFO]: {message}").kind == LOG
+
+
+def test_stack_trace_and_crash_report_are_grouped():
+    parser = LogParser()
+    events = parser.feed([
+        "[12:00:00] [Server thread/ERROR]: Encountered an unexpected exception\n",
+        "java.lang.IllegalStateException: boom\n",
+        "\tat net.minecraft.server.MinecraftServer.run(MinecraftServer.java:100)\n",
+        "---- Minecraft Crash Report ----\n",
+        "\n",
+        "Description: Exception in server tick loop\n",
+        "[12:00:05] [Server thread/INFO]: Done (1.0s)! For help\n",
+    ])
+    assert [e.kind for e in events] == [LOG, EXCEPTION, CRASH, DONE]
+    assert events[1].exception == "java.lang.IllegalStateException"
+    assert len(events[1].trace) == 1
+    assert events[2].trace == ["", "Description: Exception in server tick loop"]
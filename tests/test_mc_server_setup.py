@@ -0,0 +1,34 @@
+import pytest
+
+import mc_server_setup
+from mc_server_setup import provision_server, script_java
+
+JDK = "/opt/jdk-21/bin/java"
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    monkeypatch.setattr(mc_server_setup, "get_version_info",
+                        lambda version: ("1.21.1", {"url": "https://example.invalid/server.jar"}))
+    monkeypatch.setattr(mc_server_setup, "install_server_jar", lambda *args, **kwargs: "downloaded")
+
+
+def test_provisioned_scripts_run_the_resolved_java(tmp_path, monkeypatch, offline):
+    chosen = []
+    monkeypatch.setattr(mc_server_setup, "resolve_java",
+                        lambda version, java_path=None: chosen.append((version, java_path)) or JDK)
+    result = provision_server(str(tmp_path), "latest", java_path=None)
+    assert chosen == [("1.21.1", None)]
+    assert result["java"] == JDK
+    assert (tmp_path / "start.sh").read_text().splitlines()[-1].startswith(JDK + " ")
+    assert JDK in (tmp_path / "start.bat").read_text()
+
+
+def test_scripts_fall_back_to_java_on_path_only_without_an_explicit_java(monkeypatch):
+    def missing(version, java_path=None):
+        raise RuntimeError("no suitable Java")
+
+    monkeypatch.setattr(mc_server_setup, "resolve_java", missing)
+    assert script_java("1.21.1") == "java"
+    with pytest.raises(RuntimeError):
+        script_java("1.21.1", "/nowhere/java")
@@ -0,0 +1,30 @@
+import json
+
+from server_config import load_configs, save_configs
+
+
+def test_configs_without_ids_keep_the_same_ids_across_loads(tmp_path):
+    path = tmp_path / "servers_config.json"
+    path.write_text(json.dumps([
+        {"name": "survival", "directory": str(tmp_path / "survival")},
+        {"name": "creative", "directory": str(tmp_path / "creative")},
+        {"name": "creative", "directory": str(tmp_path / "creative")},
+        {"id": "kept", "name": "modded", "directory": str(tmp_path / "modded")},
+    ]))
+    first = [s.id for s in load_configs(str(path))]
+    assert first[3] == "kept"
+    assert len(set(first)) == 4
+    # The filled-in ids were written back
+    assert [entry["id"] for entry in json.loads(path.read_text())] == first
+
+    save_configs(load_configs(str(path)), str(path))
+    assert [s.id for s in load_configs(str(path))] == first
+
+
+def test_an_unsaved_legacy_file_still_gets_stable_ids(tmp_path):
+    legacy = json.dumps([{"name": "survival", "directory": str(tmp_path / "survival")}])
+    ids = []
+    for name in ("a.json", "b.json"):
+        (tmp_path / name).write_text(legacy)
+        ids.append(load_configs(str(tmp_path / name))[0].id)
+    assert ids[0] == ids[1]
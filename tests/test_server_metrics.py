@@ -0,0 +1,30 @@
+from log_parser import LogParser
+from server_metrics import ServerMetrics
+
+NAMES = ["Steve", "Dave", "Dinnerbone", "Creeper_Hunter", "<3Steve", "[Bot]"]
+
+
+def feed(metrics, lines):
+    parser = LogParser()
+    metrics.feed(parser.feed([line + "\n" for line in lines]) + parser.flush())
+
+
+def test_players_online_and_peak_for_any_player_name():
+    metrics = ServerMetrics("test")
+    feed(metrics, [f"[12:00:00] [Server thread/INFO]: {name} joined the game" for name in NAMES])
+    players = metrics.snapshot()["players"]
+    assert players["online"] == len(NAMES)
+    assert players["names"] == sorted(NAMES)
+    assert players["peak_1h"] == len(NAMES)
+
+    feed(metrics, [f"[12:00:01] [Server thread/INFO]: {name} left the game" for name in NAMES[1:]])
+    players = metrics.snapshot()["players"]
+    assert (players["online"], players["names"], players["peak_1h"]) == (1, ["Steve"], len(NAMES))
+
+
+def test_chat_mentioning_a_join_does_not_count_a_player():
+    metrics = ServerMetrics("test")
+    feed(metrics, ["[12:00:00 INFO]: <Alex> Dave joined the game",
+                   "[12:00:00 INFO]: Dave joined the game",
+                   "[12:00:01 INFO]: Dave joined the game"])
+    assert metrics.snapshot()["players"]["names"] == ["Dave"]
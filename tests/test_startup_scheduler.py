@@ -0,0 +1,55 @@
+import threading
+import time
+
+import startup_scheduler
+from process_supervisor import RUNNING
+from startup_scheduler import StartupScheduler
+
+
+class FakeSupervisor:
+    def __init__(self):
+        self.alive = set()
+        self.listeners = []
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def is_alive(self, key):
+        return key in self.alive
+
+    def report(self, key, state):
+        event = type("Event", (), {"key": key, "state": state, "returncode": None})()
+        for listener in self.listeners:
+            listener(event)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_memory_of_starts_in_progress_is_reserved(monkeypatch):
+    monkeypatch.setattr(startup_scheduler, "free_memory_mb", lambda: 3000)
+    monkeypatch.setattr(startup_scheduler, "RAM_RECHECK_INTERVAL", 0.05)
+    supervisor = FakeSupervisor()
+    scheduler = StartupScheduler(supervisor, max_concurrent=2, ram_headroom_mb=0)
+    started = []
+    lock = threading.Lock()
+
+    def start(key):
+        with lock:
+            started.append(key)
+            supervisor.alive.add(key)
+
+    for key in ("a", "b"):
+        scheduler.schedule(key, lambda key=key: start(key), memory_mb=2000)
+    wait_for(lambda: started == ["a"])
+    # 3000 MB free would cover "b" on its own, but "a" may still claim its 2000 MB
+    time.sleep(0.2)
+    assert started == ["a"]
+    assert scheduler.status() == {"queued": 1, "starting": ["a"]}
+
+    supervisor.report("a", RUNNING)
+    wait_for(lambda: started == ["a", "b"])
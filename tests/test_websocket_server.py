@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from event_bus import COALESCE, DROP_OLDEST
+from websocket_server import WebSocketServer, _Client
+
+
+class FakeSocket:
+    def __init__(self):
+        self.closed_with = None
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000, reason=""):
+        self.closed_with = (code, reason)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def connect(server):
+    """Register a client whose sender task never runs, like a browser that stopped reading."""
+    socket = FakeSocket()
+    client = _Client(socket, server.max_queue)
+    client.task = asyncio.get_running_loop().create_future()
+    server.clients[socket] = client
+    return client
+
+
+def queued(client):
+    return [message for _, message in client.pending]
+
+
+def test_full_queue_drops_the_oldest():
+    async def scenario():
+        client = _Client(FakeSocket(), 3)
+        for n in range(5):
+            client.enqueue(str(n), None, DROP_OLDEST)
+        return client
+
+    client = run(scenario())
+    assert queued(client) == ["2", "3", "4"]
+    assert (client.dropped, client.behind) == (2, 2)
+
+
+def test_full_queue_coalesces_to_the_newest_per_topic():
+    async def scenario():
+        client = _Client(FakeSocket(), 3)
+        for message, topic in [("a1", "a"), ("b1", "b"), ("a2", "a"), ("a3", "a")]:
+            client.enqueue(message, topic, COALESCE)
+        return client
+
+    client = run(scenario())
+    assert queued(client) == ["b1", "a3"]
+    assert client.dropped == 2
+
+
+def test_opt_in_topics_only_reach_subscribers():
+    async def scenario():
+        server = WebSocketServer(opt_in_prefixes=("logs:", "setup:"))
+        server.on_subscribe = lambda topic, since: [f"missed {topic} after {since}"]
+        watcher, other = connect(server), connect(server)
+        server.subscribe(watcher, "logs:a", since=7)
+        watcher.pending.clear()
+        server.broadcast("line", "logs:a")
+        server.broadcast("progress", "setup:job")
+        server.broadcast("status", "server:a")
+        return server, watcher, other
+
+    server, watcher, other = run(scenario())
+    assert queued(watcher) == ["line", "status"]
+    assert queued(other) == ["status"]
+
+
+def test_subscribe_replays_the_backlog_first():
+    async def scenario():
+        server = WebSocketServer(opt_in_prefixes=("logs:",))
+        server.on_subscribe = lambda topic, since: [f"missed {topic} after {since}"]
+        client = connect(server)
+        server.subscribe(client, "logs:a", since=7)
+        return client
+
+    client = run(scenario())
+    assert queued(client) == ["missed logs:a after 7", '{"type": "subscribed", "topic": "logs:a"}']
+
+
+def test_a_client_that_keeps_falling_behind_is_disconnected():
+    async def scenario():
+        server = WebSocketServer(max_queue=2, disconnect_after=3)
+        slow = connect(server)
+        for n in range(5):
+            server.broadcast(str(n))
+        assert slow.websocket in server.clients  # 3 dropped: not yet over the limit
+        server.broadcast("5")
+        await asyncio.sleep(0)
+        return server, slow
+
+    server, slow = run(scenario())
+    assert slow.websocket not in server.clients
+    assert slow.task.cancelled()
+    assert slow.websocket.closed_with == (1008, "client too slow")
+    assert slow.dropped == 4
+
+
+def test_a_client_that_catches_up_is_forgiven_its_drops():
+    async def scenario():
+        server = WebSocketServer(max_queue=2, disconnect_after=3)
+        client = connect(server)
+        client.task = asyncio.create_task(server._send_loop(client))
+        for burst in range(3):
+            for n in range(4):
+                server.broadcast(f"{burst}.{n}")
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        client.task.cancel()
+        return server, client
+
+    server, client = run(scenario())
+    assert client.websocket in server.clients
+    assert client.dropped == 6
+    assert client.websocket.sent == ["0.2", "0.3", "1.2", "1.3", "2.2", "2.3"]
@@ -0,0 +1,104 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+VERSION_TYPES = ("release", "snapshot", "old_beta", "old_alpha")
+RELEASE_ALIASES = ("latest", "release", "latest-release")
+SNAPSHOT_ALIASES = ("snapshot", "latest-snapshot")
+
+
+def _parse_time(value: str) -> float:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return 0.0
+
+
+class VersionCatalog:
+    """Indexed, read-only view of a Mojang version manifest.
+
+    Built once per manifest revision; lookups by id are O(1) and
+    time-range queries use binary search over the release timeline.
+    """
+
+    def __init__(self, manifest: dict, revision: str = ""):
+        self.revision = revision
+        latest = manifest.get("latest", {})
+        self.latest_release = latest.get("release", "")
+        self.latest_snapshot = latest.get("snapshot", "")
+
+        self._by_id: dict[str, dict] = {}
+        self._by_type: dict[str, list[dict]] = {}
+        timeline = []
+        for v in manifest.get("versions", []):
+            version_id = v.get("id")
+            if not version_id:
+                continue
+            self._by_id[version_id] = v
+            timeline.append((_parse_time(v.get("releaseTime", "")), v))
+
+        # Oldest first so bisect can slice by timestamp
+        timeline.sort(key=lambda item: item[0])
+        self._times = [t for t, _ in timeline]
+        self._timeline = [v for _, v in timeline]
+        for v in reversed(self._timeline):
+            self._by_type.setdefault(v.get("type", ""), []).append(v)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, version_id):
+        return version_id in self._by_id
+
+    def get(self, version_id: str) -> dict | None:
+        return self._by_id.get(version_id)
+
+    def resolve(self, version: str | None) -> dict:
+        """Resolve a version id or an alias (latest/snapshot) to its manifest entry."""
+        if version and version in self._by_id:
+            return self._by_id[version]
+        if not version or version in RELEASE_ALIASES:
+            if not self.latest_release:
+                raise RuntimeError("Could not determine latest release from manifest")
+            target = self.latest_release
+        elif version in SNAPSHOT_ALIASES:
+            if not self.latest_snapshot:
+                raise RuntimeError("Could not determine latest snapshot from manifest")
+            target = self.latest_snapshot
+        else:
+            raise RuntimeError(f"Version '{version}' not found in manifest")
+
+        selected = self._by_id.get(target)
+        if not selected:
+            raise RuntimeError(f"Version '{target}' not found in manifest")
+        return selected
+
+    def by_type(self, version_type: str) -> list[dict]:
+        """All versions of one type, newest first."""
+        return list(self._by_type.get(version_type, ()))
+
+    def latest(self, version_type: str = "release", count: int = 1) -> list[dict]:
+        """The ``count`` newest versions of ``version_type``."""
+        return self._by_type.get(version_type, [])[:count]
+
+    def between(self, start: str, end: str, version_type: str | None = None) -> list[dict]:
+        """Versions released between ``start`` and ``end`` inclusive, newest first.
+
+        Both bounds may be version ids or ISO-8601 timestamps.
+        """
+        first, last = sorted((self._bound_time(start), self._bound_time(end)))
+        lo = bisect_left(self._times, first)
+        hi = bisect_right(self._times, last)
+        selected = self._timeline[lo:hi]
+        if version_type:
+            selected = [v for v in selected if v.get("type") == version_type]
+        selected.reverse()
+        return selected
+
+    def _bound_time(self, bound: str) -> float:
+        v = self._by_id.get(bound)
+        if v is not None:
+            return _parse_time(v.get("releaseTime", ""))
+        t = _parse_time(bound)
+        if not t:
+            raise RuntimeError(f"Version '{bound}' not found in manifest")
+        return t
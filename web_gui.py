@@ -1,25 +1,52 @@
 from flask import Flask, render_template, request, jsonify, Response
 import json
 import threading
-import queue
 import time
+import uuid
 from mc_server_setup import (
-    fetch_json, get_version_info, ensure_dir, sha1_file, 
-    download_file, write_eula, write_start_script, 
-    check_java_version, start_server, PISTON_META_MANIFEST
+    get_catalog, get_version_info, ensure_dir, verify_sha1, 
+    install_server_jar, write_eula, write_start_script, 
+    check_java_version, start_server, resolve_java, script_java, server_command, read_view_distance
 )
 import os
 import subprocess
+from downloader import throttled
 from websocket_server import WebSocketServer
+from process_supervisor import get_supervisor
+from lifecycle import get_lifecycle, STOPPED, TIMED_OUT, STOP_TIMEOUT
+from java_runtime import get_java_registry
+from jvm_profiles import recommend_heap, memory_mb, DEFAULT_PROFILE, PROFILES
+from log_parser import LogParser, DONE, LOG
+from server_metrics import get_metrics
+from resource_sampler import get_resource_sampler, SUPPORTED as RESOURCES_SUPPORTED
+from server_config import ServerConfig
+from server_registry import get_server_registry
+from console_reactor import get_console_reactor
+from event_bus import get_event_bus, COALESCE
 
 app = Flask(__name__)
 
-# Global state for progress tracking
-progress_queue = queue.Queue()
-server_process = None
+# Setup progress and server status are published on per-job and per-server topics
+bus = get_event_bus()
+# SSE streams send a comment this often while idle so proxies keep the connection open
+SSE_KEEPALIVE_SECONDS = 15
+# How long /api/stop-server waits before answering 202 and finishing in the background: the whole
+# time a graceful "stop" is given, so a loaded server saving its world still answers "stopped"
+STOP_WAIT_SECONDS = STOP_TIMEOUT
+supervisor = get_supervisor()
+# Servers from servers_config.json, plus the ad-hoc one started from a directory under WEB_SERVER_ID
+registry = get_server_registry()
+WEB_SERVER_ID = "web"
+# Only parse() is used, which keeps no state, so one parser serves every request thread
+line_parser = LogParser()
+# Created up front so it sees the first process events
+metrics = get_metrics()
+resources = get_resource_sampler()
 
 # Initialize WebSocket server with auto port selection
-websocket_server = WebSocketServer(host='0.0.0.0', port=8765, max_retry_ports=20)
+# Console output (logs:<server id>) and setup progress (setup:<job id>) only go to clients that subscribe to them
+websocket_server = WebSocketServer(host='0.0.0.0', port=8765, max_retry_ports=20,
+                                   opt_in_prefixes=("logs:", "setup:"))
 
 # Start the WebSocket server
 websocket_server.start()
@@ -36,18 +63,15 @@ websocket_info = {
 def get_available_versions():
     """Get list of available Minecraft versions"""
     try:
-        manifest = fetch_json(PISTON_META_MANIFEST)
-        versions = manifest.get("versions", [])
-        latest_release = manifest.get("latest", {}).get("release", "")
-        latest_snapshot = manifest.get("latest", {}).get("snapshot", "")
+        catalog = get_catalog()
         
         # Filter to releases and recent snapshots for GUI
-        releases = [v for v in versions if v.get("type") == "release"][:20]  # Last 20 releases
-        snapshots = [v for v in versions if v.get("type") == "snapshot"][:10]  # Last 10 snapshots
+        releases = catalog.latest("release", 20)  # Last 20 releases
+        snapshots = catalog.latest("snapshot", 10)  # Last 10 snapshots
         
         return {
-            "latest_release": latest_release,
-            "latest_snapshot": latest_snapshot,
+            "latest_release": catalog.latest_release,
+            "latest_snapshot": catalog.latest_snapshot,
             "releases": releases,
             "snapshots": snapshots
         }
@@ -73,27 +97,102 @@ def api_versions():
 
 @app.route('/api/java-check')
 def api_java_check():
-    ok, output = check_java_version()
-    return jsonify({"ok": ok, "output": output})
+    ok, output = check_java_version(refresh=request.args.get('refresh') == '1')
+    runtimes = [runtime.to_dict() for runtime in get_java_registry().runtimes()]
+    return jsonify({"ok": ok, "output": output, "runtimes": runtimes})
+
+@app.route('/api/metrics')
+def api_metrics():
+    """Lag, startup, restart and player metrics for every server this process has run"""
+    return jsonify(metrics.snapshot())
+
+@app.route('/api/metrics/<key>')
+def api_server_metrics(key):
+    if key not in metrics:
+        return jsonify({"error": f"No metrics for '{key}'"}), 404
+    return jsonify(metrics.get(key).snapshot(series_seconds=request.args.get('seconds', 3600, type=float)))
+
+@app.route('/api/resources')
+def api_resources():
+    """Latest CPU, memory, thread, FD and disk I/O sample per server, plus recent history"""
+    return jsonify({"supported": RESOURCES_SUPPORTED, "interval": resources.interval,
+                    "servers": resources.snapshot(limit=request.args.get('limit', 60, type=int))})
+
+@app.route('/api/resources/<key>')
+def api_server_resources(key):
+    series = resources.series(key)
+    if series is None:
+        return jsonify({"error": f"No resource samples for '{key}'"}), 404
+    return jsonify({"interval": resources.interval, "latest": resources.latest(key),
+                    "history": series.to_dict(request.args.get('limit', type=int))})
+
+@app.route('/api/jvm-profiles')
+def api_jvm_profiles():
+    """JVM flag profiles, plus a heap recommendation for ?serverDir= on this host"""
+    server_dir = os.path.abspath(request.args.get('serverDir', os.path.join(os.getcwd(), "mc_server")))
+    servers = request.args.get('servers', 1, type=int)
+    return jsonify({
+        "profiles": PROFILES,
+        "default": DEFAULT_PROFILE,
+        "recommended": recommend_heap(servers=servers, view_distance=read_view_distance(server_dir)),
+    })
 
 # Helper function to send updates via WebSocket
-def send_websocket_update(data):
-    """Send update via WebSocket"""
+def send_websocket_update(message):
+    """Send a bus message to every WebSocket client, reusing its serialized JSON"""
     try:
-        websocket_server.send_message(data)
+        websocket_server.send_message(message.json(), message.topic)
     except Exception as e:
         print(f"WebSocket error: {e}")
 
-# Modified report_progress function to send updates via both SSE and WebSocket
-def report_progress(data):
-    """Report progress via both SSE and WebSocket"""
-    progress_queue.put(data)
-    send_websocket_update(data)
+def websocket_backlog(topic, since):
+    """What a new WebSocket subscriber missed: a setup job's latest update, or console lines after ``since``"""
+    if topic.startswith("setup:"):
+        return [message.json() for message in bus.retained(topic)]
+    server = registry.get(topic[len("logs:"):]) if topic.startswith("logs:") else None
+    if server is None or not isinstance(since, int):
+        return []
+    lines, entries, newest, dropped = server.console.entries_since(since)
+    if not lines:
+        return []
+    return [json.dumps({"type": "logs", "serverId": server.id, "seq": newest, "dropped": dropped,
+                        "lines": log_entries(lines, newest, entries)})]
+
+# WebSocket clients see everything published on the bus
+bus.listen(send_websocket_update, "*")
+websocket_server.on_subscribe = websocket_backlog
+
+# Publish server state changes (starting/running/stopping/exited/crashed) on the server's topic
+supervisor.subscribe(lambda event: bus.publish(f"server:{event.key}", {"type": "server_status", **event.to_dict()}))
+
+def report_progress(job_id, data):
+    """Publish a setup job's progress to its SSE and WebSocket subscribers"""
+    bus.publish(f"setup:{job_id}", {**data, "jobId": job_id})
+
+def sse_response(messages):
+    """Stream an iterable of already formatted server-sent event frames"""
+    return Response(messages, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def sse_events(subscription, until=None):
+    """SSE frames for a bus subscription, ending after a message ``until(data)`` accepts or when the client leaves"""
+    try:
+        while True:
+            messages = subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+            if not messages:
+                yield ": keepalive\n\n"
+                continue
+            for message in messages:
+                yield f"data: {message.json()}\n\n"
+                if until and until(message.data):
+                    return
+    finally:
+        subscription.close()
 
 # Setup worker function that uses WebSocket for updates
-def setup_worker_with_websocket(data):
+def setup_worker_with_websocket(job_id, data):
     try:
-        report_progress({"type": "progress", "message": "Starting setup...", "percent": 0})
+        report_progress(job_id, {"type": "progress", "message": "Starting setup...", "percent": 0})
         
         # Parse parameters
         version = data.get('version', 'latest')
@@ -102,153 +201,235 @@ def setup_worker_with_websocket(data):
         max_memory = data.get('maxMemory', '2G')
         accept_eula = data.get('acceptEula', False)
         force_download = data.get('forceDownload', False)
+        jvm_profile = data.get('jvmProfile', DEFAULT_PROFILE)
         
         ensure_dir(server_dir)
-        report_progress({"type": "progress", "message": f"Created directory: {server_dir}", "percent": 10})
+        report_progress(job_id, {"type": "progress", "message": f"Created directory: {server_dir}", "percent": 10})
         
         # Get version info
-        report_progress({"type": "progress", "message": f"Resolving version '{version}'...", "percent": 20})
+        report_progress(job_id, {"type": "progress", "message": f"Resolving version '{version}'...", "percent": 20})
         version_id, server_download = get_version_info(version)
         url = server_download.get("url")
         expected_sha1 = server_download.get("sha1")
         
-        report_progress({"type": "progress", "message": f"Resolved version: {version_id}", "percent": 30})
+        report_progress(job_id, {"type": "progress", "message": f"Resolved version: {version_id}", "percent": 30})
         
         # Download server.jar
         jar_path = os.path.join(server_dir, "server.jar")
         if os.path.exists(jar_path) and not force_download:
-            report_progress({"type": "progress", "message": "server.jar already exists, skipping download", "percent": 60})
+            report_progress(job_id, {"type": "progress", "message": "server.jar already exists, skipping download", "percent": 60})
+            if expected_sha1:
+                report_progress(job_id, {"type": "progress", "message": "Verifying SHA1...", "percent": 70})
+                verify_sha1(jar_path, expected_sha1)
+                report_progress(job_id, {"type": "progress", "message": "SHA1 verified", "percent": 80})
         else:
-            report_progress({"type": "progress", "message": "Downloading server.jar...", "percent": 40})
-            download_file(url, jar_path)
-            report_progress({"type": "progress", "message": "Download complete", "percent": 60})
-        
-        # Verify SHA1
-        if expected_sha1 and os.path.exists(jar_path):
-            report_progress({"type": "progress", "message": "Verifying SHA1...", "percent": 70})
-            actual_sha1 = sha1_file(jar_path)
-            if actual_sha1.lower() != expected_sha1.lower():
-                raise RuntimeError(f"SHA1 mismatch for server.jar")
-            report_progress({"type": "progress", "message": "SHA1 verified", "percent": 80})
+            report_progress(job_id, {"type": "progress", "message": "Downloading server.jar...", "percent": 40})
+            def on_progress(done, total):
+                if total:
+                    report_progress(job_id, {"type": "progress",
+                                     "message": f"Downloading server.jar... {done/1_000_000:.1f}MB / {total/1_000_000:.1f}MB",
+                                     "percent": 40 + int(20 * done / total)})
+            result = install_server_jar(url, jar_path, expected_sha1, progress=throttled(on_progress))
+            report_progress(job_id, {"type": "progress", "message": f"server.jar {result}" + (", SHA1 verified" if expected_sha1 else ""), "percent": 80})
         
         # Write EULA
         eula_path = write_eula(server_dir, accept_eula)
-        report_progress({"type": "progress", "message": f"EULA written to {os.path.basename(eula_path)}", "percent": 90})
+        report_progress(job_id, {"type": "progress", "message": f"EULA written to {os.path.basename(eula_path)}", "percent": 90})
         
         # Write start scripts
-        bat_path, sh_path = write_start_script(server_dir, min_memory, max_memory, True)  # Always nogui for web
-        report_progress({"type": "progress", "message": "Created start scripts", "percent": 95})
+        bat_path, sh_path = write_start_script(server_dir, min_memory, max_memory, True, jvm_profile,  # Always nogui for web
+                                               script_java(version_id))
+        report_progress(job_id, {"type": "progress", "message": "Created start scripts", "percent": 95})
         
-        report_progress({"type": "success", "message": "Setup complete!", "percent": 100})
+        report_progress(job_id, {"type": "success", "message": "Setup complete!", "percent": 100})
         
     except Exception as e:
-        report_progress({"type": "error", "message": str(e), "percent": 0})
+        report_progress(job_id, {"type": "error", "message": str(e), "percent": 0})
 
 @app.route('/api/setup', methods=['POST'])
 def api_setup():
     data = request.json
+    job_id = uuid.uuid4().hex
     
     # Start setup in background thread
-    threading.Thread(target=lambda: setup_worker_with_websocket(data), daemon=True).start()
+    threading.Thread(target=lambda: setup_worker_with_websocket(job_id, data), daemon=True).start()
     
-    return jsonify({"status": "started"})
+    return jsonify({"status": "started", "jobId": job_id})
 
 @app.route('/api/progress')
 def api_progress():
-    def generate():
-        while True:
-            try:
-                # Get progress update with timeout
-                progress = progress_queue.get(timeout=1)
-                yield f"data: {json.dumps(progress)}\\n\\n"
-                if progress.get("type") in ["success", "error"]:
-                    break
-            except queue.Empty:
-                # Send heartbeat to keep connection alive
-                yield f"data: {json.dumps({'type': 'heartbeat'})}\\n\\n"
-    
-    return Response(generate(), mimetype='text/plain')
+    """Progress of one setup job (``?jobId=``), or of every job; ends with the job's success or error"""
+    job_id = request.args.get('jobId')
+    # A slow viewer only needs the newest progress line, never a backlog of them
+    subscription = bus.subscribe(f"setup:{job_id}" if job_id else "setup:*", maxlen=64, policy=COALESCE)
+    return sse_response(sse_events(subscription, until=lambda data: data.get("type") in ("success", "error")))
+
+def request_server(data):
+    """The server a request names by ``serverId``, else a registered server in ``serverDir``, else the ad-hoc one"""
+    server_id = data.get('serverId')
+    if server_id:
+        return registry.get(server_id)
+    if data.get('serverDir'):
+        server = registry.find_by_directory(data['serverDir'])
+        if server is not None:
+            return server
+    return registry.get(WEB_SERVER_ID)
+
+@app.route('/api/servers')
+def api_servers():
+    """Every known server with its saved settings and current status"""
+    return jsonify({"servers": [{**server.to_dict(), **registry.status(server)} for server in registry.servers()]})
 
 @app.route('/api/start-server', methods=['POST'])
 def api_start_server():
-    global server_process
+    data = request.json or {}
+    server = request_server(data)
+    if server is None and data.get('serverId'):
+        return jsonify({"error": f"Unknown server '{data['serverId']}'"}), 404
     
-    data = request.json
-    server_dir = os.path.abspath(data.get('serverDir', os.path.join(os.getcwd(), "mc_server")))
-    min_memory = data.get('minMemory', '1G')
-    max_memory = data.get('maxMemory', '2G')
-    
-    if server_process and server_process.poll() is None:
-        return jsonify({"error": "Server is already running"}), 400
-    
-    jar_path = os.path.join(server_dir, "server.jar")
-    if not os.path.isfile(jar_path):
-        return jsonify({"error": "server.jar not found. Run setup first."}), 400
+    if server is None or server.id == WEB_SERVER_ID:
+        # Not a saved server: run the directory from the request under the ad-hoc id
+        server = server or registry.add(ServerConfig(server_id=WEB_SERVER_ID), persist=False)
+        with registry.lock(server.id):
+            if not supervisor.is_alive(server.id):
+                registry.move(server, os.path.abspath(data.get('serverDir', os.path.join(os.getcwd(), "mc_server"))))
+                server.name = os.path.basename(server.directory)
+                server.version = data.get('version') or ""
+                server.min_memory = data.get('minMemory', '1G')
+                server.max_memory = data.get('maxMemory', '2G')
+                server.java_path = data.get('javaPath') or ""
+                server.jvm_profile = data.get('jvmProfile', DEFAULT_PROFILE)
     
-    try:
-        cmd = [
-            "java",
-            f"-Xms{min_memory}",
-            f"-Xmx{max_memory}",
-            "-jar",
-            "server.jar",
-            "nogui"
-        ]
+    with registry.lock(server.id):
+        if supervisor.is_alive(server.id):
+            return jsonify({"error": f"Server '{server.name}' is already running"}), 400
         
-        server_process = subprocess.Popen(
-            cmd,
-            cwd=server_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1
-        )
+        jar_path = os.path.join(server.directory, "server.jar")
+        if not os.path.isfile(jar_path):
+            return jsonify({"error": "server.jar not found. Run setup first."}), 400
         
-        return jsonify({"status": "started", "pid": server_process.pid})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        try:
+            java = resolve_java(server.version, server.java_path)
+        except RuntimeError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        try:
+            cmd = server_command(java, server.min_memory, server.max_memory, True, server.jvm_profile, jar_path)
+            
+            server.process = subprocess.Popen(
+                cmd,
+                cwd=server.directory,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                bufsize=1
+            )
+            
+            supervisor.watch(server.id, server.process, server.name)
+            resources.set_limit(server.id, memory_mb(server.max_memory))
+            stream_server_output(server)
+            return jsonify({"status": "started", "serverId": server.id, "pid": server.process.pid, "java": java})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
 
 @app.route('/api/stop-server', methods=['POST'])
 def api_stop_server():
-    global server_process
-    
-    if not server_process or server_process.poll() is not None:
+    data = request.get_json(silent=True) or {}
+    server = request_server(data)
+    if server is None and data.get('serverId'):
+        return jsonify({"error": f"Unknown server '{data['serverId']}'"}), 404
+    if server is None:
         return jsonify({"error": "Server is not running"}), 400
     
-    try:
-        server_process.terminate()
-        server_process.wait(timeout=10)
-        return jsonify({"status": "stopped"})
-    except subprocess.TimeoutExpired:
-        server_process.kill()
-        return jsonify({"status": "force_stopped"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    done = threading.Event()
+    outcome = []
+
+    def on_stopped(key, result, returncode):
+        outcome.append(result)
+        done.set()
+        bus.publish(f"server:{key}", {"type": "server_stopped", "serverId": key, "outcome": result,
+                                      "returncode": returncode})
+
+    with registry.lock(server.id):
+        if not supervisor.is_alive(server.id):
+            return jsonify({"error": f"Server '{server.name}' is not running"}), 400
+        try:
+            # Send "stop" so the world is saved, escalating to SIGTERM/SIGKILL in the background
+            get_lifecycle().stop(server.id, server.process, on_stopped)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    # Waited on without the server's lock; a slow stop is finished in the background and
+    # reported as "server_stopped" on the event bus
+    if not done.wait(STOP_WAIT_SECONDS):
+        return jsonify({"status": "stopping", "serverId": server.id}), 202
+    if outcome[0] == TIMED_OUT:
+        return jsonify({"error": "Server did not exit after being killed"}), 500
+    return jsonify({"status": "stopped" if outcome[0] == STOPPED else "force_stopped", "serverId": server.id})
 
 @app.route('/api/server-status')
 def api_server_status():
-    global server_process
-    
-    if server_process is None:
+    server = request_server(request.args)
+    if server is None:
+        if request.args.get('serverId'):
+            return jsonify({"error": f"Unknown server '{request.args['serverId']}'"}), 404
         return jsonify({"status": "not_started"})
-    elif server_process.poll() is None:
-        return jsonify({"status": "running", "pid": server_process.pid})
-    else:
-        return jsonify({"status": "stopped", "exit_code": server_process.returncode})
+    return jsonify(registry.status(server))
 
 @app.route('/api/server-logs')
 def api_server_logs():
-    global server_process
+    """Follow a server's console as server-sent events, from ``?since=`` or ``Last-Event-ID`` when given"""
+    server = request_server(request.args)
+    if server is None:
+        return jsonify({"error": "No such server"}), 404
+    since = request.args.get('since', type=int)
+    if since is None:
+        since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = server.console.last_seq
+    pid = server.process.pid if server.process else None
     
     def generate():
-        if server_process and server_process.stdout:
-            for line in iter(server_process.stdout.readline, ''):
-                if line:
-                    yield f"data: {json.dumps({'log': line.strip()})}\\n\\n"
-                if server_process.poll() is not None:
+        # The bus only says when to look again; lines are read from the console buffer, never the pipe.
+        # A retained end marker for the current process is replayed, so finished output is sent once.
+        subscription = bus.subscribe(f"logs:{server.id}", maxlen=4, policy=COALESCE)
+        seq = since
+        ended = pid is None
+        try:
+            while True:
+                lines, entries, newest, dropped = server.console.entries_since(seq)
+                if dropped:
+                    yield f"data: {json.dumps({'type': 'gap', 'since': seq})}\n\n"
+                for entry in log_entries(lines, newest, entries):
+                    yield f"id: {entry['seq']}\ndata: {json.dumps(entry)}\n\n"
+                seq = newest
+                if ended:
                     break
+                messages = subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                if not messages:
+                    yield ": keepalive\n\n"
+                # One more pass picks up the lines written before the end
+                ended = any(m.data["type"] == "logs_end" and m.data["pid"] == pid for m in messages)
+        finally:
+            subscription.close()
     
-    return Response(generate(), mimetype='text/plain')
+    return sse_response(generate())
+
+@app.route('/api/servers/<server_id>/logs')
+def api_server_log_lines(server_id):
+    """Console lines after ``?since=`` (at most ``?limit=``), for clients that poll"""
+    server = registry.get(server_id)
+    if server is None:
+        return jsonify({"error": f"Unknown server '{server_id}'"}), 404
+    lines, entries, newest, dropped = server.console.entries_since(request.args.get('since', 0, type=int))
+    limit = request.args.get('limit', type=int)
+    if limit is not None and len(lines) > limit:
+        # Page forward from the oldest missing line; the client asks again from the returned seq
+        newest -= len(lines) - limit
+        lines = lines[:limit]
+        entries = entries[:limit]
+    return jsonify({"serverId": server.id, "seq": newest, "dropped": dropped,
+                    "running": supervisor.is_alive(server.id), "lines": log_entries(lines, newest, entries)})
 
 @app.route('/api/properties', methods=['GET', 'POST'])
 def api_properties():
@@ -301,89 +482,60 @@ def api_properties():
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
-# Helper function to send updates via WebSocket
-def send_websocket_update(data):
-    """Send update to all connected WebSocket clients"""
-    websocket_server.send_message(data)
-
-# Update progress reporting to also send via WebSocket
-def report_progress(data):
-    """Report progress via both SSE and WebSocket"""
-    progress_queue.put(data)
-    send_websocket_update(data)
-
-# Update setup_worker to use the new report_progress function
-def setup_worker_with_websocket(data):
-    try:
-        report_progress({"type": "progress", "message": "Starting setup...", "percent": 0})
-        
-        # Parse parameters
-        version = data.get('version', 'latest')
-        server_dir = os.path.abspath(data.get('serverDir', os.path.join(os.getcwd(), "mc_server")))
-        min_memory = data.get('minMemory', '1G')
-        max_memory = data.get('maxMemory', '2G')
-        accept_eula = data.get('acceptEula', False)
-        force_download = data.get('forceDownload', False)
-        
-        ensure_dir(server_dir)
-        report_progress({"type": "progress", "message": f"Created directory: {server_dir}", "percent": 10})
-        
-        # Get version info
-        report_progress({"type": "progress", "message": f"Resolving version '{version}'...", "percent": 20})
-        version_id, server_download = get_version_info(version)
-        url = server_download.get("url")
-        expected_sha1 = server_download.get("sha1")
-        
-        report_progress({"type": "progress", "message": f"Resolved version: {version_id}", "percent": 30})
-        
-        # Download server.jar
-        jar_path = os.path.join(server_dir, "server.jar")
-        if os.path.exists(jar_path) and not force_download:
-            report_progress({"type": "progress", "message": "server.jar already exists, skipping download", "percent": 60})
-        else:
-            report_progress({"type": "progress", "message": "Downloading server.jar...", "percent": 40})
-            download_file(url, jar_path)
-            report_progress({"type": "progress", "message": "Download complete", "percent": 60})
-        
-        # Verify SHA1
-        if expected_sha1 and os.path.exists(jar_path):
-            report_progress({"type": "progress", "message": "Verifying SHA1...", "percent": 70})
-            actual_sha1 = sha1_file(jar_path)
-            if actual_sha1.lower() != expected_sha1.lower():
-                raise RuntimeError(f"SHA1 mismatch for server.jar")
-            report_progress({"type": "progress", "message": "SHA1 verified", "percent": 80})
-        
-        # Write EULA
-        eula_path = write_eula(server_dir, accept_eula)
-        report_progress({"type": "progress", "message": f"EULA written to {os.path.basename(eula_path)}", "percent": 90})
-        
-        # Write start scripts
-        bat_path, sh_path = write_start_script(server_dir, min_memory, max_memory, True)  # Always nogui for web
-        report_progress({"type": "progress", "message": "Created start scripts", "percent": 95})
-        
-        report_progress({"type": "success", "message": "Setup complete!", "percent": 100})
-        
-    except Exception as e:
-        report_progress({"type": "error", "message": str(e), "percent": 0})
-
-# Update the api_setup route to use the new setup worker
-# Function is already defined above
-
-# Update server log handling to also send via WebSocket
-def handle_server_output(process):
-    """Handle server output and send to both SSE and WebSocket"""
-    if process and process.stdout:
-        for line in iter(process.stdout.readline, ''):
-            if line:
-                log_data = {"log": line.strip()}
-                progress_queue.put({"type": "log", "data": log_data})
-                send_websocket_update({"type": "log", "data": log_data})
-            if process.poll() is not None:
-                break
-
-# Update server start to use the new output handler
-# Function is already defined above
-        
+def log_message(line):
+    """Log payload for one line of server output, with its event kind and fields when it isn't plain text"""
+    event = line_parser.parse(line.rstrip("\r\n"))
+    data = {"log": line.strip()}
+    if event.kind != LOG:
+        data["event"] = event.to_dict()
+    return data
+
+def log_entries(lines, newest_seq, entries=None):
+    """Log payloads for consecutive console lines ending at ``newest_seq``, each with its sequence number.
+
+    ``entries`` are the payloads stored with the lines when they were read; only lines without one
+    (e.g. paged back in from the console spool) are parsed here.
+    """
+    first = newest_seq - len(lines) + 1
+    if entries is None:
+        entries = [None] * len(lines)
+    return [{"seq": first + i, **(entry or log_message(line))}
+            for i, (line, entry) in enumerate(zip(lines, entries))]
+
+def stream_server_output(server):
+    """Read a started server's stdout once, on the shared console reactor, into its console buffer and metrics.
+
+    Every chunk is published on ``logs:<server id>`` so WebSocket clients and
+    SSE followers pick it up; they catch up from the buffer by sequence number.
+    """
+    parser = LogParser()
+    topic = f"logs:{server.id}"
+    pid = server.process.pid
+    
+    def on_events(events):
+        for event in events:
+            if event.kind == DONE:
+                supervisor.mark_running(server.id)
+        metrics.feed(server.id, events)
+    
+    def publish(lines):
+        # Parsed once here and stored with the lines, so no viewer parses them again
+        entries = [log_message(line) for line in lines]
+        server.console.append(lines, entries)
+        seq = server.console.last_seq
+        bus.publish(topic, {"type": "logs", "serverId": server.id, "seq": seq,
+                            "lines": log_entries(lines, seq, entries)})
+    
+    def on_lines(lines):
+        publish(lines)
+        on_events(parser.feed(lines))
+    
+    def on_close():
+        on_events(parser.flush())
+        publish(["[Process ended]\n"])
+        bus.publish(topic, {"type": "logs_end", "serverId": server.id, "pid": pid, "seq": server.console.last_seq})
+    
+    get_console_reactor().add(server.process.stdout, on_lines, on_close)
 
 
 if __name__ == '__main__':
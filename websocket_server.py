@@ -2,79 +2,190 @@ import asyncio
 import websockets
 import json
 import threading
-import queue
 import socket
 import time
+from collections import deque
+
+from event_bus import DROP_OLDEST, COALESCE
+
+# Messages queued per client before the slow-consumer policy kicks in
+CLIENT_QUEUE_SIZE = 256
+# Overflows after which a client that isn't reading is disconnected
+DISCONNECT_AFTER_DROPS = 1024
+
+
+class _Client:
+    """One connection's subscriptions and bounded outbound queue, drained by its own sender task."""
+
+    def __init__(self, websocket, max_queue):
+        self.websocket = websocket
+        self.topics = set()
+        self.pending = deque()
+        self.max_queue = max_queue
+        self.dropped = 0
+        # Messages dropped since the client last caught up with its queue
+        self.behind = 0
+        self.ready = asyncio.Event()
+        self.task = None
+
+    def enqueue(self, message, topic, policy):
+        """Queue a message without waiting, applying ``policy`` if the queue overflows."""
+        self.pending.append((topic, message))
+        if len(self.pending) > self.max_queue:
+            before = len(self.pending)
+            if policy == COALESCE:
+                # Keep only the newest pending message of each topic
+                newest = {}
+                for item in self.pending:
+                    newest[item[0]] = item
+                self.pending = deque(item for item in self.pending if newest[item[0]] is item)
+            while len(self.pending) > self.max_queue:
+                self.pending.popleft()
+            self.dropped += before - len(self.pending)
+            self.behind += before - len(self.pending)
+        self.ready.set()
+
 
 class WebSocketServer:
-    def __init__(self, host='localhost', port=8765, max_retry_ports=10):
+    """Pushes JSON messages to browsers.
+
+    ``send_message`` may be called from any thread. Each broadcast is
+    serialized once and appended to every target client's bounded queue;
+    a sender task per client drains its own queue, so a slow or stalled
+    browser only delays itself. When a client's queue is full the oldest
+    message is dropped (``drop_oldest``), or pending messages are first
+    collapsed to the newest per topic (``coalesce``); a client that has
+    lost more than ``disconnect_after`` messages without catching up is
+    disconnected.
+    """
+
+    def __init__(self, host='localhost', port=8765, max_retry_ports=10, opt_in_prefixes=(),
+                 max_queue=CLIENT_QUEUE_SIZE, policy=DROP_OLDEST, disconnect_after=DISCONNECT_AFTER_DROPS):
         self.host = host
         self.port = port
         self.max_retry_ports = max_retry_ports
-        self.clients = set()
-        self.message_queue = queue.Queue()
+        # websocket -> _Client; only touched on the event loop thread
+        self.clients = {}
+        # Messages on topics with these prefixes only go to clients that subscribed to the topic
+        self.opt_in_prefixes = tuple(opt_in_prefixes)
+        # on_subscribe(topic, since) returns the messages a new subscriber missed
+        self.on_subscribe = None
+        self.max_queue = max_queue
+        self.policy = policy
+        self.disconnect_after = disconnect_after
+        # Messages from other threads wait here until the event loop flushes them
+        self._outbox = deque()
+        self._outbox_lock = threading.Lock()
+        self._flush_scheduled = False
+        self.loop = None
         self.running = False
         self.server = None
         self.thread = None
     
     async def handler(self, websocket):
         # Register client
-        self.clients.add(websocket)
+        client = _Client(websocket, self.max_queue)
+        client.task = asyncio.create_task(self._send_loop(client))
+        self.clients[websocket] = client
         try:
             # Handle incoming messages
             async for message in websocket:
                 try:
                     data = json.loads(message)
-                    # Process message if needed
-                    print(f"Received message: {data}")
-                    
-                    # Echo back for testing
-                    await websocket.send(json.dumps({"type": "echo", "data": data}))
+                    if data.get("type") == "subscribe":
+                        self.subscribe(client, data.get("topic", ""), data.get("since"))
+                    elif data.get("type") == "unsubscribe":
+                        client.topics.discard(data.get("topic"))
+                    else:
+                        # Echo back for testing
+                        print(f"Received message: {data}")
+                        self._enqueue(client, json.dumps({"type": "echo", "data": data}))
                 except json.JSONDecodeError:
                     print(f"Invalid JSON received: {message}")
         except websockets.exceptions.ConnectionClosed:
             pass
         finally:
             # Unregister client
-            self.clients.remove(websocket)
+            self.clients.pop(websocket, None)
+            client.task.cancel()
     
-    async def broadcast(self, message):
+    def subscribe(self, client, topic, since=None):
+        """Start sending ``topic`` to one client, first replaying what it missed after ``since``"""
+        client.topics.add(topic)
+        backlog = self.on_subscribe(topic, since) if self.on_subscribe else []
+        for message in backlog:
+            self._enqueue(client, message, topic)
+        self._enqueue(client, json.dumps({"type": "subscribed", "topic": topic}))
+    
+    def broadcast(self, message, topic=None):
+        """Queue ``message`` for every client (or the topic's subscribers); never waits on a client"""
         if not self.clients:
             return
         
-        # Convert message to JSON string if it's a dict
+        # Convert message to JSON string if it's a dict, once for all clients
         if isinstance(message, dict):
             message = json.dumps(message)
         
-        # Send to all connected clients
-        disconnected_clients = set()
-        for client in self.clients:
-            try:
-                await client.send(message)
-            except websockets.exceptions.ConnectionClosed:
-                disconnected_clients.add(client)
-        
-        # Remove disconnected clients
-        for client in disconnected_clients:
-            self.clients.remove(client)
+        opt_in = bool(topic) and topic.startswith(self.opt_in_prefixes)
+        for client in list(self.clients.values()):
+            if not opt_in or topic in client.topics:
+                self._enqueue(client, message, topic)
     
-    async def message_sender(self):
-        while self.running:
-            try:
-                # Check for messages in the queue with a timeout
+    def _enqueue(self, client, message, topic=None):
+        client.enqueue(message, topic, self.policy)
+        if self.disconnect_after is not None and client.behind > self.disconnect_after:
+            print(f"Disconnecting slow WebSocket client after {client.behind} dropped messages")
+            self.clients.pop(client.websocket, None)
+            client.task.cancel()
+            asyncio.create_task(client.websocket.close(code=1008, reason="client too slow"))
+    
+    async def _send_loop(self, client):
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                while client.pending:
+                    _, message = client.pending.popleft()
+                    await client.websocket.send(message)
+                client.behind = 0
+        except websockets.exceptions.ConnectionClosed:
+            self.clients.pop(client.websocket, None)
+    
+    async def _flush_outbox(self):
+        """Broadcast everything sent from other threads until the outbox is empty; runs on the event loop"""
+        # Yield between slices so client sender tasks drain their queues during a long burst
+        step = max(1, self.max_queue // 2)
+        while True:
+            with self._outbox_lock:
+                if not self._outbox:
+                    self._flush_scheduled = False
+                    return
+                batch, self._outbox = self._outbox, deque()
+            for i, (message, topic) in enumerate(batch, 1):
                 try:
-                    message = self.message_queue.get(timeout=0.1)
-                    await self.broadcast(message)
-                    self.message_queue.task_done()
-                except queue.Empty:
-                    # No message in queue, just wait a bit
-                    await asyncio.sleep(0.1)
-            except Exception as e:
-                print(f"Error in message sender: {e}")
+                    self.broadcast(message, topic)
+                except Exception as e:
+                    print(f"Error in message sender: {e}")
+                if i % step == 0:
+                    await asyncio.sleep(0)
     
-    def send_message(self, message):
-        """Add message to queue to be sent to all clients"""
-        self.message_queue.put(message)
+    def send_message(self, message, topic=None):
+        """Send a message to all clients (or the topic's subscribers); safe to call from any thread.
+
+        The event loop is woken once per burst and broadcasts the whole batch in one pass.
+        """
+        loop = self.loop
+        if loop is None:
+            return  # not serving yet, so there is nobody to send to
+        with self._outbox_lock:
+            self._outbox.append((message, topic))
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            loop.call_soon_threadsafe(lambda: loop.create_task(self._flush_outbox()))
+        except RuntimeError:
+            pass  # the loop has shut down
     
     async def start_server(self):
         self.running = True
@@ -86,12 +197,12 @@ class WebSocketServer:
         while retry_count < self.max_retry_ports:
             try:
                 self.server = await websockets.serve(self.handler, self.host, current_port)
-                # Start the message sender task
-                asyncio.create_task(self.message_sender())
+                self.loop = asyncio.get_running_loop()
                 print(f"WebSocket server started at ws://{self.host}:{current_port}")
                 # Update the port if it changed
                 self.port = current_port
                 await self.server.wait_closed()
+                self.loop = None
                 break
             except OSError as e:
                 if e.errno == 10048:  # Address already in use